@@ -1,17 +1,19 @@
 from __future__ import annotations
 
+import importlib
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Tuple
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Tuple
 
 import pandas as pd
 
-from bayt import BaytScraper
-from glassdoor import Glassdoor
-from google_jobs import Google
-from indeed import Indeed
-from linkedin import LinkedIn
-from naukri import Naukri
-from model import JobType, Location, JobResponse, Country
+from incremental import incremental_hours_old, load_watermark, save_watermark
+from export import to_typed_frame
+from sinks import Sink
+from store import JobStore
+from model import JobPost, JobType, Location, JobResponse, Country
 from model import SalarySource, ScraperInput, Site
 from util import (
     set_logger_level,
@@ -20,9 +22,38 @@ from util import (
     get_enum_from_value,
     map_str_to_site,
     convert_to_annual,
+    circuit_breaker,
+    cookie_store,
+    deadline_passed,
     desired_order,
+    ProgressReporter,
+    report_progress,
+    time_left,
 )
-from ziprecruiter import ZipRecruiter
+
+# seconds scrapers get past the deadline to finish in-flight requests and hand back
+# what they have, before their site is reported as timed out
+deadline_grace = 10
+
+# scraper of each site as (package, class), imported on first use so a search only
+# loads the packages, and their dependencies, of the sites it scrapes
+scraper_classes = {
+    Site.LINKEDIN: ("linkedin", "LinkedIn"),
+    Site.INDEED: ("indeed", "Indeed"),
+    Site.ZIP_RECRUITER: ("ziprecruiter", "ZipRecruiter"),
+    Site.GLASSDOOR: ("glassdoor", "Glassdoor"),
+    Site.GOOGLE: ("google_jobs", "Google"),
+    Site.BAYT: ("bayt", "BaytScraper"),
+    Site.NAUKRI: ("naukri", "Naukri"),
+}
+
+
+def get_scraper_class(site: Site):
+    """
+    Imports the scraper of site, on its first use
+    """
+    package, class_name = scraper_classes[site]
+    return getattr(importlib.import_module(package), class_name)
 
 
 def scrape_jobs(
@@ -41,27 +72,136 @@ def scrape_jobs(
     description_format: str = "markdown",
     linkedin_fetch_description: bool | None = False,
     linkedin_company_ids: list[int] | None = None,
+    glassdoor_concurrent_pages: int = 1,
     offset: int | None = 0,
     hours_old: int = None,
     enforce_annual_salary: bool = False,
     verbose: int = 0,
+    timeout: float | None = None,
+    deadline: datetime | float | None = None,
+    store: JobStore | str | None = None,
+    incremental: bool = False,
+    sink: Sink | None = None,
+    dtype_backend: str | None = None,
+    progress: Callable[[str, str, dict], None] | None = None,
     **kwargs,
 ) -> pd.DataFrame:
     """
     Scrapes job data from job boards concurrently
-    :return: Pandas DataFrame containing job data
+    :param timeout: seconds the whole call may take, sites still scraping return what they have
+    :param deadline: same as timeout but as a datetime or time.time() timestamp
+    :param store: JobStore (or path of its database) the results are upserted into
+    :param incremental: only return jobs earlier incremental runs of the same query
+        haven't, stopping each site's pagination once it reaches them. hours_old
+        defaults to the time since the last complete run, except on Indeed with
+        job_type/is_remote/easy_apply and LinkedIn with easy_apply, which drop those
+        filters when a date filter is set.
+    :param sink: CsvSink, JsonlSink or ParquetSink the jobs are written to as each site
+        finishes instead of being collected, the returned DataFrame is then empty.
+        The sink is closed when scraping is done.
+    :param dtype_backend: "optimized" for categorical, Arrow string, nullable integer and
+        datetime64 columns instead of Python objects, several times smaller in memory
+    :param progress: called as progress(site, event, details) from the scraping threads,
+        events are "started", "page" (page, jobs so far), "waiting" (seconds),
+        "retrying" (attempt, seconds) and "done" (status, jobs)
+    :return: Pandas DataFrame containing job data, per-site status
+        (complete, truncated, timeout, error or circuit_open) in df.attrs["site_status"]
+    """
+    if dtype_backend not in (None, "optimized"):
+        raise ValueError(f"Unknown dtype_backend {dtype_backend}, use None or 'optimized'")
+    site_status = {}
+    rows = iter_jobs(
+        site_name=site_name,
+        search_term=search_term,
+        google_search_term=google_search_term,
+        location=location,
+        distance=distance,
+        is_remote=is_remote,
+        job_type=job_type,
+        easy_apply=easy_apply,
+        results_wanted=results_wanted,
+        country_indeed=country_indeed,
+        proxies=proxies,
+        ca_cert=ca_cert,
+        description_format=description_format,
+        linkedin_fetch_description=linkedin_fetch_description,
+        linkedin_company_ids=linkedin_company_ids,
+        glassdoor_concurrent_pages=glassdoor_concurrent_pages,
+        offset=offset,
+        hours_old=hours_old,
+        enforce_annual_salary=enforce_annual_salary,
+        verbose=verbose,
+        timeout=timeout,
+        deadline=deadline,
+        incremental=incremental,
+        site_status=site_status,
+        progress=progress,
+    )
+    job_store = JobStore(store) if isinstance(store, str) else store
+
+    try:
+        if sink is not None:
+            with sink:
+                write_to_sink(rows, sink, job_store)
+            jobs_df = pd.DataFrame(columns=desired_order)
+        else:
+            jobs_df = pd.DataFrame(list(rows), columns=desired_order)
+            if jobs_df.empty:
+                jobs_df = pd.DataFrame()
+            else:
+                jobs_df = jobs_df.sort_values(
+                    by=["site", "date_posted"], ascending=[True, False]
+                ).reset_index(drop=True)
+                if job_store is not None:
+                    job_store.upsert(jobs_df)
+                if dtype_backend == "optimized":
+                    jobs_df = to_typed_frame(jobs_df, string_dtype="string[pyarrow]")
+    finally:
+        if isinstance(store, str):
+            job_store.close()
+    jobs_df.attrs["site_status"] = site_status
+    return jobs_df
+
+
+def iter_jobs(
+    site_name: str | list[str] | Site | list[Site] | None = None,
+    search_term: str | None = None,
+    google_search_term: str | None = None,
+    location: str | None = None,
+    distance: int | None = 50,
+    is_remote: bool = False,
+    job_type: str | None = None,
+    easy_apply: bool | None = None,
+    results_wanted: int = 15,
+    country_indeed: str = "usa",
+    proxies: list[str] | str | None = None,
+    ca_cert: str | None = None,
+    description_format: str = "markdown",
+    linkedin_fetch_description: bool | None = False,
+    linkedin_company_ids: list[int] | None = None,
+    glassdoor_concurrent_pages: int = 1,
+    offset: int | None = 0,
+    hours_old: int = None,
+    enforce_annual_salary: bool = False,
+    verbose: int = 0,
+    timeout: float | None = None,
+    deadline: datetime | float | None = None,
+    incremental: bool = False,
+    site_status: dict[str, str] | None = None,
+    progress: Callable[[str, str, dict], None] | None = None,
+    **kwargs,
+) -> Iterator[dict]:
+    """
+    Same search as scrape_jobs, but yields each job as a row (a dict of the
+    desired_order columns) as soon as its site finishes, sites in the order they finish
+    :param site_status: filled with each site's status as it finishes
+    :param progress: see scrape_jobs, a site's "done" comes after its rows
+    :return: job rows, unsorted
     """
-    SCRAPER_MAPPING = {
-        Site.LINKEDIN: LinkedIn,
-        Site.INDEED: Indeed,
-        Site.ZIP_RECRUITER: ZipRecruiter,
-        Site.GLASSDOOR: Glassdoor,
-        Site.GOOGLE: Google,
-        Site.BAYT: BaytScraper,
-        Site.NAUKRI: Naukri,
-    }
     set_logger_level(verbose)
     job_type = get_enum_from_value(job_type) if job_type else None
+    if site_status is None:
+        site_status = {}
 
     def get_site_type():
         site_types = list(Site)
@@ -98,150 +238,234 @@ def scrape_jobs(
         linkedin_fetch_description=linkedin_fetch_description,
         results_wanted=results_wanted,
         linkedin_company_ids=linkedin_company_ids,
+        glassdoor_concurrent_pages=glassdoor_concurrent_pages,
         offset=offset,
         hours_old=hours_old,
+        deadline=get_deadline(timeout, deadline),
     )
+    seen_ids: set[str] = set()
+    last_run = None
+    if incremental:
+        seen_ids, last_run = load_watermark(scraper_input, scraper_input.site_type)
+        scraper_input.seen_ids = seen_ids
 
-    def scrape_site(site: Site) -> Tuple[str, JobResponse]:
-        scraper_class = SCRAPER_MAPPING[site]
-        scraper = scraper_class(proxies=proxies, ca_cert=ca_cert)
-        scraped_data: JobResponse = scraper.scrape(scraper_input)
+    def get_site_name(site: Site) -> str:
         cap_name = site.value.capitalize()
-        site_name = "ZipRecruiter" if cap_name == "Zip_recruiter" else cap_name
-        create_logger(site_name).info(f"finished scraping")
-        return site.value, scraped_data
+        return "ZipRecruiter" if cap_name == "Zip_recruiter" else cap_name
+
+    def notify(site: Site, event: str, **details):
+        with ProgressReporter(site, progress):
+            report_progress(event, **details)
+
+    def site_input(site: Site) -> ScraperInput:
+        """
+        scraper_input for site, incremental runs default hours_old to the last run
+        where the site can combine it with the other filters
+        """
+        if not incremental or hours_old is not None:
+            return scraper_input
+        site_hours_old = incremental_hours_old(scraper_input, site, last_run)
+        if site_hours_old is None:
+            return scraper_input
+        return scraper_input.model_copy(update={"hours_old": site_hours_old})
 
-    site_to_jobs_dict = {}
+    def scrape_site(site: Site) -> Tuple[str, JobResponse, str]:
+        scraper_class = get_scraper_class(site)
+        scraper = scraper_class(proxies=proxies, ca_cert=ca_cert)
+        with ProgressReporter(site, progress):
+            report_progress("started")
+            scraped_data: JobResponse = scraper.scrape(site_input(site))
+        status = "complete"
+        if (
+            deadline_passed(scraper_input.deadline)
+            and len(scraped_data.jobs) < scraper_input.results_wanted
+        ):
+            status = "truncated"
+        create_logger(get_site_name(site)).info(f"finished scraping ({status})")
+        return site.value, scraped_data, status
 
     def worker(site):
         try:
-            site_val, scraped_info = scrape_site(site)
-            return site_val, scraped_info
+            return scrape_site(site)
         except Exception as e:
             # Log the error but don't fail the entire search
-            cap_name = site.value.capitalize()
-            site_name = "ZipRecruiter" if cap_name == "Zip_recruiter" else cap_name
+            site_name = get_site_name(site)
             logger = create_logger(site_name)
             logger.warning(f"Failed to scrape {site_name}: {str(e)}. Returning empty results.")
             # Return empty JobResponse instead of raising
-            return site.value, JobResponse(jobs=[])
-
-    with ThreadPoolExecutor() as executor:
-        future_to_site = {
-            executor.submit(worker, site): site for site in scraper_input.site_type
-        }
-
-        for future in as_completed(future_to_site):
-            try:
-                site_value, scraped_data = future.result()
-                site_to_jobs_dict[site_value] = scraped_data
-            except Exception as e:
-                # Additional safety net - if future.result() raises, catch it
-                site = future_to_site[future]
-                cap_name = site.value.capitalize()
-                site_name = "ZipRecruiter" if cap_name == "Zip_recruiter" else cap_name
-                logger = create_logger(site_name)
-                logger.warning(f"Failed to get results from {site_name}: {str(e)}. Skipping this site.")
-                # Add empty result so the search continues
-                site_to_jobs_dict[site.value] = JobResponse(jobs=[])
-
-    jobs_dfs: list[pd.DataFrame] = []
-
-    for site, job_response in site_to_jobs_dict.items():
-        for job in job_response.jobs:
-            job_data = job.dict()
-            job_url = job_data["job_url"]
-            job_data["site"] = site
-            job_data["company"] = job_data["company_name"]
-            job_data["job_type"] = (
-                ", ".join(job_type.value[0] for job_type in job_data["job_type"])
-                if job_data["job_type"]
-                else None
-            )
-            job_data["emails"] = (
-                ", ".join(job_data["emails"]) if job_data["emails"] else None
+            return site.value, JobResponse(jobs=[]), "error"
+
+    sites_to_scrape = []
+    for site in scraper_input.site_type:
+        if circuit_breaker.allow(site, proxies):
+            sites_to_scrape.append(site)
+        else:
+            # blocked recently, skip instead of sitting through its retries again
+            create_logger(get_site_name(site)).warning(
+                "Circuit open after repeated blocks, skipping this site."
             )
-            if job_data["location"]:
-                job_data["location"] = Location(
-                    **job_data["location"]
-                ).display_location()
-
-            # Handle compensation
-            compensation_obj = job_data.get("compensation")
-            if compensation_obj and isinstance(compensation_obj, dict):
-                # Safely handle interval - it might be a string or enum
-                interval_obj = compensation_obj.get("interval")
-                if interval_obj:
-                    if hasattr(interval_obj, 'value'):
-                        # It's an enum, get its value
-                        job_data["interval"] = interval_obj.value
-                    else:
-                        # It's a string or other type, use it directly
-                        job_data["interval"] = str(interval_obj)
-                else:
-                    job_data["interval"] = None
-                
-                job_data["min_amount"] = compensation_obj.get("min_amount")
-                job_data["max_amount"] = compensation_obj.get("max_amount")
-                job_data["currency"] = compensation_obj.get("currency", "USD")
-                job_data["salary_source"] = SalarySource.DIRECT_DATA.value
-                if enforce_annual_salary and (
-                    job_data["interval"]
-                    and job_data["interval"] != "yearly"
-                    and job_data["min_amount"]
-                    and job_data["max_amount"]
-                ):
-                    convert_to_annual(job_data)
+            site_status[site.value] = "circuit_open"
+            notify(site, "done", status="circuit_open", jobs=0)
+
+    executor = ThreadPoolExecutor()
+    try:
+        future_to_site = {executor.submit(worker, site): site for site in sites_to_scrape}
+        remaining = time_left(scraper_input.deadline)
+        finished = set()
+        try:
+            for future in as_completed(
+                future_to_site,
+                timeout=None if remaining is None else remaining + deadline_grace,
+            ):
+                finished.add(future)
+                try:
+                    site_value, scraped_data, status = future.result()
+                except Exception as e:
+                    # Additional safety net - if future.result() raises, catch it
+                    site = future_to_site[future]
+                    site_name = get_site_name(site)
+                    logger = create_logger(site_name)
+                    logger.warning(f"Failed to get results from {site_name}: {str(e)}. Skipping this site.")
+                    site_status[site.value] = "error"
+                    notify(site, "done", status="error", jobs=0)
+                    continue
+                site_status[site_value] = status
+                jobs = scraped_data.jobs
+                if incremental:
+                    if status == "complete":
+                        save_watermark(
+                            scraper_input, future_to_site[future], [job.id for job in jobs]
+                        )
+                    jobs = [job for job in jobs if job.id not in seen_ids]
+                for job in jobs:
+                    yield job_to_row(job, site_value, country_enum, enforce_annual_salary)
+                # the finished future keeps its result, let the jobs go once they're out
+                scraped_data.jobs = []
+                notify(future_to_site[future], "done", status=status, jobs=len(jobs))
+        except FuturesTimeoutError:
+            for future, site in future_to_site.items():
+                if future in finished:
+                    continue
+                create_logger(get_site_name(site)).warning(
+                    "Deadline passed before scraping finished. Skipping this site."
+                )
+                site_status[site.value] = "timeout"
+                notify(site, "done", status="timeout", jobs=0)
+    finally:
+        # never block on a site that overran the deadline, it finishes in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+        cookie_store.flush()
+
+
+def job_to_row(
+    job: JobPost,
+    site: str,
+    country: Country = Country.USA,
+    enforce_annual_salary: bool = False,
+) -> dict:
+    """
+    Flattens a scraped job into one row of scrape_jobs results
+    :param site: site value the job was scraped from
+    :param country: salaries are only parsed out of US descriptions
+    :return: the desired_order columns of the job
+    """
+    job_data = job.dict()
+    job_data["site"] = site
+    job_data["company"] = job_data["company_name"]
+    job_data["job_type"] = (
+        ", ".join(job_type.value[0] for job_type in job_data["job_type"])
+        if job_data["job_type"]
+        else None
+    )
+    job_data["emails"] = (
+        ", ".join(job_data["emails"]) if job_data["emails"] else None
+    )
+    if job_data["location"]:
+        job_data["location"] = Location(
+            **job_data["location"]
+        ).display_location()
+
+    # Handle compensation
+    compensation_obj = job_data.get("compensation")
+    if compensation_obj and isinstance(compensation_obj, dict):
+        # Safely handle interval - it might be a string or enum
+        interval_obj = compensation_obj.get("interval")
+        if interval_obj:
+            if hasattr(interval_obj, 'value'):
+                # It's an enum, get its value
+                job_data["interval"] = interval_obj.value
             else:
-                if country_enum == Country.USA:
-                    (
-                        job_data["interval"],
-                        job_data["min_amount"],
-                        job_data["max_amount"],
-                        job_data["currency"],
-                    ) = extract_salary(
-                        job_data["description"],
-                        enforce_annual_salary=enforce_annual_salary,
-                    )
-                    job_data["salary_source"] = SalarySource.DESCRIPTION.value
-
-            job_data["salary_source"] = (
-                job_data["salary_source"]
-                if "min_amount" in job_data and job_data["min_amount"]
-                else None
-            )
+                # It's a string or other type, use it directly
+                job_data["interval"] = str(interval_obj)
+        else:
+            job_data["interval"] = None
 
-            #naukri-specific fields
-            job_data["skills"] = (
-                ", ".join(job_data["skills"]) if job_data["skills"] else None
-            )
-            job_data["experience_range"] = job_data.get("experience_range")
-            job_data["company_rating"] = job_data.get("company_rating")
-            job_data["company_reviews_count"] = job_data.get("company_reviews_count")
-            job_data["vacancy_count"] = job_data.get("vacancy_count")
-            job_data["work_from_home_type"] = job_data.get("work_from_home_type")
-
-            job_df = pd.DataFrame([job_data])
-            jobs_dfs.append(job_df)
-
-    if jobs_dfs:
-        # Step 1: Filter out all-NA columns from each DataFrame before concatenation
-        filtered_dfs = [df.dropna(axis=1, how="all") for df in jobs_dfs]
-
-        # Step 2: Concatenate the filtered DataFrames
-        jobs_df = pd.concat(filtered_dfs, ignore_index=True)
-
-        # Step 3: Ensure all desired columns are present, adding missing ones as empty
-        for column in desired_order:
-            if column not in jobs_df.columns:
-                jobs_df[column] = None  # Add missing columns as empty
-
-        # Reorder the DataFrame according to the desired order
-        jobs_df = jobs_df[desired_order]
-
-        # Step 4: Sort the DataFrame as required
-        return jobs_df.sort_values(
-            by=["site", "date_posted"], ascending=[True, False]
-        ).reset_index(drop=True)
+        job_data["min_amount"] = compensation_obj.get("min_amount")
+        job_data["max_amount"] = compensation_obj.get("max_amount")
+        job_data["currency"] = compensation_obj.get("currency", "USD")
+        job_data["salary_source"] = SalarySource.DIRECT_DATA.value
+        if enforce_annual_salary and (
+            job_data["interval"]
+            and job_data["interval"] != "yearly"
+            and job_data["min_amount"]
+            and job_data["max_amount"]
+        ):
+            convert_to_annual(job_data)
     else:
-        return pd.DataFrame()
\ No newline at end of file
+        if country == Country.USA:
+            (
+                job_data["interval"],
+                job_data["min_amount"],
+                job_data["max_amount"],
+                job_data["currency"],
+            ) = extract_salary(
+                job_data["description"],
+                enforce_annual_salary=enforce_annual_salary,
+            )
+            job_data["salary_source"] = SalarySource.DESCRIPTION.value
+
+    job_data["salary_source"] = (
+        job_data.get("salary_source")
+        if "min_amount" in job_data and job_data["min_amount"]
+        else None
+    )
+
+    #naukri-specific fields
+    job_data["skills"] = (
+        ", ".join(job_data["skills"]) if job_data["skills"] else None
+    )
+    return {column: job_data.get(column) for column in desired_order}
+
+
+def write_to_sink(rows: Iterable[dict], sink: Sink, store: JobStore | None = None):
+    """
+    Writes rows to sink, and upserts them into store a buffer at a time
+    """
+    pending = []
+    for row in rows:
+        sink.write(row)
+        if store is not None:
+            pending.append(row)
+            if len(pending) >= sink.buffer_size:
+                store.upsert(pd.DataFrame(pending, columns=desired_order))
+                pending = []
+    if store is not None and pending:
+        store.upsert(pd.DataFrame(pending, columns=desired_order))
+
+
+def get_deadline(
+    timeout: float | None = None, deadline: datetime | float | None = None
+) -> float | None:
+    """
+    Turns a timeout in seconds and/or a wall-clock deadline into a time.monotonic()
+    deadline, the earlier one wins
+    :return: monotonic deadline, None when neither is given
+    """
+    candidates = []
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    if deadline is not None:
+        if isinstance(deadline, datetime):
+            deadline = deadline.timestamp()
+        candidates.append(time.monotonic() + (deadline - time.time()))
+    return min(candidates) if candidates else None
\ No newline at end of file
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-from __init__ import scrape_jobs
-from util import strip_markdown_formatting
-import datetime
-import csv
+from app_helpers import (
+    BackgroundSearch,
+    render_cards,
+    render_downloads,
+    render_search_progress,
+    render_search_status,
+)
 
 # Set page configuration
 st.set_page_config(
@@ -219,217 +222,195 @@ search_button = st.sidebar.button("Search Jobs", type="primary")
 
 # Main content
 if search_button:
-    # Show spinner during search
-    with st.spinner("Searching for jobs across multiple platforms..."):
-        # Create search term from the selected category
-        search_term = job_categories[selected_category]
-        
-        # Generate a google_search_term that includes job category, location, and time filter
-        google_search_term = f"{selected_category} jobs near {location} since yesterday"
+    # Create search term from the selected category
+    search_term = job_categories[selected_category]
+    
+    # Generate a google_search_term that includes job category, location, and time filter
+    google_search_term = f"{selected_category} jobs near {location} since yesterday"
 
-        # Set up parameters for scraping
-        params = {
-            "site_name": job_boards,
-            "search_term": search_term,
-            "google_search_term": google_search_term,
-            "location": location,
-            "results_wanted": results_wanted,
-            "country_indeed": country_indeed,
-            "hours_old": hours_old,
-            "linkedin_fetch_description": fetch_description,
-        }
+    # Set up parameters for scraping
+    params = {
+        "site_name": job_boards,
+        "search_term": search_term,
+        "google_search_term": google_search_term,
+        "location": location,
+        "results_wanted": results_wanted,
+        "country_indeed": country_indeed,
+        "hours_old": hours_old,
+        "linkedin_fetch_description": fetch_description,
+    }
 
-        # Determine the is_remote parameter based on work type
+    # Determine the is_remote parameter based on work type
+    is_remote = None
+    if work_type == "Remote":
+        is_remote = True
+        params["is_remote"] = True
+        google_search_term = f"remote {selected_category} jobs since yesterday"
+        search_term = f"remote {search_term}"
+    elif work_type == "On-site":
+        is_remote = False
+        params["is_remote"] = False
+    elif work_type == "Hybrid":
         is_remote = None
-        if work_type == "Remote":
-            is_remote = True
-            params["is_remote"] = True
-            google_search_term = f"remote {selected_category} jobs since yesterday"
-            search_term = f"remote {search_term}"
-        elif work_type == "On-site":
-            is_remote = False
-            params["is_remote"] = False
-        elif work_type == "Hybrid":
-            is_remote = None
-            search_term += " hybrid"
-            
-        # Update the search terms in params after modifications
-        params["search_term"] = search_term
-        params["google_search_term"] = google_search_term
-        
-        # Add job type parameter
-        params["job_type"] = job_type_options
+        search_term += " hybrid"
         
-        # Add easy apply parameter if selected
-        if easy_apply:
-            params["easy_apply"] = True
+    # Update the search terms in params after modifications
+    params["search_term"] = search_term
+    params["google_search_term"] = google_search_term
+    
+    # Add job type parameter
+    params["job_type"] = job_type_options
+    
+    # Add easy apply parameter if selected
+    if easy_apply:
+        params["easy_apply"] = True
+
+    # The search runs in a background thread, the page shows each board's progress
+    # and its jobs as soon as it finishes. Identical searches within the cache TTL
+    # are served without scraping, and an identical search another user already
+    # started is joined instead of scraping the boards twice.
+    previous = st.session_state.get("search")
+    st.session_state["search"] = BackgroundSearch.start(params)
+    if previous is not None:
+        previous.cancel()
+
+# The last search lives in session state, so changing a display filter (work type,
+# salary range, tabs) re-renders its results instead of searching again
+search = st.session_state.get("search")
+jobs = None
+if search is not None and not search.done:
+    render_search_progress(search)
+elif search is not None:
+    render_search_status(search)
+    if search.error is not None:
+        st.error(f"An error occurred during the job search: {str(search.error)}")
+        st.info("Try adjusting your search parameters or selecting different job boards.")
+    jobs = search.jobs()
 
-        try:
-            # Perform the search
-            jobs = scrape_jobs(**params)
+if jobs is not None:
+    # Post-process to ensure remote filter is strictly applied
+    if not jobs.empty and work_type == "Remote":
+        jobs = jobs[jobs['is_remote'] == True]
+    elif not jobs.empty and work_type == "On-site":
+        jobs = jobs[jobs['is_remote'] != True]
+    
+    # Display the results
+    if len(jobs) > 0:
+        st.success(f"Found {len(jobs)} jobs matching your criteria!")
+    else:
+        st.warning("No jobs found matching your criteria. Try adjusting your filters.")
+    
+    # Downloads are built in memory when clicked, nothing is written to the working
+    # directory
+    render_downloads(jobs, "job_search_results", label="Download Results as {}")
+    
+    # Display the jobs in a nice format
+    if not jobs.empty:
+        # Filter jobs based on salary range if specified
+        if min_salary > 0 or max_salary < 500000:
+            jobs = jobs[
+                (jobs['min_amount'].fillna(0) >= min_salary) &
+                (jobs['max_amount'].fillna(float('inf')) <= max_salary)
+            ]
+        
+        # Create tabs for different views
+        tab1, tab2, tab3 = st.tabs(["Card View", "Table View", "Analytics"])
+        
+        with tab1:
+            # Cards are built once per search, only the current page is sent
+            render_cards(search.job_cards().loc[jobs.index], key="job_page")
+        
+        with tab2:
+            # Table view of jobs
+            columns_to_display = [
+                'title', 'company', 'location', 'job_type', 
+                'is_remote', 'date_posted', 'min_amount', 
+                'max_amount', 'currency', 'interval', 'job_url'
+            ]
+            
+            # Only include columns that exist in the dataframe
+            valid_columns = [col for col in columns_to_display if col in jobs.columns]
             
-            # Post-process to ensure remote filter is strictly applied
-            if work_type == "Remote":
-                jobs = jobs[jobs['is_remote'] == True]
-            elif work_type == "On-site":
-                jobs = jobs[jobs['is_remote'] != True]
+            # Create a clean display dataframe
+            display_df = jobs[valid_columns].copy()
             
-            # Display the results
-            if len(jobs) > 0:
-                st.success(f"Found {len(jobs)} jobs matching your criteria!")
-            else:
-                st.warning("No jobs found matching your criteria. Try adjusting your filters.")
+            # Rename columns for better display
+            column_names = {
+                'title': 'Title',
+                'company': 'Company',
+                'location': 'Location',
+                'job_type': 'Job Type',
+                'is_remote': 'Remote',
+                'date_posted': 'Posted Date',
+                'min_amount': 'Min Salary',
+                'max_amount': 'Max Salary',
+                'currency': 'Currency',
+                'interval': 'Payment Interval',
+                'job_url': 'Job URL'
+            }
             
-            # Save to CSV for download
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_file = f"job_search_results_{timestamp}.csv"
-            jobs.to_csv(csv_file, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
+            display_df.rename(columns={col: column_names.get(col, col) for col in valid_columns}, inplace=True)
             
-            # Create a download button
-            with open(csv_file, "rb") as file:
-                btn = st.download_button(
-                    label="Download Results as CSV",
-                    data=file,
-                    file_name=csv_file,
-                    mime="text/csv"
+            # Make URLs clickable
+            if 'Job URL' in display_df.columns:
+                display_df['Job URL'] = display_df['Job URL'].apply(
+                    lambda x: f'<a href="{x}" target="_blank">View Job</a>' if pd.notna(x) else 'No URL'
                 )
             
-            # Display the jobs in a nice format
-            if not jobs.empty:
-                # Filter jobs based on salary range if specified
-                if min_salary > 0 or max_salary < 500000:
-                    jobs = jobs[
-                        (jobs['min_amount'].fillna(0) >= min_salary) &
-                        (jobs['max_amount'].fillna(float('inf')) <= max_salary)
-                    ]
-                
-                # Create tabs for different views
-                tab1, tab2, tab3 = st.tabs(["Card View", "Table View", "Analytics"])
-                
-                with tab1:
-                    # Enhanced card view of jobs
-                    for i, job in jobs.iterrows():
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="job-card">
-                                <div class="job-platform">{job.get('site', 'Unknown')}</div>
-                                <div class="job-title">{job.get('title', 'No Title')}</div>
-                                <div class="job-company">{job.get('company', 'Unknown Company')}</div>
-                                <div class="job-location">📍 {job.get('location', 'Location not specified')}</div>
-                                <div class="job-details">
-                                    <span class="badge">💼 {job.get('job_type', 'Not specified')}</span>
-                                    <span class="badge">📅 {job.get('date_posted', 'Date not available')}</span>
-                                    <span class="badge">🏠 {'Remote' if job.get('is_remote') else 'On-site'}</span>
-                                </div>
-                                <div class="job-details salary-range">
-                                    💰 {job.get('min_amount', 'Not specified')} - {job.get('max_amount', 'Not specified')} 
-                                    {job.get('currency', '')} {job.get('interval', 'per year') if job.get('interval') else 'per year'}
-                                </div>
-                                <div class="job-description">
-                                    {strip_markdown_formatting(job.get('description', '')[:300] + '...' if job.get('description') else 'No description available')}
-                                </div>
-                                <div class="job-actions">
-                                    <a href="{job.get('job_url', '#')}" target="_blank" class="view-job-btn">View Job 👉</a>
-                                    <button onclick="saveJob('{i}')" class="save-job-btn">Save Job ⭐</button>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
+            # Display the table with clickable links
+            st.write(display_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+        
+        with tab3:
+            # Analytics tab
+            st.subheader("Job Search Analytics")
+            
+            try:
+                # Job distribution by platform
+                st.write("### Distribution by Platform")
+                if 'site' in jobs.columns:
+                    platform_dist = jobs['site'].value_counts()
+                    if not platform_dist.empty:
+                        st.bar_chart(platform_dist)
+                    else:
+                        st.info("No platform distribution data available")
                 
-                with tab2:
-                    # Table view of jobs
-                    columns_to_display = [
-                        'title', 'company', 'location', 'job_type', 
-                        'is_remote', 'date_posted', 'min_amount', 
-                        'max_amount', 'currency', 'interval', 'job_url'
-                    ]
-                    
-                    # Only include columns that exist in the dataframe
-                    valid_columns = [col for col in columns_to_display if col in jobs.columns]
-                    
-                    # Create a clean display dataframe
-                    display_df = jobs[valid_columns].copy()
+                # Salary distribution
+                st.write("### Salary Distribution")
+                if 'min_amount' in jobs.columns and 'max_amount' in jobs.columns:
+                    # Convert salary columns to numeric, replacing non-numeric values with NaN
+                    jobs['min_amount'] = pd.to_numeric(jobs['min_amount'], errors='coerce')
+                    jobs['max_amount'] = pd.to_numeric(jobs['max_amount'], errors='coerce')
                     
-                    # Rename columns for better display
-                    column_names = {
-                        'title': 'Title',
-                        'company': 'Company',
-                        'location': 'Location',
-                        'job_type': 'Job Type',
-                        'is_remote': 'Remote',
-                        'date_posted': 'Posted Date',
-                        'min_amount': 'Min Salary',
-                        'max_amount': 'Max Salary',
-                        'currency': 'Currency',
-                        'interval': 'Payment Interval',
-                        'job_url': 'Job URL'
-                    }
+                    # Calculate mean salary only for rows where both min and max are numeric
+                    salary_data = jobs[['min_amount', 'max_amount']].mean(axis=1)
+                    salary_data = salary_data.dropna()
                     
-                    display_df.rename(columns={col: column_names.get(col, col) for col in valid_columns}, inplace=True)
-                    
-                    # Make URLs clickable
-                    if 'Job URL' in display_df.columns:
-                        display_df['Job URL'] = display_df['Job URL'].apply(
-                            lambda x: f'<a href="{x}" target="_blank">View Job</a>' if pd.notna(x) else 'No URL'
-                        )
-                    
-                    # Display the table with clickable links
-                    st.write(display_df.to_html(escape=False, index=False), unsafe_allow_html=True)
+                    if not salary_data.empty:
+                        # Create histogram using Streamlit's native chart
+                        st.bar_chart(salary_data.value_counts(bins=20).sort_index())
+                    else:
+                        st.info("No salary data available")
+                else:
+                    st.info("Salary information not available in the search results")
                 
-                with tab3:
-                    # Analytics tab
-                    st.subheader("Job Search Analytics")
+                # Remote vs On-site distribution
+                st.write("### Remote vs On-site Distribution")
+                if 'is_remote' in jobs.columns:
+                    remote_dist = jobs['is_remote'].value_counts()
+                    if not remote_dist.empty:
+                        # Convert boolean values to more readable labels
+                        remote_dist.index = remote_dist.index.map({True: 'Remote', False: 'On-site', None: 'Not Specified'})
+                        st.bar_chart(remote_dist)
+                    else:
+                        st.info("No remote work distribution data available")
+                else:
+                    st.info("Remote work information not available in the search results")
                     
-                    try:
-                        # Job distribution by platform
-                        st.write("### Distribution by Platform")
-                        if 'site' in jobs.columns:
-                            platform_dist = jobs['site'].value_counts()
-                            if not platform_dist.empty:
-                                st.bar_chart(platform_dist)
-                            else:
-                                st.info("No platform distribution data available")
-                        
-                        # Salary distribution
-                        st.write("### Salary Distribution")
-                        if 'min_amount' in jobs.columns and 'max_amount' in jobs.columns:
-                            # Convert salary columns to numeric, replacing non-numeric values with NaN
-                            jobs['min_amount'] = pd.to_numeric(jobs['min_amount'], errors='coerce')
-                            jobs['max_amount'] = pd.to_numeric(jobs['max_amount'], errors='coerce')
-                            
-                            # Calculate mean salary only for rows where both min and max are numeric
-                            salary_data = jobs[['min_amount', 'max_amount']].mean(axis=1)
-                            salary_data = salary_data.dropna()
-                            
-                            if not salary_data.empty:
-                                # Create histogram using Streamlit's native chart
-                                st.bar_chart(salary_data.value_counts(bins=20).sort_index())
-                            else:
-                                st.info("No salary data available")
-                        else:
-                            st.info("Salary information not available in the search results")
-                        
-                        # Remote vs On-site distribution
-                        st.write("### Remote vs On-site Distribution")
-                        if 'is_remote' in jobs.columns:
-                            remote_dist = jobs['is_remote'].value_counts()
-                            if not remote_dist.empty:
-                                # Convert boolean values to more readable labels
-                                remote_dist.index = remote_dist.index.map({True: 'Remote', False: 'On-site', None: 'Not Specified'})
-                                st.bar_chart(remote_dist)
-                            else:
-                                st.info("No remote work distribution data available")
-                        else:
-                            st.info("Remote work information not available in the search results")
-                            
-                    except Exception as analytics_error:
-                        st.error(f"Error generating analytics: {str(analytics_error)}")
-                        st.info("Some analytics may not be available for the current search results")
-            
-        except Exception as e:
-            st.error(f"An error occurred during the job search: {str(e)}")
-            st.info("Try adjusting your search parameters or selecting different job boards.")
+            except Exception as analytics_error:
+                st.error(f"Error generating analytics: {str(analytics_error)}")
+                st.info("Some analytics may not be available for the current search results")
 
-else:
+elif search is None:
     # Default welcome message
     st.info("👈 Set your job search criteria in the sidebar and click 'Search Jobs' to begin")
     
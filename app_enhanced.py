@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
-from __init__ import scrape_jobs
-from freelance_gig_search import search_mern_freelance_gigs, get_mern_stack_search_queries
-from util import strip_markdown_formatting
-import datetime
-import csv
+from app_helpers import (
+    BackgroundGigSearch,
+    BackgroundSearch,
+    render_cards,
+    render_downloads,
+    render_search_progress,
+    render_search_status,
+    searches_done,
+)
+from freelance_gig_search import within_budget
 
 # Set page configuration
 st.set_page_config(
@@ -335,7 +340,8 @@ search_button = st.sidebar.button("🔍 Search Opportunities", type="primary")
 
 # Main content
 if search_button:
-    all_results = []
+    # Raw results of this search, the filters below are applied when rendering
+    results = {}
     
     # Search traditional jobs
     if search_type in ["🏢 Traditional Jobs", "🔍 Both"]:
@@ -380,80 +386,107 @@ if search_button:
                 if easy_apply:
                     params["easy_apply"] = True
 
-                # Perform the search
-                jobs = scrape_jobs(**params)
-                
-                # Post-process to ensure remote filter is strictly applied
-                if work_type == "Remote":
-                    jobs = jobs[jobs['is_remote'] == True]
-                elif work_type == "On-site":
-                    jobs = jobs[jobs['is_remote'] != True]
-                
-                # Filter by salary range
-                if min_budget > 0 or max_budget < 10000:
-                    jobs = jobs[
-                        (jobs['min_amount'].fillna(0) >= min_budget) &
-                        (jobs['max_amount'].fillna(float('inf')) <= max_budget)
-                    ]
-                
-                if not jobs.empty:
-                    jobs['search_type'] = 'Traditional Job'
-                    all_results.append(jobs)
-                    st.success(f"Found {len(jobs)} traditional jobs!")
+                # Scrapes in a background thread, at the same time as the freelance
+                # platforms. Identical searches within the cache TTL are served
+                # without scraping, identical running ones are joined.
+                results["search"] = BackgroundSearch.start(params)
                 
             except Exception as e:
                 st.error(f"Error searching traditional jobs: {str(e)}")
     
     # Search freelance gigs
     if search_type in ["💼 Freelance Gigs", "🔍 Both"]:
-        with st.spinner("Searching freelance platforms..."):
-            try:
-                # Get the appropriate category
-                if search_type == "🔍 Both":
-                    freelance_category_to_use = freelance_category
-                else:
-                    freelance_category_to_use = selected_category
-                
-                # Convert experience level
-                exp_level = None
-                if experience_level != "Any":
-                    exp_level = experience_level.lower()
-                
-                gigs = search_mern_freelance_gigs(
-                    query_category=freelance_category_to_use,
-                    platforms=freelance_platforms,
-                    max_results_per_platform=results_wanted,
-                    min_budget=min_budget,
-                    max_budget=max_budget,
-                    experience_level=exp_level
-                )
-                
-                if not gigs.empty:
-                    gigs['search_type'] = 'Freelance Gig'
-                    all_results.append(gigs)
-                    st.success(f"Found {len(gigs)} freelance gigs!")
-                
-            except Exception as e:
-                st.error(f"Error searching freelance gigs: {str(e)}")
+        # Get the appropriate category
+        if search_type == "🔍 Both":
+            freelance_category_to_use = freelance_category
+        else:
+            freelance_category_to_use = selected_category
+        
+        # Runs in the background next to the job boards, its cards are built there
+        # too. Budget and experience are filtered when rendering, so changing them
+        # doesn't search again.
+        results["gig_search"] = BackgroundGigSearch(dict(
+            query_category=freelance_category_to_use,
+            platforms=freelance_platforms,
+            max_results_per_platform=results_wanted,
+            min_budget=None,
+            max_budget=None,
+        ))
+    
+    previous = st.session_state.get("opportunities", {}).get("search")
+    if previous is not None:
+        previous.cancel()
+    st.session_state["opportunities"] = results
+
+# The last results live in session state, so changing a filter, the type selectbox
+# or a tab re-renders them instead of searching again
+results = st.session_state.get("opportunities")
+
+search = results.get("search") if results is not None else None
+gig_search = results.get("gig_search") if results is not None else None
+if results is not None and not searches_done(search, gig_search):
+    # Progress of every job board and of the freelance platforms, and the jobs of
+    # the boards that finished, until every search is done
+    render_search_progress(search, gig_search)
+elif results is not None:
+    all_results = []
+    all_cards = []
+    
+    if search is not None or gig_search is not None:
+        render_search_status(search, gig_search)
+    jobs = None
+    if search is not None:
+        if search.error is not None:
+            st.error(f"Error searching traditional jobs: {str(search.error)}")
+        jobs = search.jobs()
+    if jobs is not None and not jobs.empty:
+        # Post-process to ensure remote filter is strictly applied
+        if work_type == "Remote":
+            jobs = jobs[jobs['is_remote'] == True]
+        elif work_type == "On-site":
+            jobs = jobs[jobs['is_remote'] != True]
+        
+        # Filter by salary range
+        if min_budget > 0 or max_budget < 10000:
+            jobs = jobs[
+                (jobs['min_amount'].fillna(0) >= min_budget) &
+                (jobs['max_amount'].fillna(float('inf')) <= max_budget)
+            ]
+        
+        if not jobs.empty:
+            all_results.append(jobs.assign(search_type='Traditional Job'))
+            all_cards.append(search.job_cards().loc[jobs.index])
+            st.success(f"Found {len(jobs)} traditional jobs!")
+    
+    gigs = None
+    if gig_search is not None:
+        if gig_search.error is not None:
+            st.error(f"Error searching freelance gigs: {str(gig_search.error)}")
+        else:
+            gigs = gig_search.gigs
+            for platform, error in gigs.attrs.get("platform_errors", {}).items():
+                st.warning(f"Error searching {platform}: {error}")
+    if gigs is not None and not gigs.empty:
+        # Same filters search_mern_freelance_gigs would have applied
+        gigs = gigs[within_budget(gigs, min_budget, max_budget)]
+        if experience_level != "Any":
+            gigs = gigs[gigs['experience_level'].str.contains(experience_level.lower(), case=False, na=False)]
+        
+        if not gigs.empty:
+            all_results.append(gigs.assign(search_type='Freelance Gig'))
+            all_cards.append(gig_search.cards.loc[gigs.index])
+            st.success(f"Found {len(gigs)} freelance gigs!")
     
     # Display results
     if all_results:
         # Combine all results
         combined_results = pd.concat(all_results, ignore_index=True)
+        combined_cards = pd.concat(all_cards, ignore_index=True)
         
-        # Save to CSV
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_file = f"mern_opportunities_{timestamp}.csv"
-        combined_results.to_csv(csv_file, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
-        
-        # Create download button
-        with open(csv_file, "rb") as file:
-            btn = st.download_button(
-                label="📥 Download All Results as CSV",
-                data=file,
-                file_name=csv_file,
-                mime="text/csv"
-            )
+        # Download buttons, files are built in memory when clicked
+        render_downloads(
+            combined_results, "mern_opportunities", label="📥 Download All Results as {}"
+        )
         
         # Create tabs for different views
         tab1, tab2, tab3 = st.tabs(["🎯 All Opportunities", "🏢 Traditional Jobs", "💼 Freelance Gigs"])
@@ -467,61 +500,8 @@ if search_button:
                 if filter_type != "All":
                     combined_results = combined_results[combined_results['search_type'] == filter_type]
             
-            # Display all opportunities
-            for i, opportunity in combined_results.iterrows():
-                if opportunity.get('search_type') == 'Freelance Gig':
-                    # Display as freelance gig
-                    st.markdown(f"""
-                    <div class="gig-card">
-                        <div class="gig-platform-badge">{opportunity.get('platform', 'Unknown')}</div>
-                        <div class="gig-title">{opportunity.get('title', 'No Title')}</div>
-                        <div class="gig-client">👤 Client Rating: {opportunity.get('client_rating', 'N/A')} ({opportunity.get('client_reviews', 0)} reviews)</div>
-                        <div class="gig-platform">📱 Platform: {opportunity.get('platform', 'Unknown')}</div>
-                        <div class="gig-details">
-                            <span class="badge gig-badge">💰 {opportunity.get('budget_min', 'N/A')} - {opportunity.get('budget_max', 'N/A')} {opportunity.get('currency', 'USD')}</span>
-                            <span class="badge gig-badge">📅 {opportunity.get('posted_date', 'Date not available')}</span>
-                            <span class="badge gig-badge">🎯 {opportunity.get('experience_level', 'Not specified')}</span>
-                            <span class="badge gig-badge">⏱️ {opportunity.get('duration', 'Not specified')}</span>
-                        </div>
-                        <div class="gig-details budget-range">
-                            💰 Budget: {opportunity.get('budget_min', 'Not specified')} - {opportunity.get('budget_max', 'Not specified')} 
-                            {opportunity.get('currency', 'USD')} | Type: {opportunity.get('project_type', 'Not specified')}
-                        </div>
-                        <div class="gig-description">
-                            {strip_markdown_formatting(opportunity.get('description', '')[:300] + '...' if opportunity.get('description') else 'No description available')}
-                        </div>
-                        <div class="gig-actions">
-                            <a href="{opportunity.get('url', '#')}" target="_blank" class="view-gig-btn">View Gig 👉</a>
-                            <button onclick="saveGig('{i}')" class="save-gig-btn">Save Gig ⭐</button>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Display as traditional job
-                    st.markdown(f"""
-                    <div class="job-card">
-                        <div class="job-platform">{opportunity.get('site', 'Unknown')}</div>
-                        <div class="job-title">{opportunity.get('title', 'No Title')}</div>
-                        <div class="job-company">{opportunity.get('company', 'Unknown Company')}</div>
-                        <div class="job-location">📍 {opportunity.get('location', 'Location not specified')}</div>
-                        <div class="job-details">
-                            <span class="badge">💼 {opportunity.get('job_type', 'Not specified')}</span>
-                            <span class="badge">📅 {opportunity.get('date_posted', 'Date not available')}</span>
-                            <span class="badge">🏠 {'Remote' if opportunity.get('is_remote') else 'On-site'}</span>
-                        </div>
-                        <div class="job-details salary-range">
-                            💰 {opportunity.get('min_amount', 'Not specified')} - {opportunity.get('max_amount', 'Not specified')} 
-                            {opportunity.get('currency', '')} {opportunity.get('interval', 'per year') if opportunity.get('interval') else 'per year'}
-                        </div>
-                        <div class="job-description">
-                            {strip_markdown_formatting(opportunity.get('description', '')[:300] + '...' if opportunity.get('description') else 'No description available')}
-                        </div>
-                        <div class="job-actions">
-                            <a href="{opportunity.get('job_url', '#')}" target="_blank" class="view-job-btn">View Job 👉</a>
-                            <button onclick="saveJob('{i}')" class="save-job-btn">Save Job ⭐</button>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # Display all opportunities, only the current page is sent
+            render_cards(combined_cards.loc[combined_results.index], key="opportunity_page")
         
         with tab2:
             traditional_jobs = combined_results[combined_results['search_type'] == 'Traditional Job']
@@ -0,0 +1,621 @@
+"""
+Helpers shared by the Streamlit apps (app.py, app_enhanced.py)
+"""
+
+from __future__ import annotations
+
+import datetime
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from __init__ import iter_jobs
+from export import export_formats
+from util import desired_order, strip_markdown_formatting
+
+# seconds a search result is reused for the same parameters, by every session of
+# the server process
+search_ttl = int(os.getenv("UNIFIEDGIGS_SEARCH_TTL", "900"))
+# megabytes of results the search cache holds at most
+search_cache_mb = int(os.getenv("UNIFIEDGIGS_SEARCH_CACHE_MB", "256"))
+# statuses that shouldn't be served to the next identical search
+incomplete_statuses = {"error", "timeout", "circuit_open"}
+
+
+def search_key(params: dict) -> str:
+    """
+    Same key for searches that scrape the same thing: unset (None) parameters are
+    dropped, board order and surrounding whitespace don't matter
+    """
+    canonical = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        elif name == "site_name" and isinstance(value, (list, tuple)):
+            value = sorted(str(site) for site in value)
+        canonical[name] = value
+    encoded = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SearchCache:
+    def __init__(
+        self,
+        ttl: float = search_ttl,
+        max_entries: int = 100,
+        max_bytes: int = search_cache_mb * 1024 * 1024,
+    ):
+        """
+        Finished scrape_jobs results by search parameters, shared by every session
+        :param ttl: seconds a result is served
+        :param max_entries: least recently used results are dropped past this many
+        :param max_bytes: or past this much memory, as DataFrame.memory_usage counts it
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, tuple[float, int, pd.DataFrame]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, params: dict) -> pd.DataFrame | None:
+        key = search_key(params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            jobs = entry[2]
+        return _copy(jobs)
+
+    def put(self, params: dict, jobs: pd.DataFrame):
+        """
+        Keeps jobs unless a site failed, timed out or was skipped
+        """
+        if incomplete_statuses & set(jobs.attrs.get("site_status", {}).values()):
+            return
+        key = search_key(params)
+        size = int(jobs.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, _copy(jobs))
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key: str):
+        self.bytes -= self._entries.pop(key)[1]
+
+
+def _copy(jobs: pd.DataFrame) -> pd.DataFrame:
+    copy = jobs.copy()
+    copy.attrs = {key: dict(value) for key, value in jobs.attrs.items()}
+    return copy
+
+
+search_cache = SearchCache()
+
+
+def cached_scrape_jobs(**params) -> pd.DataFrame:
+    """
+    scrape_jobs, reusing the results of the same search for search_ttl seconds and
+    joining an identical search that is already running instead of scraping again.
+    Searches where a site failed or timed out are returned but not kept.
+    """
+    search = BackgroundSearch.start(params)
+    search.wait()
+    if search.error is not None:
+        raise search.error
+    return search.jobs()
+
+
+gig_cache = SearchCache()
+
+
+def cached_freelance_gigs(**params) -> pd.DataFrame:
+    """
+    search_mern_freelance_gigs, reusing the results of the same search for search_ttl
+    seconds. Searches where a platform failed or timed out are returned but not kept.
+    """
+    from freelance_gig_search import search_mern_freelance_gigs
+
+    gigs = gig_cache.get(params)
+    if gigs is None:
+        gigs = search_mern_freelance_gigs(**params)
+        if not gigs.attrs.get("platform_errors"):
+            gig_cache.put(params, gigs)
+    return gigs
+
+
+class BackgroundGigSearch:
+    def __init__(self, params: dict):
+        """
+        A freelance search (cached_freelance_gigs) running in a background thread,
+        next to a BackgroundSearch of the job boards, with its cards built there too
+        :param params: search_mern_freelance_gigs parameters
+        """
+        self.params = params
+        self.gigs: pd.DataFrame | None = None
+        self.cards: pd.Series | None = None
+        self.error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def _run(self):
+        try:
+            gigs = cached_freelance_gigs(**self.params)
+            self.cards = gig_cards_html(gigs)
+            self.gigs = gigs
+        except Exception as e:
+            self.error = e
+
+
+class BackgroundSearch:
+    def __init__(self, params: dict):
+        """
+        A scrape_jobs search running in a background thread, keeping each site's
+        progress and, as soon as it finishes, its jobs, so the page can show them
+        while slower sites are still scraping. Kept in st.session_state.
+
+        Identical searches share one instance (see start), jobs() hands every caller
+        its own copy of the results.
+        :param params: scrape_jobs parameters
+        """
+        self.params = params
+        self.key = search_key(params)
+        site_names = params.get("site_name") or []
+        if isinstance(site_names, str):
+            site_names = [site_names]
+        self.progress: dict[str, dict] = {
+            site: {"event": "queued"} for site in site_names
+        }
+        self.site_jobs: dict[str, pd.DataFrame] = {}
+        self.site_cards: dict[str, pd.Series] = {}
+        self.site_status: dict[str, str] = {}
+        self.error: Exception | None = None
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self._rows: dict[str, list[dict]] = {}
+        self._jobs: pd.DataFrame | None = None
+        self._cards: pd.Series | None = None
+        self._cancelled = False
+        # sessions showing this search, it is only cancelled when all of them leave
+        self._subscribers = 1
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @classmethod
+    def start(cls, params: dict) -> BackgroundSearch:
+        """
+        Starts the search, or returns the identical search another session already
+        started (single flight), or returns it already finished when it is cached
+        """
+        key = search_key(params)
+        with _in_flight_lock:
+            search = _in_flight.get(key)
+            if search is not None:
+                search._subscribers += 1
+                return search
+            search = cls(params)
+            jobs = search_cache.get(params)
+            if jobs is None:
+                _in_flight[key] = search
+                search._thread.start()
+                return search
+        search._finish(jobs)
+        if not jobs.empty:
+            search.site_jobs = dict(list(jobs.groupby("site", sort=False)))
+            search.site_cards = {
+                site: search._cards.loc[site_jobs.index]
+                for site, site_jobs in search.site_jobs.items()
+            }
+        for site, status in jobs.attrs.get("site_status", {}).items():
+            search.progress[site] = {
+                "event": "done",
+                "status": status,
+                "jobs": len(search.site_jobs.get(site, [])),
+            }
+        return search
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def jobs(self) -> pd.DataFrame | None:
+        """
+        All jobs, like scrape_jobs returns them, once the search is done. A copy, as
+        the search may be shared by several sessions.
+        """
+        return None if self._jobs is None else _copy(self._jobs)
+
+    def job_cards(self) -> pd.Series | None:
+        """
+        Card html of jobs(), by the same index, built once when the search finished
+        """
+        return self._cards
+
+    def finished_site_cards(self) -> dict[str, pd.Series]:
+        """
+        Card html of each site that finished so far
+        """
+        with self._lock:
+            return dict(self.site_cards)
+
+    def site_progress(self) -> dict[str, dict]:
+        with self._lock:
+            return {site: dict(info) for site, info in self.progress.items()}
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        :return: whether the search is done
+        """
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        """
+        Leaves the search, e.g. when a new search replaces it. It stops collecting
+        jobs once no session is waiting for it.
+        """
+        with _in_flight_lock:
+            self._subscribers -= 1
+            if self._subscribers > 0:
+                return
+            self._cancelled = True
+            if _in_flight.get(self.key) is self:
+                # an identical search started from now on scrapes again
+                del _in_flight[self.key]
+
+    def _run(self):
+        try:
+            rows = iter_jobs(
+                **self.params, site_status=self.site_status, progress=self._on_progress
+            )
+            for row in rows:
+                if self._cancelled:
+                    rows.close()
+                    break
+                with self._lock:
+                    self._rows.setdefault(row["site"], []).append(row)
+        except Exception as e:
+            self.error = e
+        # built from the rows of the finished sites rather than by concatenating
+        # their frames, whose all-NA columns pandas would otherwise warn about
+        jobs = pd.DataFrame(
+            [row for site in self.site_jobs for row in self._rows[site]],
+            columns=desired_order,
+        )
+        if jobs.empty:
+            jobs = pd.DataFrame()
+        else:
+            jobs = jobs.sort_values(
+                by=["site", "date_posted"], ascending=[True, False]
+            ).reset_index(drop=True)
+        jobs.attrs["site_status"] = dict(self.site_status)
+        if self.error is None and not self._cancelled:
+            search_cache.put(self.params, jobs)
+        self._finish(jobs)
+        with _in_flight_lock:
+            if _in_flight.get(self.key) is self:
+                del _in_flight[self.key]
+
+    def _finish(self, jobs: pd.DataFrame):
+        self._cards = job_cards_html(jobs)
+        self._jobs = jobs
+        self.finished_at = time.monotonic()
+        self._finished.set()
+
+    def _on_progress(self, site: str, event: str, details: dict):
+        with self._lock:
+            info = self.progress.setdefault(site, {})
+            if event == "page":
+                info["pages"] = info.get("pages", 0) + 1
+            info.update(details, event=event)
+            if event == "done":
+                rows = self._rows.get(site, [])
+                if rows:
+                    site_jobs = pd.DataFrame(rows, columns=desired_order)
+                    self.site_jobs[site] = site_jobs
+                    self.site_cards[site] = job_cards_html(site_jobs)
+
+
+# searches running in this process by search_key, joined by identical searches
+_in_flight: dict[str, BackgroundSearch] = {}
+_in_flight_lock = threading.Lock()
+
+
+def describe_progress(info: dict) -> str:
+    event = info.get("event")
+    found = f"{info.get('jobs', 0)} jobs"
+    if event == "queued":
+        return "queued"
+    if event == "started":
+        return "scraping..."
+    if event == "page":
+        return f"page {info['page']} fetched, {found} so far"
+    if event == "waiting":
+        return f"waiting {info['seconds']}s before the next page"
+    if event == "retrying":
+        return f"blocked or failed, retry {info['attempt']} in {info['seconds']}s"
+    if event == "done":
+        return f"done ({info.get('status')}), {found}"
+    return str(event)
+
+
+def describe_gig_search(gig_search: BackgroundGigSearch) -> str:
+    if not gig_search.done:
+        return "searching..."
+    if gig_search.error is not None:
+        return f"failed ({gig_search.error})"
+    found = f"done, {len(gig_search.gigs)} gigs"
+    failed = gig_search.gigs.attrs.get("platform_errors", {})
+    if failed:
+        found += f" ({', '.join(failed)} failed)"
+    return found
+
+
+def searches_done(
+    search: BackgroundSearch | None, gig_search: BackgroundGigSearch | None = None
+) -> bool:
+    return (search is None or search.done) and (gig_search is None or gig_search.done)
+
+
+def render_search_status(
+    search: BackgroundSearch | None, gig_search: BackgroundGigSearch | None = None
+):
+    """
+    One line per job board, and one for the freelance platforms, with what it is
+    doing, collapsed once every search is done
+    """
+    lines = {}
+    sources = []
+    elapsed = ""
+    finished = 0
+    if search is not None:
+        progress = search.site_progress()
+        lines = {site: describe_progress(info) for site, info in progress.items()}
+        finished = sum(info.get("event") == "done" for info in progress.values())
+        sources.append(f"{len(progress)} job boards")
+        elapsed = f"{search.elapsed:.0f}s"
+    if gig_search is not None:
+        lines["freelance platforms"] = describe_gig_search(gig_search)
+        finished += gig_search.done
+        sources.append("freelance platforms")
+    sources = " and ".join(sources)
+    failed = (search is not None and search.error is not None) or (
+        gig_search is not None and gig_search.error is not None
+    )
+    done = searches_done(search, gig_search)
+    if done:
+        label = f"Searched {sources}" + (f" in {elapsed}" if elapsed else "")
+        state = "error" if failed else "complete"
+    else:
+        label = f"Searching {sources}... {finished}/{len(lines)} done"
+        label += f" ({elapsed})" if elapsed else ""
+        state = "running"
+    with st.status(label, expanded=not done, state=state):
+        for source, line in lines.items():
+            st.write(f"**{source}**: {line}")
+
+
+@st.fragment(run_every=1.0)
+def render_search_progress(
+    search: BackgroundSearch | None, gig_search: BackgroundGigSearch | None = None
+):
+    """
+    Live view of running searches: the status of every site and the jobs of the
+    sites that finished, refreshed every second. Reruns the app once all are done.
+    """
+    if searches_done(search, gig_search):
+        st.rerun()
+    render_search_status(search, gig_search)
+    if search is None:
+        return
+    for site, cards in search.finished_site_cards().items():
+        st.subheader(f"{site} ({len(cards)} jobs)")
+        render_cards(cards, key=f"{site}_progress_page")
+
+
+job_card_template = """
+<div class="job-card">
+<div class="job-platform">{site}</div>
+<div class="job-title">{title}</div>
+<div class="job-company">{company}</div>
+<div class="job-location">📍 {location}</div>
+<div class="job-details">
+<span class="badge">💼 {job_type}</span>
+<span class="badge">📅 {date_posted}</span>
+<span class="badge">🏠 {remote}</span>
+</div>
+<div class="job-details salary-range">
+💰 {min_amount} - {max_amount} {currency} {interval}
+</div>
+<div class="job-description">{description}</div>
+<div class="job-actions">
+<a href="{job_url}" target="_blank" class="view-job-btn">View Job 👉</a>
+<button onclick="saveJob('{key}')" class="save-job-btn">Save Job ⭐</button>
+</div>
+</div>
+"""
+
+gig_card_template = """
+<div class="gig-card">
+<div class="gig-platform-badge">{platform}</div>
+<div class="gig-title">{title}</div>
+<div class="gig-client">👤 Client Rating: {client_rating} ({client_reviews} reviews)</div>
+<div class="gig-platform">📱 Platform: {platform}</div>
+<div class="gig-details">
+<span class="badge gig-badge">💰 {budget_min} - {budget_max} {currency}</span>
+<span class="badge gig-badge">📅 {posted_date}</span>
+<span class="badge gig-badge">🎯 {experience_level}</span>
+<span class="badge gig-badge">⏱️ {duration}</span>
+</div>
+<div class="gig-details budget-range">
+💰 Budget: {budget_min} - {budget_max} {currency} | Type: {project_type}
+</div>
+<div class="gig-description">{description}</div>
+<div class="gig-actions">
+<a href="{url}" target="_blank" class="view-gig-btn">View Gig 👉</a>
+<button onclick="saveGig('{key}')" class="save-gig-btn">Save Gig ⭐</button>
+</div>
+</div>
+"""
+
+# cards rendered per page of results
+card_page_size = int(os.getenv("UNIFIEDGIGS_CARDS_PER_PAGE", "20"))
+
+
+def job_cards_html(jobs: pd.DataFrame) -> pd.Series:
+    """
+    Card markup of every job, built column by column instead of row by row
+    :return: html by jobs.index
+    """
+    remote = _column(jobs, "is_remote", False).eq(True)
+    interval = _text(jobs, "interval", "per year").replace("", "per year")
+    return _fill(
+        job_card_template,
+        jobs.index,
+        site=_text(jobs, "site", "Unknown"),
+        title=_text(jobs, "title", "No Title"),
+        company=_text(jobs, "company", "Unknown Company"),
+        location=_text(jobs, "location", "Location not specified"),
+        job_type=_text(jobs, "job_type", "Not specified"),
+        date_posted=_text(jobs, "date_posted", "Date not available"),
+        remote=remote.map({True: "Remote", False: "On-site"}),
+        min_amount=_text(jobs, "min_amount", "Not specified"),
+        max_amount=_text(jobs, "max_amount", "Not specified"),
+        currency=_text(jobs, "currency", ""),
+        interval=interval,
+        description=_descriptions(jobs),
+        job_url=_text(jobs, "job_url", "#"),
+        key=pd.Series(jobs.index.astype(str), index=jobs.index),
+    )
+
+
+def gig_cards_html(gigs: pd.DataFrame) -> pd.Series:
+    """
+    Card markup of every freelance gig, built column by column
+    :return: html by gigs.index
+    """
+    return _fill(
+        gig_card_template,
+        gigs.index,
+        platform=_text(gigs, "platform", "Unknown"),
+        title=_text(gigs, "title", "No Title"),
+        client_rating=_text(gigs, "client_rating", "N/A"),
+        client_reviews=_text(gigs, "client_reviews", "0"),
+        budget_min=_text(gigs, "budget_min", "N/A"),
+        budget_max=_text(gigs, "budget_max", "N/A"),
+        currency=_text(gigs, "currency", "USD"),
+        posted_date=_text(gigs, "posted_date", "Date not available"),
+        experience_level=_text(gigs, "experience_level", "Not specified"),
+        duration=_text(gigs, "duration", "Not specified"),
+        project_type=_text(gigs, "project_type", "Not specified"),
+        description=_descriptions(gigs),
+        url=_text(gigs, "url", "#"),
+        key=pd.Series(gigs.index.astype(str), index=gigs.index),
+    )
+
+
+def _column(frame: pd.DataFrame, column: str, default) -> pd.Series:
+    if column in frame.columns:
+        return frame[column]
+    return pd.Series(default, index=frame.index, dtype=object)
+
+
+def _text(frame: pd.DataFrame, column: str, default: str) -> pd.Series:
+    values = _column(frame, column, None).astype(object)
+    return values.where(values.notna(), default).astype(str)
+
+
+def _descriptions(frame: pd.DataFrame) -> pd.Series:
+    # only the 300 characters shown are cleaned, on one line so a blank line in a
+    # description can't end the card's html block
+    descriptions = _text(frame, "description", "")
+    cleaned = (descriptions.str[:300] + "...").map(strip_markdown_formatting)
+    cleaned = cleaned.str.replace(r"\s+", " ", regex=True)
+    return cleaned.where(descriptions != "", "No description available")
+
+
+def _fill(template: str, index: pd.Index, **fields: pd.Series) -> pd.Series:
+    parts = re.split(r"\{(\w+)\}", template.strip())
+    html = pd.Series(parts[0], index=index, dtype=object)
+    for name, text in zip(parts[1::2], parts[2::2]):
+        html = html + fields[name] + text
+    return html
+
+
+def render_cards(cards: pd.Series, key: str, page_size: int = card_page_size):
+    """
+    One page of cards in a single markdown element, with a page picker when there
+    is more than one page, so the page costs the same however many results there are
+    :param cards: html of every card, in display order
+    :param key: widget key of the page picker
+    """
+    pages = max(1, -(-len(cards) // page_size))
+    if st.session_state.get(key, 1) > pages:
+        # fewer results than when the page was picked, e.g. after filtering
+        st.session_state[key] = 1
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=key
+        )
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(cards))
+    if pages > 1:
+        st.caption(f"Showing {start + 1}-{end} of {len(cards)}")
+    st.markdown("\n".join(cards.iloc[start:end]), unsafe_allow_html=True)
+
+
+def render_downloads(jobs: pd.DataFrame, file_stem: str, label: str = "Download {}"):
+    """
+    A download button per export format (CSV, Parquet, Excel, JSONL). A file is only
+    built, in memory, when its button is clicked, instead of every format on every
+    rerun, and clicking doesn't rerun the page.
+    :param file_stem: file name before the timestamp and extension
+    :param label: button label, {} is the format name
+    """
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    columns = st.columns(len(export_formats))
+    for column, (name, (export, extension, mime)) in zip(
+        columns, export_formats.items()
+    ):
+        with column:
+            st.download_button(
+                label=label.format(name),
+                data=functools.partial(export, jobs),
+                file_name=f"{file_stem}_{timestamp}.{extension}",
+                mime=mime,
+                on_click="ignore",
+                key=f"{file_stem}_{extension}_download",
+            )
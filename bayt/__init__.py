@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+import hashlib
 import random
-import time
 
 from bs4 import BeautifulSoup
 
@@ -14,7 +14,16 @@ from model import (
     Location,
     Country,
 )
-from util import create_logger, create_session
+from retry import get_retry_policy
+from util import (
+    cookie_store,
+    create_logger,
+    create_session,
+    deadline_passed,
+    deadline_sleep,
+    mostly_seen,
+    report_progress,
+)
 
 log = create_logger("Bayt")
 
@@ -23,7 +32,6 @@ class BaytScraper(Scraper):
     base_url = "https://www.bayt.com"
     min_delay = 5  # Minimum delay between requests
     max_delay = 10  # Maximum delay
-    max_retries = 3  # Number of retries
 
     def __init__(
         self, proxies: list[str] | str | None = None, ca_cert: str | None = None
@@ -32,6 +40,7 @@ class BaytScraper(Scraper):
         self.scraper_input = None
         self.session = None
         self.country = "worldwide"
+        self.retry_policy = get_retry_policy(self.site)
         
         # Adding user agents to make requests appear more like a browser
         self.user_agents = [
@@ -44,7 +53,11 @@ class BaytScraper(Scraper):
     def scrape(self, scraper_input: ScraperInput) -> JobResponse:
         self.scraper_input = scraper_input
         self.session = create_session(
-            proxies=self.proxies, ca_cert=self.ca_cert, is_tls=False, has_retry=True
+            proxies=self.proxies,
+            ca_cert=self.ca_cert,
+            is_tls=False,
+            site=self.site,
+            persist_cookies=True,
         )
         
         # Set a random user agent
@@ -65,13 +78,17 @@ class BaytScraper(Scraper):
         results_wanted = min(60, scraper_input.results_wanted if scraper_input.results_wanted else 10)
 
         while len(job_list) < results_wanted:
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {len(job_list)} jobs")
+                break
             log.info(f"Fetching Bayt jobs page {page}")
             
             # Add delay between requests (first page doesn't need delay)
             if page > 1:
                 delay = random.uniform(self.min_delay, self.max_delay)
                 log.info(f"Waiting {delay:.2f} seconds before next request")
-                time.sleep(delay)
+                if not deadline_sleep(delay, scraper_input.deadline):
+                    break
                 
             job_elements = self._fetch_jobs(self.scraper_input.search_term, page)
             if not job_elements:
@@ -99,9 +116,13 @@ class BaytScraper(Scraper):
                     log.error(f"Bayt: Error extracting job info: {str(e)}")
                     continue
 
+            report_progress("page", page=page, jobs=len(job_list))
             if len(job_list) == initial_count:
                 log.info(f"No new jobs found on page {page}. Ending pagination.")
                 break
+            if mostly_seen([job.id for job in job_list[initial_count:]], scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
 
             page += 1
 
@@ -114,56 +135,39 @@ class BaytScraper(Scraper):
         """
         url = f"{self.base_url}/en/international/jobs/{query}-jobs/?page={page}"
         
-        for retry in range(self.max_retries):
-            try:
-                log.info(f"Making request to Bayt (attempt {retry+1}/{self.max_retries})")
-                
-                # Rotate user agent on retries
-                self.session.headers.update({
-                    "User-Agent": random.choice(self.user_agents)
-                })
-                
-                response = self.session.get(url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    job_listings = soup.find_all("li", attrs={"data-js-job": ""})
-                    log.debug(f"Found {len(job_listings)} job listing elements")
-                    return job_listings
-                elif response.status_code == 403:
-                    log.warning(f"Bayt returned 403 Forbidden (attempt {retry+1}/{self.max_retries})")
-                    if retry < self.max_retries - 1:
-                        # Increase backoff time with each retry
-                        wait_time = (retry + 1) * 30
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                        
-                        # Recreate session on retry to get fresh connection
-                        self.session = create_session(
-                            proxies=self.proxies, ca_cert=self.ca_cert, is_tls=False, has_retry=True,
-                            clear_cookies=True
-                        )
-                    else:
-                        log.error(f"Bayt: Error fetching jobs - 403 Client Error: Forbidden for url: {url}")
-                        return None
-                else:
-                    log.warning(f"Bayt returned status code {response.status_code}")
-                    if retry < self.max_retries - 1:
-                        wait_time = (retry + 1) * 15
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        log.error(f"Bayt: Error fetching jobs - {response.status_code} response for url: {url}")
-                        return None
-            except Exception as e:
-                log.error(f"Bayt: Error fetching jobs - {str(e)}")
-                if retry < self.max_retries - 1:
-                    wait_time = (retry + 1) * 15
-                    log.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                else:
-                    return None
-        
-        return None
+        def send():
+            # Rotate user agent on retries
+            self.session.headers.update({"User-Agent": random.choice(self.user_agents)})
+            return self.session.get(url)
+
+        def new_session_if_forbidden(attempt, response):
+            if response is not None and response.status_code == 403:
+                # Recreate session on retry to get fresh connection, the stored
+                # cookies got us blocked so forget them as well
+                cookie_store.clear(self.site)
+                self.session = create_session(
+                    proxies=self.proxies,
+                    ca_cert=self.ca_cert,
+                    is_tls=False,
+                    clear_cookies=True,
+                    site=self.site,
+                )
+
+        response = self.retry_policy.execute(
+            send,
+            on_retry=new_session_if_forbidden,
+            description="Bayt search page",
+            deadline=self.scraper_input.deadline,
+        )
+        if response is None:
+            return None
+        if response.status_code != 200:
+            log.error(f"Bayt: Error fetching jobs - {response.status_code} response for url: {url}")
+            return None
+        soup = BeautifulSoup(response.text, "html.parser")
+        job_listings = soup.find_all("li", attrs={"data-js-job": ""})
+        log.debug(f"Found {len(job_listings)} job listing elements")
+        return job_listings
 
     def _extract_job_info(self, job: BeautifulSoup) -> JobPost | None:
         """
@@ -191,7 +195,8 @@ class BaytScraper(Scraper):
         location_tag = job.find("div", class_="t-mute t-small")
         location = location_tag.get_text(strip=True) if location_tag else None
 
-        job_id = f"bayt-{abs(hash(job_url))}"
+        # hash() is salted per process, md5 keeps ids stable across runs
+        job_id = f"bayt-{hashlib.md5(job_url.encode()).hexdigest()[:16]}"
         location_obj = Location(
             city=location,
             country=Country.from_string(self.country),
@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+"""
+Consolidates result CSVs (job_search_results_*.csv, mern_opportunities_*.csv, ...)
+into one deduplicated Parquet dataset, partitioned by the month (or day) jobs were
+posted:
+
+    consolidated/posted=2025-05/part-<run>-<n>.parquet
+    consolidated/posted=unknown/...
+    consolidated/_manifest.json  files already consolidated, rows per partition
+    consolidated/_keys.db        ids and job urls already in the dataset
+
+CSVs are read in chunks by a pool of worker processes and normalized to the
+scrape_jobs columns. The main process then drops every row whose id or job_url is
+already in the dataset, so re-running only adds what new or changed files bring.
+Memory stays bounded by --chunksize and --buffer-mb, however large the input.
+
+Usage: python consolidate.py [csv files or globs] --output consolidated
+Read back with pandas.read_parquet("consolidated"). Needs pyarrow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from export import bool_columns, to_typed_frame
+from sinks import parquet_schema
+from util import create_logger, desired_order
+
+log = create_logger("Consolidate")
+
+default_inputs = [
+    "job_search_results_*.csv",
+    "jobs_results.csv",
+    "mern_opportunities_*.csv",
+    "mern_freelance_gigs_*.csv",
+]
+
+# freelance gig CSVs (freelance_gig_search) use their own names for the same things
+column_aliases = {
+    "url": "job_url",
+    "platform": "site",
+    "posted_date": "date_posted",
+    "budget_min": "min_amount",
+    "budget_max": "max_amount",
+    "skills_required": "skills",
+    "client_rating": "company_rating",
+    "client_reviews": "company_reviews_count",
+    "experience_level": "job_level",
+    "project_type": "job_type",
+}
+
+partition_column = "posted"
+partition_formats = {"month": "%Y-%m", "day": "%Y-%m-%d"}
+true_values = {"true", "1", "yes", "y", "t"}
+false_values = {"false", "0", "no", "n", "f"}
+
+
+def normalize(chunk: pd.DataFrame, granularity: str = "month") -> pd.DataFrame:
+    """
+    Renames and types a CSV chunk into the desired_order columns plus its partition
+    """
+    chunk = chunk.rename(
+        columns={
+            alias: column
+            for alias, column in column_aliases.items()
+            if alias in chunk.columns and column not in chunk.columns
+        }
+    )
+    for column in bool_columns:
+        if column in chunk.columns:
+            chunk[column] = chunk[column].map(_to_bool, na_action="ignore")
+    typed = to_typed_frame(chunk.reindex(columns=desired_order))
+    typed[partition_column] = (
+        typed["date_posted"]
+        .dt.strftime(partition_formats[granularity])
+        .fillna("unknown")
+        .astype("string")
+    )
+    return typed
+
+
+def _to_bool(value) -> bool | None:
+    text = str(value).strip().lower()
+    if text in true_values:
+        return True
+    if text in false_values:
+        return False
+    return None
+
+
+def stage_file(
+    path: str, staging_dir: str, chunksize: int, granularity: str
+) -> tuple[str, str | None, int, str | None]:
+    """
+    Worker: normalizes one CSV, chunk by chunk, into a staging Parquet file
+    :return: the CSV path, the staging file (None when the CSV had no rows), rows read
+        and why the CSV couldn't be read, if it couldn't
+    """
+    staging_path = os.path.join(
+        staging_dir, hashlib.md5(path.encode()).hexdigest() + ".parquet"
+    )
+    schema = parquet_schema().append(pa.field(partition_column, pa.string()))
+    writer = None
+    rows = 0
+    try:
+        chunks = pd.read_csv(
+            path,
+            dtype=str,
+            chunksize=chunksize,
+            escapechar="\\",
+            on_bad_lines="warn",
+        )
+        for chunk in chunks:
+            table = pa.Table.from_pandas(
+                normalize(chunk, granularity), preserve_index=False
+            ).cast(schema)
+            if writer is None:
+                writer = pq.ParquetWriter(staging_path, schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    except pd.errors.EmptyDataError:
+        pass
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        # e.g. a file still being written, left out of the manifest to retry next run
+        if writer is not None:
+            writer.close()
+            os.remove(staging_path)
+        return path, None, rows, str(e)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path, staging_path if writer is not None else None, rows, None
+
+
+class KeyIndex:
+    """
+    ids and job urls already in the dataset, on disk so memory doesn't grow with it
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY)")
+
+    def new_rows(self, ids: list, urls: list) -> list[bool]:
+        """
+        Which rows have neither their id nor their job_url in the index yet, and adds
+        theirs. Rows with neither are always new. Uncommitted until commit()
+        """
+        row_keys = [
+            [
+                f"{prefix}:{value}"
+                for prefix, value in (("id", id), ("url", url))
+                if value
+            ]
+            for id, url in zip(ids, urls)
+        ]
+        known = self._known({key for keys in row_keys for key in keys})
+        new, added = [], []
+        for keys in row_keys:
+            is_new = not any(key in known for key in keys)
+            new.append(is_new)
+            if is_new:
+                # also catches duplicates within the batch
+                known.update(keys)
+                added += [(key,) for key in keys]
+        self._conn.executemany("INSERT OR IGNORE INTO keys VALUES (?)", added)
+        return new
+
+    def _known(self, keys: set[str], chunk_size: int = 5000) -> set[str]:
+        keys = list(keys)
+        known = set()
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start : start + chunk_size]
+            known.update(
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT key FROM keys WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return known
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class Consolidator:
+    def __init__(
+        self,
+        output: str = "consolidated",
+        workers: int | None = None,
+        chunksize: int = 50000,
+        buffer_mb: int = 256,
+        granularity: str = "month",
+    ):
+        """
+        :param output: dataset directory, created on first run
+        :param workers: worker processes reading CSVs, one per core by default
+        :param chunksize: CSV rows a worker normalizes at a time
+        :param buffer_mb: megabytes of new rows held in memory before they are written out
+        :param granularity: partition by the "month" or "day" jobs were posted
+        """
+        if granularity not in partition_formats:
+            raise ValueError(f"granularity must be one of {list(partition_formats)}")
+        self.output = output
+        self.workers = workers or os.cpu_count()
+        self.chunksize = chunksize
+        self.buffer_bytes = buffer_mb * 2**20
+        self.granularity = granularity
+        # underscore names are skipped by parquet readers loading the directory
+        self.manifest_path = os.path.join(output, "_manifest.json")
+        self.staging_dir = os.path.join(output, "_staging")
+        self.run_id = time.strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self._parts = 0
+        self._manifest: dict = {}
+        self._pending: dict[str, list[pa.Table]] = {}
+        self._pending_bytes = 0
+        self._pending_files: dict[str, dict] = {}
+
+    def run(self, paths: list[str]) -> dict:
+        """
+        Consolidates every path not already in the manifest (unchanged size and mtime)
+        :return: files, files that couldn't be read, rows read and rows added by this run
+        """
+        os.makedirs(self.output, exist_ok=True)
+        manifest = self._manifest = self._load_manifest()
+        if manifest.get("granularity", self.granularity) != self.granularity:
+            raise ValueError(
+                f"{self.output} is partitioned by {manifest['granularity']}, "
+                f"not {self.granularity}"
+            )
+        manifest["granularity"] = self.granularity
+        stats = {path: os.stat(path) for path in paths}
+        todo = [path for path in paths if self._changed(manifest, path, stats[path])]
+        log.info(f"{len(todo)} of {len(paths)} files to consolidate")
+        totals = {"files": len(todo), "failed": 0, "rows_read": 0, "rows_added": 0}
+        if not todo:
+            return totals
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        keys = KeyIndex(os.path.join(self.output, "_keys.db"))
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                staged = executor.map(
+                    stage_file,
+                    todo,
+                    [self.staging_dir] * len(todo),
+                    [self.chunksize] * len(todo),
+                    [self.granularity] * len(todo),
+                )
+                # merged in input order, so the first file a job appears in wins
+                for path, staging_path, rows_read, error in staged:
+                    if error:
+                        log.warning(f"{path}: skipped, {error}")
+                        totals["failed"] += 1
+                        continue
+                    rows_added = self._merge(staging_path, keys) if staging_path else 0
+                    # only in the manifest once its rows are written, see _flush
+                    self._pending_files[path] = {
+                        "size": stats[path].st_size,
+                        "mtime_ns": stats[path].st_mtime_ns,
+                        "rows_read": rows_read,
+                        "rows_added": rows_added,
+                        "run": self.run_id,
+                    }
+                    totals["rows_read"] += rows_read
+                    totals["rows_added"] += rows_added
+                    log.info(f"{path}: {rows_read} rows, {rows_added} new")
+            self._flush(keys)
+        finally:
+            keys.rollback()
+            keys.close()
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        return totals
+
+    def _merge(self, staging_path: str, keys: KeyIndex) -> int:
+        added = 0
+        staged = pq.ParquetFile(staging_path)
+        for batch in staged.iter_batches(batch_size=self.chunksize):
+            table = pa.Table.from_batches([batch])
+            mask = keys.new_rows(
+                table.column("id").to_pylist(), table.column("job_url").to_pylist()
+            )
+            table = table.filter(pa.array(mask))
+            added += table.num_rows
+            partitions = table.column(partition_column).to_pylist()
+            for partition in dict.fromkeys(partitions):
+                rows = table.filter(
+                    pa.array([value == partition for value in partitions])
+                )
+                self._pending.setdefault(partition, []).append(
+                    rows.drop_columns([partition_column])
+                )
+            self._pending_bytes += table.nbytes
+            if self._pending_bytes >= self.buffer_bytes:
+                self._flush(keys)
+        os.remove(staging_path)
+        return added
+
+    def _flush(self, keys: KeyIndex):
+        """
+        Writes pending rows, one new file per partition, then commits their keys and
+        records the files they came from. A run that dies before that re-reads those
+        files next time, and the committed keys keep their rows from being added twice.
+        """
+        counts = self._manifest.setdefault("partitions", {})
+        for partition, tables in self._pending.items():
+            directory = os.path.join(self.output, f"{partition_column}={partition}")
+            os.makedirs(directory, exist_ok=True)
+            table = pa.concat_tables(tables)
+            name = f"part-{self.run_id}-{self._parts}.parquet"
+            temp_path = os.path.join(directory, "." + name)
+            pq.write_table(table, temp_path, compression="zstd")
+            os.replace(temp_path, os.path.join(directory, name))
+            self._parts += 1
+            counts[partition] = counts.get(partition, 0) + table.num_rows
+        keys.commit()
+        self._manifest["files"].update(self._pending_files)
+        self._save_manifest(self._manifest)
+        self._pending = {}
+        self._pending_bytes = 0
+        self._pending_files = {}
+
+    @staticmethod
+    def _changed(manifest: dict, path: str, stat: os.stat_result) -> bool:
+        entry = manifest["files"].get(path)
+        if entry is None:
+            return True
+        return entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"files": {}, "partitions": {}}
+
+    def _save_manifest(self, manifest: dict):
+        manifest["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(self.manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """
+    Files matching the given paths or globs, deduplicated and sorted (result files
+    carry their timestamp in the name, so this is oldest first)
+    """
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(pattern) if glob.has_magic(pattern) else [pattern])
+    return sorted(os.path.normpath(path) for path in paths if os.path.isfile(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consolidate result CSVs into a deduplicated, date-partitioned Parquet dataset"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=default_inputs,
+        help="CSV files or globs (default: the result CSVs in the current directory)",
+    )
+    parser.add_argument("--output", default="consolidated", help="Dataset directory")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=50000,
+        help="CSV rows read at a time per worker",
+    )
+    parser.add_argument(
+        "--buffer-mb",
+        type=int,
+        default=256,
+        help="Megabytes of new rows held before writing",
+    )
+    parser.add_argument(
+        "--granularity",
+        choices=list(partition_formats),
+        default="month",
+        help="Partition by month or day posted",
+    )
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        log.error("No CSV files found")
+        return
+    consolidator = Consolidator(
+        output=args.output,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        buffer_mb=args.buffer_mb,
+        granularity=args.granularity,
+    )
+    totals = consolidator.run(paths)
+    log.info(
+        f"Consolidated {totals['files'] - totals['failed']} files: "
+        f"{totals['rows_read']} rows read, {totals['rows_added']} new"
+        + (f", {totals['failed']} files skipped" if totals["failed"] else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Exports of scrape_jobs results, to a file or to bytes for downloads: Parquet with
+typed columns (dates, floats, categoricals) and compression, CSV, JSON lines and
+Excel. Parquet needs pyarrow (pip install pyarrow), Excel needs openpyxl.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pandas as pd
+
+# low-cardinality text columns, stored once per distinct value
+category_columns = [
+    "site",
+    "job_type",
+    "salary_source",
+    "interval",
+    "currency",
+    "job_level",
+    "listing_type",
+    "work_from_home_type",
+    "search_type",
+    "platform",
+]
+float_columns = ["min_amount", "max_amount", "company_rating"]
+int_columns = ["company_reviews_count", "vacancy_count"]
+bool_columns = ["is_remote"]
+date_columns = ["date_posted"]
+
+
+def to_typed_frame(jobs: pd.DataFrame, string_dtype: str = "string") -> pd.DataFrame:
+    """
+    Copy of jobs with proper dtypes for every known column, the remaining text
+    columns become pandas strings
+    :param jobs: scrape_jobs (or freelance search) results
+    :param string_dtype: dtype of the text columns, "string[pyarrow]" keeps them in
+        Arrow buffers instead of one Python object per value
+    :return: typed DataFrame
+    """
+    typed = jobs.copy()
+    for column in typed.columns:
+        values = typed[column]
+        if column in date_columns:
+            typed[column] = pd.to_datetime(values, errors="coerce")
+        elif column in float_columns:
+            typed[column] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif column in int_columns:
+            typed[column] = (
+                pd.to_numeric(values, errors="coerce").round().astype("Int64")
+            )
+        elif column in bool_columns:
+            typed[column] = values.astype("boolean")
+        elif column in category_columns:
+            typed[column] = values.astype(string_dtype).astype("category")
+        elif values.dtype == object:
+            typed[column] = values.astype(string_dtype)
+    return typed
+
+
+def export_parquet(
+    jobs: pd.DataFrame, path: str | None = None, compression: str = "zstd"
+) -> bytes | str:
+    """
+    Writes jobs as Parquet
+    :param jobs: scrape_jobs results
+    :param path: file to write, None to get the bytes (e.g. for a download button)
+    :param compression: parquet codec, zstd by default (snappy, gzip, None also work)
+    :return: path, or the file contents when no path is given
+    """
+    typed = to_typed_frame(jobs)
+    if path is None:
+        buffer = io.BytesIO()
+        typed.to_parquet(buffer, engine="pyarrow", compression=compression, index=False)
+        return buffer.getvalue()
+    typed.to_parquet(path, engine="pyarrow", compression=compression, index=False)
+    return path
+
+
+def read_parquet(source: str | bytes, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Reads an export back, only the given columns if any
+    :param source: path or bytes from export_parquet
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return pd.read_parquet(source, engine="pyarrow", columns=columns)
+
+
+def export_csv(jobs: pd.DataFrame, path: str | None = None) -> bytes | str:
+    """
+    Writes jobs as CSV, quoted like the apps always did
+    :param path: file to write, None to get the bytes
+    :return: path, or the file contents when no path is given
+    """
+    text = jobs.to_csv(quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
+    return _write(text.encode("utf-8"), path)
+
+
+def export_jsonl(jobs: pd.DataFrame, path: str | None = None) -> bytes | str:
+    """
+    Writes jobs as JSON lines, one object per job, dates as ISO strings
+    :param path: file to write, None to get the bytes
+    :return: path, or the file contents when no path is given
+    """
+    columns = list(jobs.columns)
+    lines = (
+        json.dumps(
+            {column: json_value(value) for column, value in zip(columns, row)},
+            ensure_ascii=False,
+        )
+        + "\n"
+        for row in jobs.itertuples(index=False, name=None)
+    )
+    return _write("".join(lines).encode("utf-8"), path)
+
+
+# longest text an Excel cell holds
+excel_cell_limit = 32767
+
+
+def export_excel(jobs: pd.DataFrame, path: str | None = None) -> bytes | str:
+    """
+    Writes jobs as an .xlsx sheet. Rows are streamed with openpyxl's write-only mode,
+    so the workbook never holds a cell object per value. Text longer than a cell
+    holds is cut, characters Excel rejects are dropped.
+    :param path: file to write, None to get the bytes
+    :return: path, or the file contents when no path is given
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    def cell_value(value):
+        value = json_value(value)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        if isinstance(value, str):
+            value = ILLEGAL_CHARACTERS_RE.sub("", value)[:excel_cell_limit]
+        return value
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("jobs")
+    sheet.append([str(column) for column in jobs.columns])
+    for row in jobs.itertuples(index=False, name=None):
+        sheet.append([cell_value(value) for value in row])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return _write(buffer.getvalue(), path)
+
+
+# format name: (export function, file extension, mime type)
+export_formats = {
+    "CSV": (export_csv, "csv", "text/csv"),
+    "Parquet": (export_parquet, "parquet", "application/vnd.apache.parquet"),
+    "Excel": (
+        export_excel,
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "JSONL": (export_jsonl, "jsonl", "application/jsonl"),
+}
+
+
+def json_value(value):
+    """
+    value as JSON can hold it: dates as ISO strings, missing values as None
+    """
+    if isinstance(value, (datetime, date)):
+        if pd.isna(value):
+            return None
+        return value.isoformat()
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        # numpy scalar
+        return value.item()
+    return value
+
+
+def _write(data: bytes, path: str | None) -> bytes | str:
+    if path is None:
+        return data
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
@@ -6,14 +6,34 @@ This module provides specialized search capabilities for freelance web developme
 particularly focused on MERN stack opportunities across multiple freelance platforms.
 """
 
+import html
+import os
+import re
+import xml.etree.ElementTree as ElementTree
 import requests
 import pandas as pd
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
-import streamlit as st
+from dataclasses import asdict, dataclass, fields
+from email.utils import parsedate_to_datetime
+
+from state import PersistentState
+from util import create_logger
+
+logger = create_logger("Freelance")
+
+# Upwork's job search RSS feed and Freelancer.com's public projects API
+upwork_feed_url = os.getenv("UNIFIEDGIGS_UPWORK_FEED_URL", "https://www.upwork.com/ab/feed/jobs/rss")
+freelancer_api_url = os.getenv(
+    "UNIFIEDGIGS_FREELANCER_API_URL", "https://www.freelancer.com/api/projects/0.1/projects/active/"
+)
+# ETag / Last-Modified of each feed with the gigs parsed from it, so polling an
+# unchanged feed costs a 304 instead of downloading and parsing it again
+feed_cache = PersistentState("freelance_feeds", ttl=24 * 3600)
 
 @dataclass
 class FreelanceGig:
@@ -34,6 +54,28 @@ class FreelanceGig:
     platform: str
     is_remote: bool = True
 
+class GigColumns:
+    """Builds the gigs DataFrame column by column as platforms hand their gigs back"""
+    
+    # FreelanceGig fields, in order, are the result columns
+    columns = [field.name for field in fields(FreelanceGig)]
+    
+    def __init__(self):
+        self.values = {column: [] for column in self.columns}
+    
+    def add(self, gigs: List[FreelanceGig]):
+        for gig in gigs:
+            for column, values in self.values.items():
+                values.append(getattr(gig, column))
+    
+    def __len__(self) -> int:
+        return len(self.values["title"])
+    
+    def to_frame(self) -> pd.DataFrame:
+        values = dict(self.values)
+        values["skills_required"] = [', '.join(skills) for skills in values["skills_required"]]
+        return pd.DataFrame(values, columns=self.columns)
+
 class FreelancePlatformSearcher:
     """Base class for freelance platform scrapers"""
     
@@ -44,10 +86,49 @@ class FreelancePlatformSearcher:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
+    # seconds to wait for a platform's answer
+    request_timeout = 15
+    
     def search_gigs(self, query: str, max_results: int = 50) -> List[FreelanceGig]:
         """Search for gigs on the platform"""
         raise NotImplementedError
     
+    def _get_feed(self, url: str, params: Dict, parse) -> List[FreelanceGig]:
+        """
+        Fetch a feed and parse it as it downloads. The last copy is revalidated with
+        its ETag / Last-Modified, and a 304 answer returns its gigs without parsing.
+        
+        Args:
+            parse: called with the response body (a file) and returns the gigs
+        """
+        key = [url, params]
+        cached = feed_cache.get(key)
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        with self.session.get(
+            url, params=params, headers=headers, timeout=self.request_timeout, stream=True
+        ) as response:
+            if response.status_code == 304 and cached:
+                return [FreelanceGig(**gig) for gig in cached["gigs"]]
+            response.raise_for_status()
+            response.raw.decode_content = True
+            gigs = parse(response.raw)
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            feed_cache.set(key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "gigs": [asdict(gig) for gig in gigs],
+            })
+        return gigs
+    
     def _parse_budget(self, budget_str: str) -> Tuple[Optional[float], Optional[float]]:
         """Parse budget string to min/max values"""
         if not budget_str:
@@ -70,80 +151,84 @@ class FreelancePlatformSearcher:
             return None, None
 
 class UpworkSearcher(FreelancePlatformSearcher):
-    """Upwork gig searcher using their public API"""
+    """Upwork gig searcher reading the job search RSS feed"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # labels of the details Upwork appends to each item's description
+    detail_labels = ["Budget", "Hourly Range", "Posted On", "Category", "Skills", "Location", "Country"]
+    
+    def __init__(self, api_key: Optional[str] = None, feed_url: Optional[str] = None):
         super().__init__(api_key)
         self.base_url = "https://www.upwork.com"
+        self.feed_url = feed_url or upwork_feed_url
     
     def search_gigs(self, query: str, max_results: int = 50) -> List[FreelanceGig]:
-        """Search Upwork for gigs (simulated - requires API access)"""
-        # Note: Upwork requires API access. This is a demonstration structure
+        """Search Upwork's job feed, newest jobs first"""
+        params = {"q": query, "sort": "recency", "paging": f"0;{max_results}"}
+        return self._get_feed(self.feed_url, params, lambda body: self._parse_feed(body, max_results))
+    
+    def _parse_feed(self, body, max_results: int) -> List[FreelanceGig]:
+        """Parse the RSS items as they arrive, each one is freed once it is read"""
         gigs = []
+        channel = None
+        for event, element in ElementTree.iterparse(body, events=("start", "end")):
+            if event == "start":
+                if element.tag == "channel":
+                    channel = element
+                continue
+            if element.tag != "item":
+                continue
+            gigs.append(self._parse_item(element))
+            # the channel would otherwise keep every item read so far
+            if channel is not None:
+                channel.remove(element)
+            if len(gigs) >= max_results:
+                break
+        return gigs
+    
+    def _parse_item(self, item) -> FreelanceGig:
+        summary = html.unescape(item.findtext("description") or "")
+        details = {
+            label.strip(): value.strip()
+            for label, value in re.findall(r"<b>([^<]+)</b>:\s*([^<]*)", summary)
+        }
+        budget = details.get("Budget") or details.get("Hourly Range")
+        min_budget, max_budget = self._parse_budget(budget)
+        skills = [skill.strip() for skill in details.get("Skills", "").split(",") if skill.strip()]
         
-        # MERN stack specific search terms
-        mern_terms = [
-            "MERN stack developer",
-            "React Node.js MongoDB",
-            "full stack JavaScript",
-            "MongoDB Express React Node",
-            "React developer with Node.js",
-            "full stack web development",
-            "JavaScript full stack",
-            "React frontend with Node backend"
-        ]
+        # the job description is what comes before the details
+        labels = "|".join(re.escape(label) for label in self.detail_labels)
+        description = re.split(rf"<b>(?:{labels})</b>", summary, maxsplit=1)[0]
+        description = re.sub(r"<[^>]+>", " ", description)
+        description = re.sub(r"\s+", " ", description).strip()
         
-        # For demonstration, we'll create sample gigs
-        # In production, you'd use Upwork's API
-        sample_gigs = [
-            {
-                "title": "MERN Stack Developer for E-commerce Platform",
-                "description": "Need a skilled MERN stack developer to build a modern e-commerce platform with React frontend, Node.js backend, and MongoDB database.",
-                "budget": "$2000-$5000",
-                "skills": ["React", "Node.js", "MongoDB", "Express", "JavaScript"],
-                "client_rating": 4.8,
-                "client_reviews": 45,
-                "project_type": "Fixed Price",
-                "experience_level": "Intermediate",
-                "duration": "2-3 months"
-            },
-            {
-                "title": "React Developer with Node.js Backend Experience",
-                "description": "Looking for a React developer who can also handle Node.js backend development. Project involves building a real-time chat application.",
-                "budget": "$1500-$3000",
-                "skills": ["React", "Node.js", "Socket.io", "MongoDB"],
-                "client_rating": 4.6,
-                "client_reviews": 23,
-                "project_type": "Fixed Price",
-                "experience_level": "Entry",
-                "duration": "1-2 months"
-            }
-        ]
+        try:
+            posted_date = parsedate_to_datetime(item.findtext("pubDate")).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            posted_date = datetime.now().strftime("%Y-%m-%d")
         
-        for gig_data in sample_gigs:
-            min_budget, max_budget = self._parse_budget(gig_data["budget"])
-            gig = FreelanceGig(
-                title=gig_data["title"],
-                description=gig_data["description"],
-                budget_min=min_budget,
-                budget_max=max_budget,
-                currency="USD",
-                skills_required=gig_data["skills"],
-                client_rating=gig_data["client_rating"],
-                client_reviews=gig_data["client_reviews"],
-                posted_date=datetime.now().strftime("%Y-%m-%d"),
-                project_type=gig_data["project_type"],
-                experience_level=gig_data["experience_level"],
-                duration=gig_data["duration"],
-                url=f"{self.base_url}/jobs/~{hash(gig_data['title'])}",
-                platform="Upwork"
-            )
-            gigs.append(gig)
+        title = html.unescape(item.findtext("title") or "").strip()
+        if title.endswith(" - Upwork"):
+            title = title[:-len(" - Upwork")]
         
-        return gigs[:max_results]
+        return FreelanceGig(
+            title=title,
+            description=description,
+            budget_min=min_budget,
+            budget_max=max_budget,
+            currency="USD",
+            skills_required=skills,
+            client_rating=None,
+            client_reviews=None,
+            posted_date=posted_date,
+            project_type="Hourly" if "Hourly Range" in details else "Fixed Price",
+            experience_level="Not specified",
+            duration=None,
+            url=(item.findtext("link") or "").strip(),
+            platform="Upwork"
+        )
 
 class FiverrSearcher(FreelancePlatformSearcher):
-    """Fiverr gig searcher"""
+    """Fiverr gig searcher (sample gigs: Fiverr has no public search feed or API)"""
     
     def __init__(self):
         super().__init__()
@@ -202,63 +287,59 @@ class FiverrSearcher(FreelancePlatformSearcher):
         return gigs[:max_results]
 
 class FreelancerSearcher(FreelancePlatformSearcher):
-    """Freelancer.com gig searcher"""
+    """Freelancer.com gig searcher reading the public projects API"""
     
-    def __init__(self):
+    def __init__(self, api_url: Optional[str] = None):
         super().__init__()
         self.base_url = "https://www.freelancer.com"
+        self.api_url = api_url or freelancer_api_url
     
     def search_gigs(self, query: str, max_results: int = 50) -> List[FreelanceGig]:
-        """Search Freelancer.com for gigs"""
-        gigs = []
-        
-        # Freelancer.com search simulation
-        sample_gigs = [
-            {
-                "title": "MERN Stack Developer Needed for Startup",
-                "description": "Startup looking for experienced MERN stack developer to build MVP. Must have experience with React, Node.js, MongoDB, and deployment.",
-                "budget": "$3000-$8000",
-                "skills": ["React", "Node.js", "MongoDB", "Express", "AWS", "Docker"],
-                "client_rating": 4.7,
-                "client_reviews": 34,
-                "project_type": "Fixed Price",
-                "experience_level": "Expert",
-                "duration": "3-6 months"
-            },
-            {
-                "title": "React Developer for E-commerce Website",
-                "description": "Need a React developer to build an e-commerce website with Node.js backend. Should include payment integration and admin panel.",
-                "budget": "$1000-$2500",
-                "skills": ["React", "Node.js", "Stripe", "MongoDB", "E-commerce"],
-                "client_rating": 4.5,
-                "client_reviews": 18,
-                "project_type": "Fixed Price",
-                "experience_level": "Intermediate",
-                "duration": "1-2 months"
-            }
-        ]
-        
-        for gig_data in sample_gigs:
-            min_budget, max_budget = self._parse_budget(gig_data["budget"])
-            gig = FreelanceGig(
-                title=gig_data["title"],
-                description=gig_data["description"],
-                budget_min=min_budget,
-                budget_max=max_budget,
-                currency="USD",
-                skills_required=gig_data["skills"],
-                client_rating=gig_data["client_rating"],
-                client_reviews=gig_data["client_reviews"],
-                posted_date=datetime.now().strftime("%Y-%m-%d"),
-                project_type=gig_data["project_type"],
-                experience_level=gig_data["experience_level"],
-                duration=gig_data["duration"],
-                url=f"{self.base_url}/projects/{hash(gig_data['title'])}",
-                platform="Freelancer.com"
-            )
-            gigs.append(gig)
+        """Search Freelancer.com's active projects"""
+        params = {
+            "query": query,
+            "limit": max_results,
+            "full_description": "true",
+            "job_details": "true",
+            "compact": "true",
+        }
+        return self._get_feed(self.api_url, params, lambda body: self._parse_projects(body, max_results))
+    
+    def _parse_projects(self, body, max_results: int) -> List[FreelanceGig]:
+        """One page of at most max_results projects, decoded straight from the body"""
+        payload = json.load(body)
+        if payload.get("status") != "success":
+            raise ValueError(payload.get("message") or "Freelancer.com API error")
+        projects = payload.get("result", {}).get("projects", [])
+        return [self._parse_project(project) for project in projects[:max_results]]
+    
+    def _parse_project(self, project: Dict) -> FreelanceGig:
+        budget = project.get("budget") or {}
+        min_budget = budget.get("minimum")
+        max_budget = budget.get("maximum")
+        submitted = project.get("time_submitted")
+        if submitted:
+            posted_date = datetime.fromtimestamp(submitted).strftime("%Y-%m-%d")
+        else:
+            posted_date = datetime.now().strftime("%Y-%m-%d")
+        seo_url = project.get("seo_url") or project.get("id")
         
-        return gigs[:max_results]
+        return FreelanceGig(
+            title=project.get("title") or "",
+            description=project.get("description") or project.get("preview_description") or "",
+            budget_min=float(min_budget) if min_budget is not None else None,
+            budget_max=float(max_budget) if max_budget is not None else None,
+            currency=(project.get("currency") or {}).get("code") or "USD",
+            skills_required=[job["name"] for job in project.get("jobs") or [] if job.get("name")],
+            client_rating=None,
+            client_reviews=None,
+            posted_date=posted_date,
+            project_type="Hourly" if project.get("type") == "hourly" else "Fixed Price",
+            experience_level="Not specified",
+            duration=None,
+            url=f"{self.base_url}/projects/{seo_url}",
+            platform="Freelancer.com"
+        )
 
 class UnifiedFreelanceSearcher:
     """Unified searcher for multiple freelance platforms"""
@@ -277,75 +358,99 @@ class UnifiedFreelanceSearcher:
                            min_budget: Optional[float] = None,
                            max_budget: Optional[float] = None,
                            experience_level: Optional[str] = None,
-                           project_type: Optional[str] = None) -> pd.DataFrame:
+                           project_type: Optional[str] = None,
+                           timeout: float = 30) -> pd.DataFrame:
         """
-        Search across multiple freelance platforms
+        Search across multiple freelance platforms, all at the same time
         
         Args:
             query: Search query
             platforms: List of platforms to search (upwork, fiverr, freelancer)
             max_results_per_platform: Maximum results per platform
-            min_budget: Minimum budget filter
-            max_budget: Maximum budget filter
+            min_budget: Minimum budget filter, in USD (see within_budget)
+            max_budget: Maximum budget filter, in USD
             experience_level: Experience level filter (entry, intermediate, expert)
             project_type: Project type filter (Fixed Price, Hourly, etc.)
+            timeout: Seconds to wait for the platforms, slower ones are left out
+                and reported as errors
         
         Returns:
-            DataFrame with all gigs
+            DataFrame with all gigs, attrs["platform_errors"] has the error of each
+            platform that failed
         """
         if platforms is None:
             platforms = ["upwork", "fiverr", "freelancer"]
         
-        all_gigs = []
+        builder = GigColumns()
+        errors = {}
         
-        for platform in platforms:
-            if platform in self.searchers:
-                try:
-                    gigs = self.searchers[platform].search_gigs(query, max_results_per_platform)
-                    all_gigs.extend(gigs)
-                except Exception as e:
-                    st.warning(f"Error searching {platform}: {str(e)}")
+        selected = [platform for platform in platforms if platform in self.searchers]
+        if selected:
+            executor = ThreadPoolExecutor(max_workers=len(selected))
+            futures = {
+                executor.submit(self.searchers[platform].search_gigs, query, max_results_per_platform): platform
+                for platform in selected
+            }
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    platform = futures[future]
+                    try:
+                        builder.add(future.result())
+                    except Exception as e:
+                        logger.warning(f"Error searching {platform}: {str(e)}")
+                        errors[platform] = str(e)
+            except FuturesTimeoutError:
+                for future, platform in futures.items():
+                    if not future.done():
+                        logger.warning(f"{platform} didn't answer within {timeout}s")
+                        errors[platform] = f"timed out after {timeout}s"
+            finally:
+                # a platform that timed out keeps its thread until its request returns,
+                # the search doesn't wait for it
+                executor.shutdown(wait=False, cancel_futures=True)
         
         # Convert to DataFrame
-        if all_gigs:
-            df_data = []
-            for gig in all_gigs:
-                df_data.append({
-                    'title': gig.title,
-                    'description': gig.description,
-                    'budget_min': gig.budget_min,
-                    'budget_max': gig.budget_max,
-                    'currency': gig.currency,
-                    'skills_required': ', '.join(gig.skills_required),
-                    'client_rating': gig.client_rating,
-                    'client_reviews': gig.client_reviews,
-                    'posted_date': gig.posted_date,
-                    'project_type': gig.project_type,
-                    'experience_level': gig.experience_level,
-                    'duration': gig.duration,
-                    'url': gig.url,
-                    'platform': gig.platform,
-                    'is_remote': gig.is_remote
-                })
-            
-            df = pd.DataFrame(df_data)
+        if len(builder):
+            df = builder.to_frame()
             
             # Apply filters
-            if min_budget is not None:
-                df = df[df['budget_min'] >= min_budget]
-            
-            if max_budget is not None:
-                df = df[df['budget_max'] <= max_budget]
+            df = df[within_budget(df, min_budget, max_budget)]
             
             if experience_level:
                 df = df[df['experience_level'].str.contains(experience_level, case=False, na=False)]
             
             if project_type:
                 df = df[df['project_type'].str.contains(project_type, case=False, na=False)]
-            
-            return df
         else:
-            return pd.DataFrame()
+            df = pd.DataFrame()
+        
+        df.attrs["platform_errors"] = errors
+        return df
+
+def within_budget(gigs: pd.DataFrame,
+                  min_budget: Optional[float] = None,
+                  max_budget: Optional[float] = None) -> pd.Series:
+    """
+    Which gigs fall in a USD budget range
+    
+    Gigs without a budget (e.g. hourly posts with no range) are kept, and so are
+    budgets in other currencies: they are not converted, so they can't be compared.
+    
+    Args:
+        gigs: DataFrame of FreelanceGig rows
+        min_budget: Minimum budget, in USD
+        max_budget: Maximum budget, in USD
+    
+    Returns:
+        Boolean Series by the index of gigs
+    """
+    comparable = gigs['currency'].eq('USD')
+    mask = pd.Series(True, index=gigs.index)
+    if min_budget is not None:
+        mask &= ~comparable | (gigs['budget_min'].fillna(float('inf')) >= min_budget)
+    if max_budget is not None:
+        mask &= ~comparable | (gigs['budget_max'].fillna(0) <= max_budget)
+    return mask
 
 def get_mern_stack_search_queries() -> Dict[str, str]:
     """Get optimized search queries for MERN stack developers"""
@@ -367,7 +472,8 @@ def search_mern_freelance_gigs(query_category: str = "MERN Stack Development",
                               max_results_per_platform: int = 20,
                               min_budget: float = 0,
                               max_budget: float = 10000,
-                              experience_level: str = None) -> pd.DataFrame:
+                              experience_level: str = None,
+                              timeout: float = 30) -> pd.DataFrame:
     """
     Search for MERN stack freelance gigs
     
@@ -378,6 +484,7 @@ def search_mern_freelance_gigs(query_category: str = "MERN Stack Development",
         min_budget: Minimum budget filter
         max_budget: Maximum budget filter
         experience_level: Experience level filter
+        timeout: Seconds to wait for the platforms
     
     Returns:
         DataFrame with MERN stack gigs
@@ -395,7 +502,8 @@ def search_mern_freelance_gigs(query_category: str = "MERN Stack Development",
         max_results_per_platform=max_results_per_platform,
         min_budget=min_budget,
         max_budget=max_budget,
-        experience_level=experience_level
+        experience_level=experience_level,
+        timeout=timeout
     )
 
 # Example usage
@@ -2,26 +2,35 @@ from __future__ import annotations
 
 import re
 import json
-import requests
 import random
-import time
+import threading
 from typing import Tuple
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from glassdoor.constant import fallback_token, query_template, headers
 from glassdoor.util import (
+    csrf_tokens,
+    cursor_cache,
     get_cursor_for_page,
+    get_cursors,
+    location_ids,
     parse_compensation,
     parse_location,
 )
 from util import (
     extract_emails_from_text,
+    cookie_store,
     create_logger,
     create_session,
+    deadline_passed,
+    deadline_sleep,
     markdown_converter,
+    mostly_seen,
+    report_progress,
 )
 from exception import GlassdoorException
+from retry import get_retry_policy
 from model import (
     JobPost,
     JobResponse,
@@ -37,6 +46,14 @@ log = create_logger("Glassdoor")
 
 
 class Glassdoor(Scraper):
+    # Random user agents to appear more like a real browser
+    user_agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
+    ]
+
     def __init__(
         self, proxies: list[str] | str | None = None, ca_cert: str | None = None
     ):
@@ -49,15 +66,21 @@ class Glassdoor(Scraper):
         self.base_url = None
         self.country = None
         self.session = None
+        self.headers = headers
+        self._session_lock = threading.Lock()
+        self.detail_session = None
         self.scraper_input = None
         self.jobs_per_page = 30
+        self.num_workers = 5
         self.max_pages = 30
         self.seen_urls = set()
+        # _process_job runs in the page's worker threads
+        self._seen_lock = threading.Lock()
+        self.cursor_key = None
         # Add parameters for rate limiting
         self.min_delay = 10  # Minimum delay between requests in seconds
         self.max_delay = 15  # Maximum delay
-        self.max_retries = 3  # Number of retries for failed requests
-        self.retry_delay = 30  # Base delay before retry in seconds
+        self.retry_policy = get_retry_policy(self.site)
 
     def scrape(self, scraper_input: ScraperInput) -> JobResponse:
         """
@@ -81,27 +104,16 @@ class Glassdoor(Scraper):
             self.scraper_input.country = Country.USA
             self.base_url = self.scraper_input.country.get_glassdoor_url()
 
-        self.session = create_session(
-            proxies=self.proxies, ca_cert=self.ca_cert, has_retry=True
+        self._create_session()
+        # description fetches fan out over worker threads (and pages when fetched
+        # concurrently), size the pool so every worker keeps its connection alive
+        self.detail_session = create_session(
+            proxies=self.proxies,
+            ca_cert=self.ca_cert,
+            is_tls=False,
+            pool_size=self.num_workers * scraper_input.glassdoor_concurrent_pages,
+            site=self.site,
         )
-        
-        # Try to get CSRF token with retries
-        token = self._get_csrf_token_with_retry()
-        if token:
-            headers["gd-csrf-token"] = token
-        else:
-            headers["gd-csrf-token"] = fallback_token
-            
-        self.session.headers.update(headers)
-
-        # Add random user agent to appear more like a real browser
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"
-        ]
-        self.session.headers.update({"User-Agent": random.choice(user_agents)})
 
         location_id, location_type = self._get_location(
             scraper_input.location, scraper_input.is_remote
@@ -114,34 +126,121 @@ class Glassdoor(Scraper):
         
         job_list: list[JobPost] = []
         cursor = None
+        self.cursor_key = self._get_cursor_key(location_id, location_type)
 
         range_start = 1 + (scraper_input.offset // self.jobs_per_page)
         tot_pages = (scraper_input.results_wanted // self.jobs_per_page) + 2
         range_end = min(tot_pages, self.max_pages + 1)
-        
+
+        if scraper_input.glassdoor_concurrent_pages > 1:
+            job_list = self._scrape_pages_concurrently(
+                scraper_input, location_id, location_type, range_start, range_end
+            )
+            return JobResponse(jobs=job_list[: scraper_input.results_wanted])
+
         for page in range(range_start, range_end):
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {len(job_list)} jobs")
+                break
             log.info(f"search page: {page} / {range_end - 1}")
             
             # Add random delay between requests
             if page > range_start:
                 delay = random.uniform(self.min_delay, self.max_delay)
                 log.info(f"Waiting {delay:.2f} seconds before next request")
-                time.sleep(delay)
+                if not deadline_sleep(delay, scraper_input.deadline):
+                    break
                 
             try:
                 jobs, cursor = self._fetch_jobs_page(
-                    scraper_input, location_id, location_type, page, cursor
+                    scraper_input,
+                    location_id,
+                    location_type,
+                    page,
+                    cursor or cursor_cache.get(self.cursor_key, page),
                 )
                 job_list.extend(jobs)
+                report_progress("page", page=page, jobs=len(job_list))
                 if not jobs or len(job_list) >= scraper_input.results_wanted:
                     job_list = job_list[: scraper_input.results_wanted]
                     break
+                if mostly_seen([job.id for job in jobs], scraper_input.seen_ids):
+                    log.info("caught up with jobs seen by the previous run")
+                    break
             except Exception as e:
                 log.error(f"Glassdoor: {str(e)}")
                 # Don't break immediately, try to continue with next page
                 continue
         return JobResponse(jobs=job_list)
 
+    def _scrape_pages_concurrently(
+        self,
+        scraper_input: ScraperInput,
+        location_id: int,
+        location_type: str,
+        range_start: int,
+        range_end: int,
+    ) -> list[JobPost]:
+        """
+        Fetches pages in batches of up to glassdoor_concurrent_pages, using every
+        cursor already announced by earlier responses (or cached from earlier queries)
+        """
+        budget = scraper_input.glassdoor_concurrent_pages
+        pages_jobs: dict[int, list[JobPost]] = {}
+        job_count = 0
+        page = range_start
+        while page < range_end and job_count < scraper_input.results_wanted:
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {job_count} jobs")
+                break
+            # the next page is always fetched, the ones after it only if their cursor is known
+            batch = [page]
+            while (
+                len(batch) < budget
+                and batch[-1] + 1 < range_end
+                and cursor_cache.get(self.cursor_key, batch[-1] + 1)
+            ):
+                batch.append(batch[-1] + 1)
+
+            if page > range_start:
+                delay = random.uniform(self.min_delay, self.max_delay)
+                log.info(f"Waiting {delay:.2f} seconds before next request")
+                if not deadline_sleep(delay, scraper_input.deadline):
+                    break
+            log.info(f"search pages: {batch[0]}-{batch[-1]} / {range_end - 1}")
+
+            with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                future_to_page = {
+                    executor.submit(
+                        self._fetch_jobs_page,
+                        scraper_input,
+                        location_id,
+                        location_type,
+                        page_num,
+                        cursor_cache.get(self.cursor_key, page_num),
+                    ): page_num
+                    for page_num in batch
+                }
+                for future in as_completed(future_to_page):
+                    page_num = future_to_page[future]
+                    try:
+                        pages_jobs[page_num], _ = future.result()
+                    except Exception as e:
+                        log.error(f"Glassdoor: page {page_num}: {str(e)}")
+                        pages_jobs[page_num] = []
+
+            job_count = sum(len(pages_jobs[page_num]) for page_num in pages_jobs)
+            report_progress("page", page=batch[-1], jobs=job_count)
+            if any(not pages_jobs[page_num] for page_num in batch):
+                break
+            batch_ids = [job.id for page_num in batch for job in pages_jobs[page_num]]
+            if mostly_seen(batch_ids, scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
+            page = batch[-1] + 1
+
+        return [job for page_num in sorted(pages_jobs) for job in pages_jobs[page_num]]
+
     def _fetch_jobs_page(
         self,
         scraper_input: ScraperInput,
@@ -155,54 +254,32 @@ class Glassdoor(Scraper):
         """
         jobs = []
         self.scraper_input = scraper_input
-        
-        for retry in range(self.max_retries):
-            try:
-                payload = self._add_payload(location_id, location_type, page_num, cursor)
-                response = self.session.post(
-                    f"{self.base_url}/graph",
-                    timeout_seconds=15,
-                    data=payload,
-                )
-                
-                if response.status_code == 200:
-                    break
-                elif response.status_code == 403:
-                    log.warning(f"Glassdoor 403 Forbidden response (attempt {retry+1}/{self.max_retries})")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 1)
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                        
-                        # Refresh the session on retry
-                        self.session = create_session(
-                            proxies=self.proxies, ca_cert=self.ca_cert, has_retry=True
-                        )
-                        token = self._get_csrf_token_with_retry()
-                        if token:
-                            headers["gd-csrf-token"] = token
-                        self.session.headers.update(headers)
-                        self.session.headers.update({"User-Agent": random.choice(user_agents)})
-                    else:
-                        log.error(f"Glassdoor: bad response status code: {response.status_code}")
-                        return jobs, None
-                else:
-                    log.error(f"Glassdoor: bad response status code: {response.status_code}")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 1)
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        return jobs, None
-            except Exception as e:
-                log.error(f"Glassdoor request error: {str(e)}")
-                if retry < self.max_retries - 1:
-                    wait_time = self.retry_delay * (retry + 1)
-                    log.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                else:
-                    return jobs, None
-        
+
+        sent_with = {}
+
+        def send():
+            sent_with["session"] = session = self.session
+            return session.post(
+                f"{self.base_url}/graph",
+                timeout_seconds=15,
+                data=self._add_payload(location_id, location_type, page_num, cursor),
+            )
+
+        def refresh_on_forbidden(attempt, response):
+            if response is not None and response.status_code == 403:
+                self._refresh_session(sent_with["session"])
+
+        response = self.retry_policy.execute(
+            send,
+            on_retry=refresh_on_forbidden,
+            description=f"Glassdoor page {page_num}",
+            deadline=scraper_input.deadline,
+        )
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else "no response"
+            log.error(f"Glassdoor: bad response status code: {status}")
+            return jobs, None
+
         try:
             res_json = response.json()[0]
             if "errors" in res_json:
@@ -219,7 +296,7 @@ class Glassdoor(Scraper):
             return jobs, None
 
         # Limit concurrent workers to reduce load
-        max_workers = min(5, self.jobs_per_page)
+        max_workers = min(self.num_workers, self.jobs_per_page)
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_job_data = {
                 executor.submit(self._process_job, job): job for job in jobs_data
@@ -232,35 +309,65 @@ class Glassdoor(Scraper):
                 except Exception as exc:
                     log.error(f"Glassdoor job processing error: {exc}")
 
-        return jobs, get_cursor_for_page(
-            res_json["data"]["jobListings"]["paginationCursors"], page_num + 1
+        pagination_cursors = res_json["data"]["jobListings"]["paginationCursors"]
+        cursor_cache.update(self.cursor_key, get_cursors(pagination_cursors))
+        return jobs, get_cursor_for_page(pagination_cursors, page_num + 1)
+
+    def _refresh_session(self, blocked_session):
+        """
+        Replaces a session that got a 403 with a fresh one and token. Pages fetched
+        concurrently that were blocked on the same session share one refresh.
+        """
+        with self._session_lock:
+            if self.session is blocked_session:
+                self._create_session(refresh_token=True)
+
+    def _create_session(self, refresh_token: bool = False):
+        """
+        Starts a fresh session with a new user agent and the cached csrf token, only
+        fetching a new token when none is cached or refresh_token is set (e.g. on 403)
+        """
+        if refresh_token:
+            # blocked with the stored cookies, start over without them
+            cookie_store.clear(self.site)
+        session = create_session(
+            proxies=self.proxies,
+            ca_cert=self.ca_cert,
+            site=self.site,
+            persist_cookies=True,
         )
+        token = None if refresh_token else csrf_tokens.get(self.base_url)
+        if not token:
+            csrf_tokens.delete(self.base_url)
+            token = self._get_csrf_token_with_retry(session)
+            if token:
+                csrf_tokens.set(self.base_url, token)
+        session_headers = {**headers, "gd-csrf-token": token or fallback_token}
+        session.headers.update(session_headers)
+        session.headers.update({"User-Agent": random.choice(self.user_agents)})
+        # swapped in only once ready, pages fetched concurrently keep the old one until then
+        self.headers = session_headers
+        self.session = session
 
-    def _get_csrf_token_with_retry(self):
+    def _get_csrf_token_with_retry(self, session):
         """
         Fetches csrf token with retries
         """
-        for retry in range(self.max_retries):
-            try:
-                token = self._get_csrf_token()
-                if token:
-                    return token
-            except Exception as e:
-                log.warning(f"Error getting CSRF token (attempt {retry+1}/{self.max_retries}): {str(e)}")
-            
-            if retry < self.max_retries - 1:
-                wait_time = self.retry_delay * (retry + 1)
-                log.info(f"Waiting {wait_time} seconds before retry")
-                time.sleep(wait_time)
-        
-        log.warning("Could not get CSRF token, using fallback")
-        return None
+        token = self.retry_policy.execute(
+            lambda: self._get_csrf_token(session),
+            retry_if=lambda token: not token,
+            description="Glassdoor csrf token",
+            deadline=self.scraper_input.deadline,
+        )
+        if not token:
+            log.warning("Could not get CSRF token, using fallback")
+        return token
 
-    def _get_csrf_token(self):
+    def _get_csrf_token(self, session):
         """
         Fetches csrf token needed for API by visiting a generic page
         """
-        res = self.session.get(f"{self.base_url}/Job/computer-science-jobs.htm")
+        res = session.get(f"{self.base_url}/Job/computer-science-jobs.htm")
         pattern = r'"token":\s*"([^"]+)"'
         matches = re.findall(pattern, res.text)
         token = None
@@ -275,9 +382,10 @@ class Glassdoor(Scraper):
         try:
             job_id = job_data["jobview"]["job"]["listingId"]
             job_url = f"{self.base_url}job-listing/j?jl={job_id}"
-            if job_url in self.seen_urls:
-                return None
-            self.seen_urls.add(job_url)
+            with self._seen_lock:
+                if job_url in self.seen_urls:
+                    return None
+                self.seen_urls.add(job_url)
             job = job_data["jobview"]
             title = job["job"]["jobTitleText"]
             company_name = job["header"]["employerNameFromSearch"]
@@ -364,7 +472,7 @@ class Glassdoor(Scraper):
                 """,
             }
         ]
-        res = requests.post(url, json=body, headers=headers)
+        res = self.detail_session.post(url, json=body, headers=self.headers)
         if res.status_code != 200:
             return None
         data = res.json()[0]
@@ -376,6 +484,10 @@ class Glassdoor(Scraper):
     def _get_location(self, location: str, is_remote: bool) -> (int, str):
         if not location or is_remote:
             return "11047", "STATE"  # remote options
+        cache_key = [self.base_url, location.strip().lower()]
+        cached = location_ids.get(cache_key)
+        if cached:
+            return cached[0], cached[1]
         url = f"{self.base_url}/findPopularLocationAjax.htm?maxLocationsToReturn=10&term={location}"
         res = self.session.get(url)
         if res.status_code != 200:
@@ -399,8 +511,20 @@ class Glassdoor(Scraper):
             location_type = "STATE"
         elif location_type == "N":
             location_type = "COUNTRY"
+        location_ids.set(cache_key, [int(items[0]["locationId"]), location_type])
         return int(items[0]["locationId"]), location_type
 
+    def _get_cursor_key(self, location_id: int, location_type: str) -> str:
+        """
+        Identifies a search independently of the page being requested
+        """
+        variables = json.loads(self._add_payload(location_id, location_type, 1))[0][
+            "variables"
+        ]
+        variables.pop("pageNumber")
+        variables.pop("pageCursor")
+        return json.dumps([self.base_url, variables], sort_keys=True)
+
     def _add_payload(
         self,
         location_id: int,
@@ -1,4 +1,16 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
 from model import Compensation, CompensationInterval, Location, JobType
+from state import PersistentState
+
+# csrf token per glassdoor domain, fetching one costs a full page load
+csrf_tokens = PersistentState("glassdoor_csrf", ttl=3600)
+# location string -> (locationId, locationType) per glassdoor domain
+location_ids = PersistentState("glassdoor_locations", ttl=30 * 24 * 3600)
 
 
 def parse_compensation(data: dict) -> Compensation | None:
@@ -40,3 +52,58 @@ def get_cursor_for_page(pagination_cursors, page_num):
     for cursor_data in pagination_cursors:
         if cursor_data["pageNumber"] == page_num:
             return cursor_data["cursor"]
+
+
+def get_cursors(pagination_cursors) -> dict[int, str]:
+    """
+    Collects every page cursor Glassdoor sent back in a single response
+    :param pagination_cursors: the paginationCursors list of a JobSearchResultsQuery
+    :return: dict of page number -> cursor
+    """
+    return {
+        cursor_data["pageNumber"]: cursor_data["cursor"]
+        for cursor_data in pagination_cursors or []
+        if cursor_data.get("cursor")
+    }
+
+
+class CursorCache:
+    """
+    Process-wide store of Glassdoor page cursors, keyed by search query, so later
+    pages and repeat queries can jump straight to any page already announced
+    """
+
+    def __init__(self, ttl: int = 1800, max_queries: int = 256):
+        self.ttl = ttl
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._queries: OrderedDict[str, tuple[float, dict[int, str]]] = OrderedDict()
+
+    def get(self, query_key: str, page_num: int) -> str | None:
+        with self._lock:
+            entry = self._queries.get(query_key)
+            if not entry:
+                return None
+            stored_at, cursors = entry
+            if time.time() - stored_at > self.ttl:
+                del self._queries[query_key]
+                return None
+            return cursors.get(page_num)
+
+    def update(self, query_key: str, cursors: dict[int, str]):
+        if not cursors:
+            return
+        with self._lock:
+            entry = self._queries.pop(query_key, None)
+            known = entry[1] if entry and time.time() - entry[0] <= self.ttl else {}
+            known.update(cursors)
+            self._queries[query_key] = (time.time(), known)
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+
+
+cursor_cache = CursorCache()
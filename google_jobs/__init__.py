@@ -3,7 +3,6 @@ from __future__ import annotations
 import math
 import re
 import json
-import time
 import random
 from typing import Tuple
 from datetime import datetime, timedelta
@@ -18,8 +17,24 @@ from model import (
     Location,
     JobType,
 )
-from util import extract_emails_from_text, extract_job_type, create_session
-from google_jobs.util import log, find_job_info_initial_page, find_job_info
+from retry import get_retry_policy
+from util import (
+    extract_emails_from_text,
+    extract_job_type,
+    create_session,
+    circuit_breaker,
+    cookie_store,
+    deadline_passed,
+    deadline_sleep,
+    mostly_seen,
+    report_progress,
+)
+from google_jobs.util import (
+    log,
+    find_job_info_initial_page,
+    find_job_info,
+    pagination_state,
+)
 
 
 class Google(Scraper):
@@ -37,13 +52,13 @@ class Google(Scraper):
         self.scraper_input = None
         self.jobs_per_page = 10
         self.seen_urls = set()
+        self.seen_ids = set()
         self.url = "https://www.google.com/search"
         self.jobs_url = "https://www.google.com/async/callback:550"
         # Add a delay attribute to control time between requests
         self.min_delay = 15  # Minimum delay between requests in seconds
         self.max_delay = 30  # Maximum delay
-        self.max_retries = 3  # Number of retries for failed requests
-        self.retry_delay = 60  # Base delay before retry in seconds
+        self.retry_policy = get_retry_policy(self.site)
         
         # Additional user agents for rotation
         self.user_agents = [
@@ -64,7 +79,11 @@ class Google(Scraper):
         self.scraper_input.results_wanted = min(20, scraper_input.results_wanted)
 
         self.session = create_session(
-            proxies=self.proxies, ca_cert=self.ca_cert, is_tls=False, has_retry=True
+            proxies=self.proxies,
+            ca_cert=self.ca_cert,
+            is_tls=False,
+            site=self.site,
+            persist_cookies=True,
         )
         
         # Set a random user agent
@@ -79,46 +98,86 @@ class Google(Scraper):
             "Cache-Control": "max-age=0",
         })
         
-        forward_cursor, job_list = self._get_initial_cursor_and_jobs()
-        if forward_cursor is None:
-            log.warning(
-                "Initial cursor not found, try changing your query or there was at most 10 results"
-            )
-            return JobResponse(jobs=job_list)
+        query = self._build_query()
+        saved = pagination_state.get(query)
+        if saved and "jobs" in saved:
+            # continue from where the last call for this query stopped, the jobs it
+            # walked are kept so any offset and results_wanted can be served from them
+            log.info(f"resuming from saved cursor after {len(saved['jobs'])} jobs")
+            forward_cursor = saved["cursor"]
+            job_list = [JobPost.model_validate(job) for job in saved["jobs"]]
+            self.seen_ids = set(saved["seen_ids"])
+            resumed = True
+        else:
+            forward_cursor, job_list = self._get_initial_cursor_and_jobs(query)
+            resumed = False
+            if forward_cursor is None:
+                log.warning(
+                    "Initial cursor not found, try changing your query or there was at most 10 results"
+                )
+                return JobResponse(jobs=job_list)
 
         page = 1
 
         while (
-            len(self.seen_urls) < scraper_input.results_wanted + scraper_input.offset
+            len(job_list) < scraper_input.results_wanted + scraper_input.offset
             and forward_cursor
             and page < 3  # Limit to 3 pages to reduce likelihood of getting blocked
         ):
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {len(job_list)} jobs")
+                break
             log.info(
                 f"search page: {page} / {math.ceil(scraper_input.results_wanted / self.jobs_per_page)}"
             )
             try:
                 # Add a substantial delay between requests to avoid being rate-limited
-                delay = random.uniform(self.min_delay, self.max_delay)
-                log.info(f"Waiting {delay:.2f} seconds before next request")
-                time.sleep(delay)
-                jobs, forward_cursor = self._get_jobs_next_page(forward_cursor)
+                if page > 1 or not resumed:
+                    delay = random.uniform(self.min_delay, self.max_delay)
+                    log.info(f"Waiting {delay:.2f} seconds before next request")
+                    if not deadline_sleep(delay, scraper_input.deadline):
+                        break
+                jobs, next_cursor = self._get_jobs_next_page(forward_cursor)
             except Exception as e:
                 log.error(f"failed to get jobs on page: {page}, {e}")
                 break
             if not jobs:
                 log.info(f"found no jobs on page: {page}")
                 break
+            forward_cursor = next_cursor
             job_list += jobs
+            report_progress("page", page=page, jobs=len(job_list))
             page += 1
-        return JobResponse(
-            jobs=job_list[
-                scraper_input.offset : scraper_input.offset
-                + scraper_input.results_wanted
-            ]
+            if mostly_seen([job.id for job in jobs], scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
+
+        self._save_pagination_state(query, forward_cursor, job_list)
+        start = scraper_input.offset
+        return JobResponse(jobs=job_list[start : start + scraper_input.results_wanted])
+
+    def _save_pagination_state(
+        self, query: str, forward_cursor: str | None, job_list: list[JobPost]
+    ):
+        """
+        Keeps the forward cursor, the jobs walked so far and the seen job ids so a later
+        call for the same query needing more jobs (a larger offset or results_wanted)
+        continues from here instead of re-walking from page one
+        """
+        if not forward_cursor:
+            pagination_state.delete(query)
+            return
+        pagination_state.set(
+            query,
+            {
+                "cursor": forward_cursor,
+                "seen_ids": sorted(self.seen_ids),
+                "jobs": [job.model_dump(mode="json") for job in job_list],
+            },
         )
 
-    def _get_initial_cursor_and_jobs(self) -> Tuple[str, list[JobPost]]:
-        """Gets initial cursor and jobs to paginate through job listings"""
+    def _build_query(self) -> str:
+        """Builds the search query from scraper_input"""
         query = f"{self.scraper_input.search_term} jobs"
 
         def get_time_range(hours_old):
@@ -153,60 +212,53 @@ class Google(Scraper):
 
         if self.scraper_input.google_search_term:
             query = self.scraper_input.google_search_term
+        return query
 
+    def _get_initial_cursor_and_jobs(self, query: str) -> Tuple[str, list[JobPost]]:
+        """Gets initial cursor and jobs to paginate through job listings"""
         params = {"q": query, "udm": "8"}
-        
-        for retry in range(self.max_retries):
-            try:
-                # Update user agent on each retry
-                headers = headers_initial.copy()
-                headers["User-Agent"] = random.choice(self.user_agents)
-                self.session.headers.update(headers)
-                
-                log.info(f"Making initial Google request (attempt {retry+1}/{self.max_retries})")
-                response = self.session.get(self.url, params=params)
-                
-                if response.status_code == 200:
-                    break
-                elif response.status_code == 429:
-                    log.warning(f"Google rate-limited request (attempt {retry+1}/{self.max_retries})")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 2)  # Increase delay with each retry
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                        
-                        # Try to create a new session
-                        self.session = create_session(
-                            proxies=self.proxies, ca_cert=self.ca_cert, is_tls=False, has_retry=True,
-                            clear_cookies=True
-                        )
-                    else:
-                        log.error("Google has rate-limited your request (429 status code). Try again later or use a proxy.")
-                        return None, []
-                else:
-                    log.warning(f"Google returned status code {response.status_code}")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 1)
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        log.error(f"Error making initial request: HTTP status code {response.status_code}")
-                        return None, []
-            except Exception as e:
-                log.error(f"Error making initial request: {e}")
-                if retry < self.max_retries - 1:
-                    wait_time = self.retry_delay * (retry + 1)
-                    log.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                else:
-                    return None, []
-            
+
+        def send():
+            # Update user agent on each attempt
+            headers = headers_initial.copy()
+            headers["User-Agent"] = random.choice(self.user_agents)
+            self.session.headers.update(headers)
+            return self.session.get(self.url, params=params)
+
+        def new_session_if_limited(attempt, response):
+            if response is not None and response.status_code == 429:
+                # the stored cookies got us rate-limited, start over without them
+                cookie_store.clear(self.site)
+                self.session = create_session(
+                    proxies=self.proxies,
+                    ca_cert=self.ca_cert,
+                    is_tls=False,
+                    clear_cookies=True,
+                    site=self.site,
+                )
+
+        response = self.retry_policy.execute(
+            send,
+            on_retry=new_session_if_limited,
+            description="Google initial request",
+            deadline=self.scraper_input.deadline,
+        )
+        if response is None:
+            return None, []
+        if response.status_code == 429:
+            log.error("Google has rate-limited your request (429 status code). Try again later or use a proxy.")
+            return None, []
+        if response.status_code != 200:
+            log.error(f"Error making initial request: HTTP status code {response.status_code}")
+            return None, []
+
         pattern_fc = r'<div jsname="Yust4d"[^>]+data-async-fc="([^"]+)"'
         match_fc = re.search(pattern_fc, response.text)
         data_async_fc = match_fc.group(1) if match_fc else None
         
         # If we couldn't find a cursor and the response contains "sorry"
         if not data_async_fc and "sorry" in response.text.lower():
+            circuit_breaker.record_failure(self.site, self.proxies, captcha=True)
             log.error("Google detected unusual traffic from your computer network. Try again later or with a different IP.")
             return None, []
         
@@ -220,46 +272,28 @@ class Google(Scraper):
 
     def _get_jobs_next_page(self, forward_cursor: str) -> Tuple[list[JobPost], str]:
         params = {"fc": [forward_cursor], "fcv": ["3"], "async": [async_param]}
-        
-        for retry in range(self.max_retries):
-            try:
-                # Update user agent on each retry
-                headers = headers_jobs.copy()
-                headers["User-Agent"] = random.choice(self.user_agents)
-                self.session.headers.update(headers)
-                
-                log.info(f"Making Google pagination request (attempt {retry+1}/{self.max_retries})")
-                response = self.session.get(self.jobs_url, headers=headers_jobs, params=params)
-                
-                if response.status_code == 200:
-                    break
-                elif response.status_code == 429:
-                    log.warning(f"Google rate-limited pagination request (attempt {retry+1}/{self.max_retries})")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 2)  # Increase delay with each retry
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        log.error("Google has rate-limited pagination request. Try again later or use a proxy.")
-                        return [], None
-                else:
-                    log.warning(f"Google pagination returned status code {response.status_code}")
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 1)
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        log.error(f"Error making pagination request: HTTP status code {response.status_code}")
-                        return [], None
-            except Exception as e:
-                log.error(f"Error making pagination request: {e}")
-                if retry < self.max_retries - 1:
-                    wait_time = self.retry_delay * (retry + 1)
-                    log.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                else:
-                    return [], None
-        
+
+        def send():
+            # Update user agent on each attempt
+            headers = headers_jobs.copy()
+            headers["User-Agent"] = random.choice(self.user_agents)
+            self.session.headers.update(headers)
+            return self.session.get(self.jobs_url, headers=headers_jobs, params=params)
+
+        response = self.retry_policy.execute(
+            send,
+            description="Google pagination request",
+            deadline=self.scraper_input.deadline,
+        )
+        if response is None:
+            return [], None
+        if response.status_code == 429:
+            log.error("Google has rate-limited pagination request. Try again later or use a proxy.")
+            return [], None
+        if response.status_code != 200:
+            log.error(f"Error making pagination request: HTTP status code {response.status_code}")
+            return [], None
+
         return self._parse_jobs(response.text)
 
     def _parse_jobs(self, job_data: str) -> Tuple[list[JobPost], str]:
@@ -305,9 +339,11 @@ class Google(Scraper):
                 return None
                 
             job_url = job_info[3][0][0] if job_info[3] and job_info[3][0] else None
-            if not job_url or job_url in self.seen_urls:
+            job_id = f"go-{job_info[28]}"
+            if not job_url or job_url in self.seen_urls or job_id in self.seen_ids:
                 return None
             self.seen_urls.add(job_url)
+            self.seen_ids.add(job_id)
 
             title = job_info[0]
             company_name = job_info[1]
@@ -325,7 +361,7 @@ class Google(Scraper):
             description = job_info[19] if len(job_info) > 19 else ""
 
             job_post = JobPost(
-                id=f"go-{job_info[28]}",
+                id=job_id,
                 title=title,
                 company_name=company_name,
                 location=Location(
@@ -1,9 +1,13 @@
 import re
 
+from state import PersistentState
 from util import create_logger
 
 log = create_logger("Google")
 
+# forward cursor and seen job ids per query, Google cursors go stale after a while
+pagination_state = PersistentState("google_pagination", ttl=3600)
+
 
 def find_job_info(jobs_data: list | dict) -> list | None:
     """Iterates through the JSON data to find the job listings"""
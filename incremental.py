@@ -0,0 +1,99 @@
+"""
+Watermarks for incremental scrape_jobs runs: the ids already seen for a query on each
+site and when it was last scraped successfully, persisted between runs so scrapers
+can stop paging once they reach postings they have returned before.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+from model import ScraperInput, Site
+from state import PersistentState, canonical_key
+
+watermarks = PersistentState("watermarks", ttl=30 * 24 * 3600)
+
+# ids remembered per query and site, newest first
+max_seen_ids = 5000
+
+
+def query_key(scraper_input: ScraperInput, site: Site) -> str:
+    """
+    Identifies a search on a site independently of results_wanted/offset
+    """
+    return canonical_key(
+        site.value,
+        scraper_input.search_term,
+        scraper_input.google_search_term,
+        scraper_input.location,
+        scraper_input.distance,
+        scraper_input.is_remote,
+        scraper_input.job_type.name if scraper_input.job_type else None,
+        scraper_input.easy_apply,
+        scraper_input.country.name if scraper_input.country else None,
+        scraper_input.linkedin_company_ids,
+    )
+
+
+def load_watermark(
+    scraper_input: ScraperInput, sites: list[Site]
+) -> tuple[set[str], float | None]:
+    """
+    :return: ids seen by earlier runs on any of sites, and the oldest of their last
+        successful runs (None if any site has never run)
+    """
+    seen_ids: set[str] = set()
+    last_runs = []
+    for site in sites:
+        watermark = watermarks.get(query_key(scraper_input, site))
+        if watermark is None:
+            last_runs.append(None)
+            continue
+        seen_ids.update(watermark["seen_ids"])
+        last_runs.append(watermark["last_run"])
+    if not last_runs or None in last_runs:
+        return seen_ids, None
+    return seen_ids, min(last_runs)
+
+
+def save_watermark(scraper_input: ScraperInput, site: Site, job_ids: list[str]):
+    """
+    Records a successful run of the query on site that returned job_ids
+    """
+    key = query_key(scraper_input, site)
+    previous = watermarks.get(key, {"seen_ids": []})["seen_ids"]
+    new_ids = list(dict.fromkeys(job_ids))
+    known = set(new_ids)
+    seen_ids = new_ids + [job_id for job_id in previous if job_id not in known]
+    watermarks.set(key, {"seen_ids": seen_ids[:max_seen_ids], "last_run": time.time()})
+
+
+def hours_since(last_run: float) -> int:
+    """
+    hours_old covering everything posted since last_run, with an hour of margin
+    """
+    return max(math.ceil((time.time() - last_run) / 3600) + 1, 1)
+
+
+# filters a site drops once hours_old is set (its search takes one or the other), an
+# incremental run with any of them set relies on the seen ids alone on that site
+date_filter_conflicts = {
+    Site.INDEED: ("job_type", "is_remote", "easy_apply"),
+    Site.LINKEDIN: ("easy_apply",),
+}
+
+
+def incremental_hours_old(
+    scraper_input: ScraperInput, site: Site, last_run: float | None
+) -> int | None:
+    """
+    hours_old limiting an incremental run on site to postings since last_run, None
+    when there was no earlier run or the site can't combine it with the filters asked for
+    """
+    if last_run is None:
+        return None
+    conflicts = date_filter_conflicts.get(site, ())
+    if any(getattr(scraper_input, field) for field in conflicts):
+        return None
+    return hours_since(last_run)
@@ -21,6 +21,9 @@ from util import (
     markdown_converter,
     create_session,
     create_logger,
+    deadline_passed,
+    mostly_seen,
+    report_progress,
 )
 
 log = create_logger("Indeed")
@@ -36,7 +39,7 @@ class Indeed(Scraper):
         super().__init__(Site.INDEED, proxies=proxies)
 
         self.session = create_session(
-            proxies=self.proxies, ca_cert=ca_cert, is_tls=False
+            proxies=self.proxies, ca_cert=ca_cert, is_tls=False, site=self.site
         )
         self.scraper_input = None
         self.jobs_per_page = 100
@@ -64,6 +67,9 @@ class Indeed(Scraper):
         cursor = None
 
         while len(self.seen_urls) < scraper_input.results_wanted + scraper_input.offset:
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {len(job_list)} jobs")
+                break
             log.info(
                 f"search page: {page} / {math.ceil(scraper_input.results_wanted / self.jobs_per_page)}"
             )
@@ -72,7 +78,11 @@ class Indeed(Scraper):
                 log.info(f"found no jobs on page: {page}")
                 break
             job_list += jobs
+            report_progress("page", page=page, jobs=len(job_list))
             page += 1
+            if mostly_seen([job.id for job in jobs], scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
         return JobResponse(
             jobs=job_list[
                 scraper_input.offset : scraper_input.offset
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import math
 import random
-import time
 from datetime import datetime
 from typing import Optional
 from urllib.parse import urlparse, urlunparse, unquote
@@ -31,6 +30,7 @@ from model import (
     ScraperInput,
     Site,
 )
+from retry import get_retry_policy
 from util import (
     extract_emails_from_text,
     currency_parser,
@@ -38,6 +38,10 @@ from util import (
     create_session,
     remove_attributes,
     create_logger,
+    deadline_passed,
+    deadline_sleep,
+    mostly_seen,
+    report_progress,
 )
 
 log = create_logger("LinkedIn")
@@ -60,11 +64,11 @@ class LinkedIn(Scraper):
             proxies=self.proxies,
             ca_cert=ca_cert,
             is_tls=False,
-            has_retry=True,
-            delay=5,
-            clear_cookies=True,
+            persist_cookies=True,
+            site=self.site,
         )
         self.session.headers.update(headers)
+        self.retry_policy = get_retry_policy(self.site)
         self.scraper_input = None
         self.country = "worldwide"
         self.job_url_direct_regex = re.compile(r'(?<=\?url=)[^"]+')
@@ -84,7 +88,9 @@ class LinkedIn(Scraper):
             scraper_input.hours_old * 3600 if scraper_input.hours_old else None
         )
         continue_search = (
-            lambda: len(job_list) < scraper_input.results_wanted and start < 1000
+            lambda: len(job_list) < scraper_input.results_wanted
+            and start < 1000
+            and not deadline_passed(scraper_input.deadline)
         )
         while continue_search():
             request_count += 1
@@ -114,27 +120,25 @@ class LinkedIn(Scraper):
                 params["f_TPR"] = f"r{seconds_old}"
 
             params = {k: v for k, v in params.items() if v is not None}
-            try:
-                response = self.session.get(
+            response = self.retry_policy.execute(
+                lambda: self.session.get(
                     f"{self.base_url}/jobs-guest/jobs/api/seeMoreJobPostings/search?",
                     params=params,
                     timeout=10,
-                )
-                if response.status_code not in range(200, 400):
-                    if response.status_code == 429:
-                        err = (
-                            f"429 Response - Blocked by LinkedIn for too many requests"
-                        )
-                    else:
-                        err = f"LinkedIn response status code {response.status_code}"
-                        err += f" - {response.text}"
-                    log.error(err)
-                    return JobResponse(jobs=job_list)
-            except Exception as e:
-                if "Proxy responded with" in str(e):
-                    log.error(f"LinkedIn: Bad proxy")
+                ),
+                description=f"LinkedIn search page {request_count}",
+                deadline=scraper_input.deadline,
+            )
+            if response is None:
+                log.error("LinkedIn: search request failed")
+                return JobResponse(jobs=job_list)
+            if response.status_code not in range(200, 400):
+                if response.status_code == 429:
+                    err = f"429 Response - Blocked by LinkedIn for too many requests"
                 else:
-                    log.error(f"LinkedIn: {str(e)}")
+                    err = f"LinkedIn response status code {response.status_code}"
+                    err += f" - {response.text}"
+                log.error(err)
                 return JobResponse(jobs=job_list)
 
             soup = BeautifulSoup(response.text, "html.parser")
@@ -142,11 +146,13 @@ class LinkedIn(Scraper):
             if len(job_cards) == 0:
                 return JobResponse(jobs=job_list)
 
+            page_ids = []
             for job_card in job_cards:
                 href_tag = job_card.find("a", class_="base-card__full-link")
                 if href_tag and "href" in href_tag.attrs:
                     href = href_tag.attrs["href"].split("?")[0]
                     job_id = href.split("-")[-1]
+                    page_ids.append(f"li-{job_id}")
 
                     if job_id in seen_ids:
                         continue
@@ -162,8 +168,15 @@ class LinkedIn(Scraper):
                     except Exception as e:
                         raise LinkedInException(str(e))
 
+            report_progress("page", page=request_count, jobs=len(job_list))
+            if mostly_seen(page_ids, scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
             if continue_search():
-                time.sleep(random.uniform(self.delay, self.delay + self.band_delay))
+                deadline_sleep(
+                    random.uniform(self.delay, self.delay + self.band_delay),
+                    scraper_input.deadline,
+                )
                 start += len(job_list)
 
         job_list = job_list[: scraper_input.results_wanted]
@@ -247,10 +260,12 @@ class LinkedIn(Scraper):
         :param job_page_url:
         :return: dict
         """
+        response = self.retry_policy.execute(
+            lambda: self.session.get(f"{self.base_url}/jobs/view/{job_id}", timeout=5),
+            description=f"LinkedIn job {job_id}",
+            deadline=self.scraper_input.deadline,
+        )
         try:
-            response = self.session.get(
-                f"{self.base_url}/jobs/view/{job_id}", timeout=5
-            )
             response.raise_for_status()
         except:
             return {}
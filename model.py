@@ -312,10 +312,15 @@ class ScraperInput(BaseModel):
     offset: int = 0
     linkedin_fetch_description: bool = False
     linkedin_company_ids: list[int] | None = None
+    glassdoor_concurrent_pages: int = 1
     description_format: DescriptionFormat | None = DescriptionFormat.MARKDOWN
 
     results_wanted: int = 15
     hours_old: int | None = None
+    # time.monotonic() value after which scrapers stop and return what they have
+    deadline: float | None = None
+    # ids returned by earlier incremental runs, pagination stops once a page is mostly these
+    seen_ids: set[str] | None = None
 
 
 class Scraper(ABC):
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import math
 import random
-import time
 from datetime import datetime, date, timedelta
 from typing import Optional
 
@@ -27,12 +26,17 @@ from model import (
     ScraperInput,
     Site,
 )
+from retry import get_retry_policy
 from util import (
     extract_emails_from_text,
     currency_parser,
     markdown_converter,
     create_session,
     create_logger,
+    deadline_passed,
+    deadline_sleep,
+    mostly_seen,
+    report_progress,
 )
 
 log = create_logger("Naukri")
@@ -54,11 +58,11 @@ class Naukri(Scraper):
             proxies=self.proxies,
             ca_cert=ca_cert,
             is_tls=False,
-            has_retry=True,
-            delay=5,
-            clear_cookies=True,
+            persist_cookies=True,
+            site=self.site,
         )
         self.session.headers.update(naukri_headers)
+        self.retry_policy = get_retry_policy(self.site)
         self.scraper_input = None
         self.country = "India"  #naukri is india-focused by default
         log.info("Naukri scraper initialized")
@@ -79,7 +83,9 @@ class Naukri(Scraper):
             scraper_input.hours_old * 3600 if scraper_input.hours_old else None
         )
         continue_search = (
-            lambda: len(job_list) < scraper_input.results_wanted and page <= 50  # Arbitrary limit
+            lambda: len(job_list) < scraper_input.results_wanted
+            and page <= 50  # Arbitrary limit
+            and not deadline_passed(scraper_input.deadline)
         )
 
         while continue_search():
@@ -107,7 +113,14 @@ class Naukri(Scraper):
             params = {k: v for k, v in params.items() if v is not None}
             try:
                 log.debug(f"Sending request to {self.base_url} with params: {params}")
-                response = self.session.get(self.base_url, params=params, timeout=10)
+                response = self.retry_policy.execute(
+                    lambda: self.session.get(self.base_url, params=params, timeout=10),
+                    description=f"Naukri search page {page}",
+                    deadline=scraper_input.deadline,
+                )
+                if response is None:
+                    log.error("Naukri API request failed")
+                    return JobResponse(jobs=job_list)
                 if response.status_code not in range(200, 400):
                     err = f"Naukri API response status code {response.status_code} - {response.text}"
                     log.error(err)
@@ -141,8 +154,16 @@ class Naukri(Scraper):
                     log.error(f"Error processing job ID {job_id}: {str(e)}")
                     raise NaukriException(str(e))
 
+            report_progress("page", page=page, jobs=len(job_list))
+            page_ids = [f"nk-{job.get('jobId')}" for job in job_details if job.get("jobId")]
+            if mostly_seen(page_ids, scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
             if continue_search():
-                time.sleep(random.uniform(self.delay, self.delay + self.band_delay))
+                deadline_sleep(
+                    random.uniform(self.delay, self.delay + self.band_delay),
+                    scraper_input.deadline,
+                )
                 page += 1
 
         job_list = job_list[:scraper_input.results_wanted]
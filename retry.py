@@ -0,0 +1,205 @@
+"""
+One retry/backoff policy shared by every scraper: exponential backoff with jitter,
+Retry-After support and a cap on the total time a single call may spend waiting.
+Policies are configured per site, see get_retry_policy / set_retry_policy.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+from model import Site
+from util import create_logger, report_progress
+
+log = create_logger("Retry")
+
+# wait budget left to the execute() call running on this thread, so retries started
+# from its on_retry (e.g. fetching a fresh token) wait out of the same budget
+_wait_budget = threading.local()
+
+
+def parse_retry_after(response: Any) -> float | None:
+    """
+    Seconds to wait according to a response's Retry-After header (delta-seconds or HTTP-date)
+    """
+    headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 2,
+        max_delay: float = 60,
+        max_total_wait: float = 120,
+        retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504),
+        jitter: bool = True,
+    ):
+        """
+        :param max_attempts: attempts per call, including the first one
+        :param base_delay: delay before the first retry, doubled for every following one
+        :param max_delay: upper bound of a computed backoff (Retry-After may ask for more)
+        :param max_total_wait: a call gives up instead of sleeping past this many seconds in total
+        :param retry_statuses: response status codes worth another attempt
+        :param jitter: randomize each backoff between half and all of its value
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_total_wait = max_total_wait
+        self.retry_statuses = retry_statuses
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "wait_seconds": 0.0, "gave_up": 0}
+
+    def should_retry(self, response: Any) -> bool:
+        return getattr(response, "status_code", None) in self.retry_statuses
+
+    def backoff(self, attempt: int, response: Any = None) -> float:
+        """
+        Seconds to wait before retry number attempt + 1, Retry-After wins when present
+        """
+        retry_after = parse_retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(delay / 2, delay) if self.jitter else delay
+
+    def execute(
+        self,
+        send: Callable[[], Any],
+        retry_if: Callable[[Any], bool] | None = None,
+        on_retry: Callable[[int, Any], None] | None = None,
+        description: str = "request",
+        deadline: float | None = None,
+    ) -> Any:
+        """
+        Calls send until it returns something retry_if accepts (by default a response
+        whose status is not in retry_statuses), attempts run out or the next backoff
+        would exceed max_total_wait or the deadline. Retries made by on_retry count
+        against the same max_total_wait.
+        :param send: performs one attempt
+        :param retry_if: decides whether a result deserves another attempt
+        :param on_retry: called with (attempt, last result) before every retry, e.g. to refresh a session
+        :param description: used in log messages
+        :param deadline: time.monotonic() value no retry may wait past
+        :return: the last result, None if the last attempt raised
+        """
+        retry_if = retry_if or self.should_retry
+        outer_remaining = getattr(_wait_budget, "remaining", None)
+        budget = self.max_total_wait
+        if outer_remaining is not None:
+            budget = min(budget, outer_remaining)
+        waited = 0.0
+        result = None
+        self._record(calls=1)
+        try:
+            for attempt in range(self.max_attempts):
+                try:
+                    result = send()
+                    if not retry_if(result):
+                        return result
+                    status = getattr(result, "status_code", None)
+                    log.warning(
+                        f"{description}: attempt {attempt + 1}/{self.max_attempts} failed"
+                        + (f" with status code {status}" if status else "")
+                    )
+                except Exception as e:
+                    result = None
+                    log.warning(
+                        f"{description}: attempt {attempt + 1}/{self.max_attempts} failed: {e}"
+                    )
+                if attempt == self.max_attempts - 1:
+                    break
+                delay = self.backoff(attempt, result)
+                if waited + delay > budget:
+                    log.warning(
+                        f"{description}: giving up, retrying would exceed {budget:.0f}s of waiting"
+                    )
+                    break
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    log.warning(
+                        f"{description}: giving up, retrying would pass the deadline"
+                    )
+                    break
+                log.info(f"{description}: waiting {delay:.2f} seconds before retry")
+                report_progress(
+                    "retrying", attempt=attempt + 1, seconds=round(delay, 1)
+                )
+                time.sleep(delay)
+                waited += delay
+                self._record(retries=1, wait_seconds=delay)
+                if on_retry:
+                    _wait_budget.remaining = budget - waited
+                    try:
+                        on_retry(attempt, result)
+                    finally:
+                        waited = budget - _wait_budget.remaining
+                        _wait_budget.remaining = outer_remaining
+            self._record(gave_up=1)
+            return result
+        finally:
+            if outer_remaining is not None:
+                _wait_budget.remaining = outer_remaining - waited
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+
+retry_policies: dict[Site, RetryPolicy] = {
+    Site.GLASSDOOR: RetryPolicy(
+        base_delay=10,
+        max_delay=60,
+        max_total_wait=90,
+        retry_statuses=(403, 429, 500, 502, 503, 504),
+    ),
+    Site.GOOGLE: RetryPolicy(base_delay=20, max_delay=90, max_total_wait=150),
+    Site.ZIP_RECRUITER: RetryPolicy(base_delay=10, max_delay=60, max_total_wait=90),
+    Site.BAYT: RetryPolicy(
+        base_delay=10,
+        max_delay=45,
+        max_total_wait=60,
+        retry_statuses=(403, 429, 500, 502, 503, 504),
+    ),
+    Site.LINKEDIN: RetryPolicy(base_delay=5, max_delay=30, max_total_wait=60),
+    Site.NAUKRI: RetryPolicy(base_delay=5, max_delay=30, max_total_wait=60),
+}
+
+
+def get_retry_policy(site: Site) -> RetryPolicy:
+    return retry_policies.setdefault(site, RetryPolicy())
+
+
+def set_retry_policy(site: Site, policy: RetryPolicy):
+    retry_policies[site] = policy
+
+
+def retry_stats() -> dict[str, dict]:
+    """
+    Retries and time spent waiting so far, per site
+    """
+    return {site.value: policy.stats() for site, policy in retry_policies.items()}
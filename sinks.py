@@ -0,0 +1,178 @@
+"""
+Sinks scrape_jobs(sink=...) writes rows to as each site finishes, instead of holding
+every job in one DataFrame. Rows are buffered and flushed every buffer_size rows, so
+memory stays bounded by the buffer however many jobs a run returns. Every sink writes
+the desired_order columns, in that order, whatever the site.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import pandas as pd
+
+from export import (
+    bool_columns,
+    category_columns,
+    date_columns,
+    float_columns,
+    int_columns,
+    json_value,
+    to_typed_frame,
+)
+from util import desired_order
+
+
+class Sink:
+    def __init__(self, path: str, buffer_size: int = 1000):
+        """
+        :param path: file to write, replaced if it exists
+        :param buffer_size: rows kept in memory before they are written out
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        self.path = path
+        self.buffer_size = buffer_size
+        self.rows_written = 0
+        self._buffer: list[dict] = []
+        self._closed = False
+
+    def write(self, row: dict):
+        """
+        Buffers one scrape_jobs row, missing columns are written empty
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self._write_rows(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._close()
+        self._closed = True
+
+    def _write_rows(self, rows: list[dict]):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(Sink):
+    """
+    Same quoting as the apps' CSV downloads, header written once
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1000):
+        super().__init__(path, buffer_size)
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._header = True
+
+    def _write_rows(self, rows: list[dict]):
+        pd.DataFrame(rows, columns=desired_order).to_csv(
+            self._file,
+            header=self._header,
+            index=False,
+            quoting=csv.QUOTE_NONNUMERIC,
+            escapechar="\\",
+        )
+        self._header = False
+
+    def _close(self):
+        if self._header:
+            # no jobs, still leave a readable file behind
+            self._write_rows([])
+        self._file.close()
+
+
+class JsonlSink(Sink):
+    """
+    One JSON object per line, dates as ISO strings
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1000):
+        super().__init__(path, buffer_size)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write_rows(self, rows: list[dict]):
+        self._file.writelines(
+            json.dumps(
+                {column: json_value(row.get(column)) for column in desired_order},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for row in rows
+        )
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet with the same column types as export_parquet, every flush is one row
+    group. Needs pyarrow.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 10000, compression: str = "zstd"):
+        """
+        :param buffer_size: rows per row group
+        :param compression: parquet codec, zstd by default
+        """
+        import pyarrow.parquet as pq
+
+        super().__init__(path, buffer_size)
+        self.schema = parquet_schema()
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def _write_rows(self, rows: list[dict]):
+        import pyarrow as pa
+
+        typed = to_typed_frame(pd.DataFrame(rows, columns=desired_order))
+        table = pa.Table.from_pandas(typed, preserve_index=False)
+        self._writer.write_table(table.cast(self.schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+def parquet_schema():
+    """
+    Arrow schema of the desired_order columns, as to_typed_frame types them
+    """
+    import pyarrow as pa
+
+    fields = []
+    for column in desired_order:
+        if column in date_columns:
+            column_type = pa.timestamp("ns")
+        elif column in float_columns:
+            column_type = pa.float64()
+        elif column in int_columns:
+            column_type = pa.int64()
+        elif column in bool_columns:
+            column_type = pa.bool_()
+        elif column in category_columns:
+            column_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            column_type = pa.string()
+        fields.append(pa.field(column, column_type))
+    return pa.schema(fields)
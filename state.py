@@ -0,0 +1,118 @@
+"""
+Small JSON-backed key/value state that survives across runs (pagination cursors,
+caches, watermarks). Each named state lives in its own file under the cache
+directory, which defaults to ./.cache and can be moved with UNIFIEDGIGS_CACHE_DIR.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any
+
+
+def get_cache_dir() -> str:
+    return os.environ.get("UNIFIEDGIGS_CACHE_DIR", ".cache")
+
+
+def canonical_key(*parts: Any) -> str:
+    """
+    Hashes any JSON-serializable parts into a stable key, independent of dict ordering
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+class PersistentState:
+    def __init__(
+        self, name: str, ttl: float | None = None, directory: str | None = None
+    ):
+        """
+        :param name: file name (without extension) of this state
+        :param ttl: seconds after which an entry is treated as missing, None to keep forever
+        :param directory: where to store the file, defaults to get_cache_dir()
+        """
+        self.name = name
+        self.ttl = ttl
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] | None = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory or get_cache_dir(), f"{self.name}.json")
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._load().get(self._key(key))
+            if entry is None or self._is_expired(entry):
+                return default
+            return entry["value"]
+
+    def set(self, key: Any, value: Any):
+        with self._lock:
+            self._load()[self._key(key)] = {"timestamp": time.time(), "value": value}
+            self._save()
+
+    def update(self, values: dict[Any, Any]):
+        """
+        Sets several entries with a single write of the file
+        """
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            for key, value in values.items():
+                entries[self._key(key)] = {"timestamp": now, "value": value}
+            self._save()
+
+    def delete(self, key: Any):
+        with self._lock:
+            if self._load().pop(self._key(key), None) is not None:
+                self._save()
+
+    def items(self) -> list[tuple[str, Any]]:
+        with self._lock:
+            return [
+                (key, entry["value"])
+                for key, entry in self._load().items()
+                if not self._is_expired(entry)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    @staticmethod
+    def _key(key: Any) -> str:
+        return key if isinstance(key, str) else canonical_key(key)
+
+    def _is_expired(self, entry: dict) -> bool:
+        return self.ttl is not None and time.time() - entry["timestamp"] > self.ttl
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        # drop expired entries and write atomically so a crash never leaves half a file
+        self._entries = {
+            k: v for k, v in self._entries.items() if not self._is_expired(v)
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # state is an optimisation, never fail a scrape because it can't be written
+            pass
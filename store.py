@@ -0,0 +1,355 @@
+"""
+Local SQLite history of scraped jobs. Every scrape_jobs(store=...) call upserts its
+results by the site-prefixed job id, keeping when a job was first and last seen, so
+"what's new since yesterday" is an indexed query instead of re-reading old CSVs.
+Titles, companies, descriptions and skills are also kept in an FTS5 full-text index.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+
+import pandas as pd
+
+from util import desired_order, strip_markdown_formatting
+
+# columns holding numbers, everything else is stored as text
+real_columns = {"min_amount", "max_amount", "company_rating"}
+integer_columns = {"company_reviews_count", "vacancy_count", "is_remote"}
+
+indexes = {
+    "idx_jobs_site_date": "site, date_posted",
+    "idx_jobs_date": "date_posted",
+    "idx_jobs_company": "company",
+    "idx_jobs_min_amount": "min_amount",
+    "idx_jobs_max_amount": "max_amount",
+    "idx_jobs_first_seen": "first_seen",
+    "idx_jobs_site_first_seen": "site, first_seen",
+    "idx_jobs_last_seen": "last_seen",
+}
+
+sortable_columns = {
+    "date_posted",
+    "first_seen",
+    "last_seen",
+    "min_amount",
+    "max_amount",
+}
+
+search_columns = ["title", "company", "description", "skills"]
+# bm25 weight of each search column, a hit in the title counts the most
+search_weights = (10.0, 5.0, 1.0, 3.0)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _to_timestamp(value: datetime | date | str) -> str:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d 00:00:00")
+    return value
+
+
+def _match_expression(text: str) -> str:
+    """
+    Plain keywords as an FTS5 query: every word must match, quoted so terms like
+    node.js, c++ or full-stack don't trip the query syntax
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _to_sql(column: str, value):
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if column in real_columns:
+        return float(value)
+    if column in integer_columns:
+        return int(value)
+    if column == "date_posted" and isinstance(value, datetime):
+        # pd.Timestamp included, stored as YYYY-MM-DD like every other posting date
+        value = value.date()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class JobStore:
+    def __init__(self, path: str = "jobs.db"):
+        """
+        :param path: SQLite database file, created on first use
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        columns = ", ".join(
+            f"{column} {self._column_type(column)}"
+            for column in desired_order
+            if column != "id"
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, {columns}, "
+                "first_seen TEXT NOT NULL, last_seen TEXT NOT NULL)"
+            )
+            for name, columns in indexes.items():
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON jobs ({columns})"
+                )
+            has_search_index = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'"
+            ).fetchone()
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+                f"{', '.join(search_columns)}, tokenize = 'porter unicode61')"
+            )
+        if not has_search_index:
+            # databases created before the search index existed
+            self.rebuild_search_index()
+
+    @staticmethod
+    def _column_type(column: str) -> str:
+        if column in real_columns:
+            return "REAL"
+        if column in integer_columns:
+            return "INTEGER"
+        return "TEXT"
+
+    def upsert(self, jobs: pd.DataFrame, seen_at: datetime | None = None) -> dict:
+        """
+        Inserts new jobs and refreshes known ones (matched by id), keeping their first_seen
+        :param jobs: scrape_jobs results, rows without an id are skipped
+        :param seen_at: when the jobs were seen, now by default
+        :return: number of inserted and updated jobs
+        """
+        if jobs.empty or "id" not in jobs.columns:
+            return {"inserted": 0, "updated": 0}
+        seen_at = _to_timestamp(seen_at) if seen_at else _now()
+        columns = [column for column in desired_order if column in jobs.columns]
+        rows = [
+            [_to_sql(column, value) for column, value in zip(columns, row)]
+            + [seen_at, seen_at]
+            for row in jobs[columns].itertuples(index=False, name=None)
+        ]
+        rows = [row for row in rows if row[0]]
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in columns if column != "id"
+        )
+        sql = (
+            f"INSERT INTO jobs ({', '.join(columns)}, first_seen, last_seen) "
+            f"VALUES ({', '.join('?' * (len(columns) + 2))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}, last_seen = excluded.last_seen"
+        )
+        ids = [row[0] for row in rows]
+        with self._lock, self._conn:
+            inserted = len(set(ids)) - self._count_stored(ids)
+            self._conn.executemany(sql, rows)
+            self._index(ids)
+        return {"inserted": inserted, "updated": len(rows) - inserted}
+
+    def query(
+        self,
+        site: str | list[str] | None = None,
+        company: str | None = None,
+        posted_after: date | str | None = None,
+        first_seen_after: datetime | date | str | None = None,
+        min_salary: float | None = None,
+        max_salary: float | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: str = "date_posted",
+    ) -> pd.DataFrame:
+        """
+        Stored jobs matching every given filter, newest first
+        :param site: site value(s), e.g. "linkedin"
+        :param company: exact company name
+        :param posted_after: only jobs posted on or after this date
+        :param first_seen_after: only jobs first scraped at or after this time
+        :param min_salary: only jobs whose min_amount is at least this
+        :param max_salary: only jobs whose max_amount is at most this
+        :param order_by: date_posted, first_seen, last_seen, min_amount or max_amount, descending
+        """
+        if order_by not in sortable_columns:
+            raise ValueError(f"Can't order jobs by {order_by}")
+        where, params = [], []
+        if site is not None:
+            sites = [site] if isinstance(site, str) else list(site)
+            where.append(f"site IN ({', '.join('?' * len(sites))})")
+            params += sites
+        if company is not None:
+            where.append("company = ?")
+            params.append(company)
+        if posted_after is not None:
+            where.append("date_posted >= ?")
+            params.append(str(posted_after))
+        if first_seen_after is not None:
+            where.append("first_seen >= ?")
+            params.append(_to_timestamp(first_seen_after))
+        if min_salary is not None:
+            where.append("min_amount >= ?")
+            params.append(min_salary)
+        if max_salary is not None:
+            where.append("max_amount <= ?")
+            params.append(max_salary)
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by} DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return self._read(sql, params)
+
+    def new_since(self, since: datetime | date | str, **filters) -> pd.DataFrame:
+        """
+        Jobs first seen at or after since (naive datetimes are taken as UTC),
+        e.g. new_since(datetime.now(timezone.utc) - timedelta(days=1))
+        """
+        filters.setdefault("order_by", "first_seen")
+        return self.query(first_seen_after=since, **filters)
+
+    def search(
+        self,
+        text: str,
+        site: str | list[str] | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        raw: bool = False,
+        order_by: str = "rank",
+    ) -> pd.DataFrame:
+        """
+        Stored jobs matching text in their title, company, description or skills,
+        best matches first (bm25, title hits weigh most)
+        :param text: keywords that must all match, or an FTS5 query when raw is set
+            (e.g. 'react AND (node OR "next.js") NOT senior', 'title:intern')
+        :param site: only jobs from these site value(s)
+        :param limit: page size
+        :param offset: rows to skip, for the following pages
+        :param order_by: "rank", or "recent" for the most recently stored matches first,
+            which skips scoring every match and stays fast for very common terms
+        :return: matching jobs with their rank (lower is better) and a description snippet
+        """
+        if order_by not in ("rank", "recent"):
+            raise ValueError(f"Can't order search results by {order_by}")
+        where, params = self._search_filters(text, site, raw)
+        weights = ", ".join(str(weight) for weight in search_weights)
+        order = "rank" if order_by == "rank" else "jobs_fts.rowid DESC"
+        sql = (
+            f"SELECT jobs.*, bm25(jobs_fts, {weights}) AS rank, "
+            "snippet(jobs_fts, 2, '**', '**', '...', 16) AS snippet "
+            f"FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid WHERE {where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        return self._read(sql, params + [limit, offset])
+
+    def search_count(
+        self, text: str, site: str | list[str] | None = None, raw: bool = False
+    ) -> int:
+        """
+        Number of jobs search would page through
+        """
+        where, params = self._search_filters(text, site, raw)
+        sql = (
+            "SELECT COUNT(*) FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid "
+            f"WHERE {where}"
+        )
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    @staticmethod
+    def _search_filters(
+        text: str, site: str | list[str] | None, raw: bool
+    ) -> tuple[str, list]:
+        where = ["jobs_fts MATCH ?"]
+        params = [text if raw else _match_expression(text)]
+        if site is not None:
+            sites = [site] if isinstance(site, str) else list(site)
+            where.append(f"jobs.site IN ({', '.join('?' * len(sites))})")
+            params += sites
+        return " AND ".join(where), params
+
+    def rebuild_search_index(self):
+        """
+        Re-indexes every stored job, e.g. after the markdown stripping changed
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs_fts")
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM jobs")]
+            self._index(ids)
+
+    def _count_stored(self, ids: list[str], chunk_size: int = 500) -> int:
+        """
+        How many of ids are already stored, looked up by primary key so the cost
+        follows the batch and not the size of the table
+        """
+        ids = list(set(ids))
+        stored = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start : start + chunk_size]
+            stored += self._conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchone()[0]
+        return stored
+
+    def _index(self, ids: list[str], chunk_size: int = 500):
+        """
+        (Re)writes the search index entries of ids, caller holds the lock and transaction
+        """
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start : start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT rowid, {', '.join(search_columns)} FROM jobs "
+                f"WHERE id IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            self._conn.executemany(
+                "DELETE FROM jobs_fts WHERE rowid = ?", [(row[0],) for row in rows]
+            )
+            self._conn.executemany(
+                f"INSERT INTO jobs_fts (rowid, {', '.join(search_columns)}) "
+                f"VALUES (?, {', '.join('?' * len(search_columns))})",
+                [
+                    (
+                        rowid,
+                        title,
+                        company,
+                        strip_markdown_formatting(description),
+                        skills,
+                    )
+                    for rowid, title, company, description, skills in rows
+                ],
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def _read(self, sql: str, params: list) -> pd.DataFrame:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
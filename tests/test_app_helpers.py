@@ -0,0 +1,33 @@
+import pytest
+
+import app_helpers
+from app_helpers import BackgroundSearch, search_cache
+
+
+def fake_iter_jobs(site_status, progress, **params):
+    """
+    Yields one job per site, only the first of which has a salary
+    """
+    for site, min_amount in (("indeed", 50000.0), ("linkedin", None)):
+        progress(site, "started", {})
+        yield {"id": site, "site": site, "title": "Engineer", "min_amount": min_amount}
+        site_status[site] = "ok"
+        progress(site, "done", {"status": "ok"})
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(app_helpers, "iter_jobs", fake_iter_jobs)
+    search_cache.clear()
+    yield BackgroundSearch({"site_name": ["indeed", "linkedin"], "search_term": "x"})
+    search_cache.clear()
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_results_combine_sites_with_all_na_columns(search):
+    search._run()
+
+    jobs = search.jobs()
+    assert list(jobs["site"]) == ["indeed", "linkedin"]
+    assert jobs["min_amount"].isna().tolist() == [False, True]
+    assert jobs.attrs["site_status"] == {"indeed": "ok", "linkedin": "ok"}
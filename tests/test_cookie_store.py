@@ -0,0 +1,76 @@
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from state import PersistentState
+from util import CookieStore, create_session
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    """
+    Hands out a new session cookie on every request
+    """
+
+    hits = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        CookieHandler.hits += 1
+        self.send_response(200)
+        self.send_header("Set-Cookie", f"sid=s{self.hits}; Path=/; Max-Age=600")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = CookieStore(flush_interval=3600)
+    monkeypatch.setattr("util.cookie_store", store)
+    writes = []
+    save = PersistentState._save
+
+    def counting_save(state):
+        writes.append(state.name)
+        save(state)
+
+    monkeypatch.setattr(PersistentState, "_save", counting_save)
+    store.writes = writes
+    return store
+
+
+def test_cookies_are_written_once_per_flush(serve, store):
+    url = serve(CookieHandler)
+    session = create_session(is_tls=False, site="indeed", persist_cookies=True)
+
+    for _ in range(20):
+        session.get(url)
+
+    assert store.writes == []
+    # pending jars are what the next session of the run loads
+    assert [c["value"] for c in store.load("indeed", None)] == ["s20"]
+
+    session.close()
+
+    assert store.writes == ["cookies"]
+    assert [c["value"] for c in CookieStore().load("indeed", None)] == ["s20"]
+
+
+def test_saves_flush_once_the_interval_has_passed(store):
+    store.flush_interval = 0
+    store.save("indeed", None, [])
+    store.save("indeed", "http://proxy:8080", [])
+
+    assert store.writes == ["cookies", "cookies"]
+
+
+def test_clearing_a_site_drops_its_pending_jars(serve, store):
+    session = create_session(is_tls=False, site="indeed", persist_cookies=True)
+    session.get(serve(CookieHandler))
+
+    store.clear("indeed")
+    store.flush()
+
+    assert store.load("indeed", None) == []
+    assert CookieStore().load("indeed", None) == []
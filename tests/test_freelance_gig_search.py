@@ -0,0 +1,226 @@
+import gzip
+import io
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+
+import pandas as pd
+import pytest
+
+import freelance_gig_search
+from conftest import read_fixture
+from freelance_gig_search import (
+    FreelancerSearcher,
+    UnifiedFreelanceSearcher,
+    UpworkSearcher,
+    feed_cache,
+    within_budget,
+)
+
+last_modified = formatdate(1792310400, usegmt=True)
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for Upwork's RSS feed (/rss, gzipped, validated by ETag) and Freelancer.com's
+    projects API (/api, validated by Last-Modified), answering 304 to a matching validator
+    """
+
+    requests = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.lock:
+            self.requests.append((path, dict(self.headers)))
+        if path == "/rss":
+            if self.headers.get("If-None-Match") == '"feed-v1"':
+                return self.answer(304)
+            body = gzip.compress(read_fixture("upwork_jobs.rss"))
+            self.answer(
+                200,
+                body,
+                {
+                    "ETag": '"feed-v1"',
+                    "Content-Encoding": "gzip",
+                    "Content-Type": "application/rss+xml",
+                },
+            )
+        elif path == "/api":
+            if self.headers.get("If-Modified-Since") == last_modified:
+                return self.answer(304)
+            self.answer(
+                200,
+                read_fixture("freelancer_projects.json"),
+                {"Last-Modified": last_modified, "Content-Type": "application/json"},
+            )
+        else:
+            self.answer(503, b"unavailable")
+
+    def answer(self, status: int, body: bytes = b"", headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def feeds(serve):
+    FeedHandler.requests = []
+    feed_cache.clear()
+    yield serve(FeedHandler)
+    feed_cache.clear()
+
+
+def test_upwork_feed_is_parsed(feeds):
+    gigs = UpworkSearcher(feed_url=f"{feeds}/rss").search_gigs("mern", max_results=10)
+
+    assert [gig.title for gig in gigs] == [
+        "MERN Stack Developer for SaaS Dashboard",
+        "React Native & Node.js API Developer",
+        "Fix Express server memory leak",
+    ]
+    fixed, hourly, unbudgeted = gigs
+    assert (fixed.budget_min, fixed.budget_max, fixed.project_type) == (
+        1500.0,
+        1500.0,
+        "Fixed Price",
+    )
+    assert (hourly.budget_min, hourly.budget_max, hourly.project_type) == (
+        25.0,
+        45.0,
+        "Hourly",
+    )
+    assert (unbudgeted.budget_min, unbudgeted.budget_max) == (None, None)
+    assert fixed.skills_required == ["MongoDB", "React", "Node.js", "Express"]
+    assert fixed.description == (
+        "We need a full stack developer to build the admin dashboard of our SaaS "
+        "product with React, Express and MongoDB. Clean code and tests expected."
+    )
+    assert fixed.posted_date == "2026-10-18"
+    assert fixed.url.startswith("https://www.upwork.com/jobs/MERN-Stack-Developer")
+    assert {gig.platform for gig in gigs} == {"Upwork"}
+
+    path, headers = FeedHandler.requests[0]
+    assert "gzip" in headers["Accept-Encoding"]
+
+
+def test_upwork_feed_stops_at_max_results(feeds):
+    gigs = UpworkSearcher(feed_url=f"{feeds}/rss").search_gigs("mern", max_results=2)
+    assert len(gigs) == 2
+
+
+def test_parsed_items_are_dropped_from_the_channel(monkeypatch):
+    item = b"<item><title>Gig %d</title><description>React</description></item>"
+    feed = b"".join(
+        [b"<rss><channel><title>All jobs</title>"]
+        + [item % number for number in range(5000)]
+        + [b"</channel></rss>"]
+    )
+    channels = []
+    iterparse = freelance_gig_search.ElementTree.iterparse
+
+    def recording_iterparse(source, events):
+        for event, element in iterparse(source, events):
+            if element.tag == "channel":
+                channels.append(element)
+            yield event, element
+
+    monkeypatch.setattr(
+        freelance_gig_search.ElementTree, "iterparse", recording_iterparse
+    )
+
+    gigs = UpworkSearcher()._parse_feed(io.BytesIO(feed), max_results=10000)
+
+    assert len(gigs) == 5000 and gigs[-1].title == "Gig 4999"
+    assert [len(channel.findall("item")) for channel in channels] == [0, 0]
+
+
+def test_freelancer_projects_are_parsed(feeds):
+    gigs = FreelancerSearcher(api_url=f"{feeds}/api").search_gigs(
+        "mern", max_results=10
+    )
+
+    fixed, hourly = gigs
+    assert fixed.title == "Build MERN marketplace MVP"
+    assert (fixed.budget_min, fixed.budget_max, fixed.currency) == (
+        750.0,
+        1500.0,
+        "USD",
+    )
+    assert fixed.skills_required == ["Node.js", "React.js", "MongoDB"]
+    assert (
+        fixed.url
+        == "https://www.freelancer.com/projects/nodejs/Build-MERN-marketplace-MVP"
+    )
+    assert fixed.project_type == "Fixed Price"
+    # no full description, no maximum, budget in rupees
+    assert (
+        hourly.description == "Fix charts and filters in an existing React dashboard."
+    )
+    assert (hourly.budget_min, hourly.budget_max, hourly.currency) == (
+        600.0,
+        None,
+        "INR",
+    )
+    assert hourly.project_type == "Hourly"
+
+
+def test_repeat_polls_are_revalidated(feeds):
+    upwork = UpworkSearcher(feed_url=f"{feeds}/rss")
+    freelancer = FreelancerSearcher(api_url=f"{feeds}/api")
+    first = upwork.search_gigs("mern", 10), freelancer.search_gigs("mern", 10)
+    second = upwork.search_gigs("mern", 10), freelancer.search_gigs("mern", 10)
+
+    assert second == first
+    (_, rss_first), (_, api_first), (_, rss_again), (_, api_again) = (
+        FeedHandler.requests
+    )
+    assert "If-None-Match" not in rss_first and "If-Modified-Since" not in api_first
+    assert rss_again["If-None-Match"] == '"feed-v1"'
+    assert api_again["If-Modified-Since"] == last_modified
+
+
+def test_revalidated_gigs_survive_a_restart(feeds):
+    UpworkSearcher(feed_url=f"{feeds}/rss").search_gigs("mern", 10)
+    # a new process starts with nothing in memory and reads the cache file
+    feed_cache._entries = None
+
+    gigs = UpworkSearcher(feed_url=f"{feeds}/rss").search_gigs("mern", 10)
+
+    assert len(gigs) == 3 and gigs[1].budget_max == 45.0
+    assert FeedHandler.requests[-1][1]["If-None-Match"] == '"feed-v1"'
+
+
+def test_failing_platforms_are_reported(feeds, monkeypatch):
+    monkeypatch.setattr(freelance_gig_search, "upwork_feed_url", f"{feeds}/unavailable")
+    monkeypatch.setattr(freelance_gig_search, "freelancer_api_url", f"{feeds}/api")
+
+    gigs = UnifiedFreelanceSearcher().search_all_platforms(
+        "mern", platforms=["upwork", "freelancer"]
+    )
+
+    assert set(gigs["platform"]) == {"Freelancer.com"}
+    assert list(gigs.attrs["platform_errors"]) == ["upwork"]
+    assert "503" in gigs.attrs["platform_errors"]["upwork"]
+
+
+def test_budget_range_keeps_gigs_it_cannot_compare():
+    gigs = pd.DataFrame(
+        {
+            "title": ["fits", "too small", "too big", "hourly, no range", "in INR"],
+            "budget_min": [500.0, 50.0, 8000.0, None, 40000.0],
+            "budget_max": [900.0, 80.0, 20000.0, None, 60000.0],
+            "currency": ["USD", "USD", "USD", "USD", "INR"],
+        }
+    )
+
+    kept = gigs[within_budget(gigs, 100, 10000)]["title"].tolist()
+
+    assert kept == ["fits", "hourly, no range", "in INR"]
+    assert within_budget(gigs).all()
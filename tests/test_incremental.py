@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from incremental import hours_since, incremental_hours_old
+from model import JobType, ScraperInput, Site
+
+
+def scraper_input(**filters):
+    return ScraperInput(
+        site_type=[Site.INDEED, Site.LINKEDIN], search_term="python", **filters
+    )
+
+
+def test_hours_old_covers_the_time_since_the_last_run():
+    last_run = time.time() - 5 * 3600
+    for site in (Site.INDEED, Site.LINKEDIN, Site.GLASSDOOR):
+        hours_old = incremental_hours_old(scraper_input(), site, last_run)
+        assert hours_old == hours_since(last_run)
+    assert incremental_hours_old(scraper_input(), Site.INDEED, None) is None
+
+
+@pytest.mark.parametrize(
+    "filters, site",
+    [
+        ({"job_type": JobType.FULL_TIME}, Site.INDEED),
+        ({"is_remote": True}, Site.INDEED),
+        ({"easy_apply": True}, Site.INDEED),
+        ({"easy_apply": True}, Site.LINKEDIN),
+    ],
+)
+def test_no_hours_old_where_it_would_drop_the_filters(filters, site):
+    last_run = time.time() - 3600
+    assert incremental_hours_old(scraper_input(**filters), site, last_run) is None
+
+
+def test_filters_other_sites_can_combine_keep_hours_old():
+    last_run = time.time() - 3600
+    filters = {"job_type": JobType.FULL_TIME, "is_remote": True}
+    assert incremental_hours_old(scraper_input(**filters), Site.LINKEDIN, last_run)
+    assert incremental_hours_old(
+        scraper_input(easy_apply=True), Site.GLASSDOOR, last_run
+    )
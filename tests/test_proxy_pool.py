@@ -0,0 +1,22 @@
+from util import ProxyPool
+
+
+def test_blocks_on_one_site_do_not_eject_the_proxy_elsewhere():
+    pool = ProxyPool(eject_after=3)
+    for _ in range(3):
+        pool.report("http://proxy-a", "linkedin", status_code=429)
+
+    assert not pool.is_available("http://proxy-a", "linkedin")
+    assert pool.is_available("http://proxy-a", "indeed")
+    stats = pool.stats()["http://proxy-a"]
+    assert stats["linkedin"]["ejected"] and stats["linkedin"]["recent_blocks"] == 3
+
+
+def test_acquire_skips_proxies_ejected_for_the_site():
+    pool = ProxyPool(eject_after=2)
+    proxies = ["http://proxy-a", "http://proxy-b"]
+    for _ in range(2):
+        pool.report("http://proxy-a", "linkedin", error=True)
+
+    assert {pool.acquire(proxies, "linkedin") for _ in range(20)} == {"http://proxy-b"}
+    assert {pool.acquire(proxies, "indeed") for _ in range(50)} == set(proxies)
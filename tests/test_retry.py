@@ -0,0 +1,51 @@
+import pytest
+
+import retry
+from model import Site
+from retry import RetryPolicy, get_retry_policy
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry.time, "sleep", slept.append)
+    return slept
+
+
+def test_only_retry_statuses_are_retried(sleeps):
+    policy = RetryPolicy(max_attempts=3, base_delay=1, jitter=False)
+    responses = iter([FakeResponse(404)])
+    assert policy.execute(lambda: next(responses)).status_code == 404
+    assert sleeps == []
+
+    responses = iter([FakeResponse(503), FakeResponse(200)])
+    assert policy.execute(lambda: next(responses)).status_code == 200
+    assert sleeps == [1]
+
+
+def test_site_policies_decide_what_is_retried(sleeps):
+    assert 403 in get_retry_policy(Site.GLASSDOOR).retry_statuses
+    assert 403 not in get_retry_policy(Site.GOOGLE).retry_statuses
+
+
+def test_retries_made_by_on_retry_share_the_wait_budget(sleeps):
+    outer = RetryPolicy(max_attempts=5, base_delay=4, max_total_wait=10, jitter=False)
+    inner = RetryPolicy(max_attempts=5, base_delay=3, max_total_wait=60, jitter=False)
+
+    def refresh(attempt, response):
+        # fails every time, waits 3s then 6s would exceed the 6s the outer call has left
+        inner.execute(lambda: FakeResponse(500))
+
+    result = outer.execute(lambda: FakeResponse(503), on_retry=refresh)
+
+    assert result.status_code == 503
+    # outer waits 4s, refresh waits 3s (6s more would pass the 10s budget), then the
+    # outer's next 8s backoff no longer fits in the 3s left
+    assert sleeps == [4, 3]
+    assert getattr(retry._wait_budget, "remaining", None) is None
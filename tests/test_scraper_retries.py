@@ -0,0 +1,78 @@
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from linkedin import LinkedIn
+from model import ScraperInput, Site
+from naukri import Naukri
+from retry import RetryPolicy, get_retry_policy, set_retry_policy
+
+
+def flaky_handler(statuses: list[int], body: bytes = b""):
+    """
+    Answers with each of statuses in turn, then 200 with body
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        hits = []
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            status = statuses[len(self.hits)] if len(self.hits) < len(statuses) else 200
+            self.hits.append(self.path)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture
+def fast_policy():
+    """
+    Swaps in a policy that retries without waiting for the sites under test
+    """
+    previous = {site: get_retry_policy(site) for site in (Site.LINKEDIN, Site.NAUKRI)}
+    for site in previous:
+        set_retry_policy(site, RetryPolicy(max_attempts=3, base_delay=0, jitter=False))
+    yield
+    for site, policy in previous.items():
+        set_retry_policy(site, policy)
+
+
+@pytest.mark.parametrize("scraper_class", [LinkedIn, Naukri])
+def test_sessions_do_not_retry_in_the_adapter(scraper_class):
+    scraper = scraper_class()
+    assert scraper.session.get_adapter("https://example.com").max_retries.total == 0
+
+
+def test_linkedin_retries_through_its_policy(serve, fast_policy, monkeypatch):
+    handler = flaky_handler([429, 503])
+    monkeypatch.setattr(LinkedIn, "base_url", serve(handler))
+    scraper = LinkedIn()
+
+    scraper.scrape(ScraperInput(site_type=[Site.LINKEDIN], search_term="python"))
+
+    assert len(handler.hits) == 3
+    assert get_retry_policy(Site.LINKEDIN).stats()["retries"] == 2
+
+
+def test_naukri_gives_up_at_the_deadline(serve, monkeypatch):
+    handler = flaky_handler([503] * 10, body=b"{}")
+    monkeypatch.setattr(Naukri, "base_url", serve(handler))
+    scraper = Naukri()
+
+    scraper.scrape(
+        ScraperInput(
+            site_type=[Site.NAUKRI],
+            search_term="python",
+            deadline=time.monotonic() + 1,
+        )
+    )
+
+    # the naukri policy backs off 5s before its first retry, past the deadline
+    assert len(handler.hits) == 1
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+from util import create_session
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_concurrent_requests_reuse_pooled_connections(serve):
+    KeepAliveHandler.connections = set()
+    base_url = serve(KeepAliveHandler)
+    pool_size, workers, requests_sent = 4, 4, 80
+    session = create_session(is_tls=False, pool_size=pool_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(
+            executor.map(
+                lambda i: session.get(f"{base_url}/page/{i}").status_code,
+                range(requests_sent),
+            )
+        )
+
+    assert statuses == [200] * requests_sent
+    stats = session.pool_stats()
+    assert stats["requests"] == requests_sent
+    # never more connections than the pool holds, every other request reused one
+    assert 1 <= len(KeepAliveHandler.connections) <= pool_size
+    assert stats["connections_opened"] == len(KeepAliveHandler.connections)
+    assert stats["connections_reused"] == requests_sent - stats["connections_opened"]
+    assert stats["reuse_ratio"] >= 0.9
+
+
+def test_pool_size_bounds_connections_per_host(serve):
+    KeepAliveHandler.connections = set()
+    base_url = serve(KeepAliveHandler)
+    session = create_session(is_tls=False, pool_size=2)
+    adapter = session.get_adapter(base_url)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: session.get(base_url).status_code, range(40)))
+
+    pool = adapter.poolmanager.connection_from_url(base_url)
+    assert pool.pool.maxsize == 2
+    # threads beyond the pool size open extra connections that are not kept
+    assert pool.pool.qsize() <= 2
+    assert session.pool_stats()["requests"] == 40
@@ -0,0 +1,105 @@
+from datetime import date
+
+import pandas as pd
+
+from store import JobStore
+
+
+def jobs_frame(ids, dates):
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "site": "indeed",
+            "title": [f"Engineer {job_id}" for job_id in ids],
+            "company": "Acme",
+            "date_posted": dates,
+        }
+    )
+
+
+def test_upsert_counts_inserted_and_updated_jobs(tmp_path):
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        first = store.upsert(jobs_frame(["in-1", "in-2"], [date(2026, 10, 1)] * 2))
+        second = store.upsert(
+            jobs_frame(["in-2", "in-3", "in-3"], [date(2026, 10, 2)] * 3)
+        )
+
+        assert first == {"inserted": 2, "updated": 0}
+        # in-3 appears twice in the batch: inserted once, then updated
+        assert second == {"inserted": 1, "updated": 2}
+        assert store.count() == 3
+
+
+def test_posting_dates_are_stored_as_dates(tmp_path):
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        store.upsert(jobs_frame(["in-1"], [date(2026, 10, 9)]))
+        store.upsert(jobs_frame(["in-2"], [pd.Timestamp("2026-10-10 15:30")]))
+        store.upsert(jobs_frame(["in-3"], ["2026-10-08"]))
+
+        stored = store.query()
+        assert list(stored["date_posted"]) == ["2026-10-10", "2026-10-09", "2026-10-08"]
+        assert list(store.query(posted_after="2026-10-10")["id"]) == ["in-2"]
+
+
+def search_frame(rows):
+    return pd.DataFrame(
+        [{"site": "indeed", "company": "Acme", "skills": None, **row} for row in rows]
+    )
+
+
+def test_title_hits_outrank_description_hits(tmp_path):
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        store.upsert(
+            search_frame(
+                [
+                    {
+                        "id": "in-desc",
+                        "title": "Backend Engineer",
+                        "description": "Our stack is Kubernetes, Go and a bit of React.",
+                    },
+                    {
+                        "id": "in-title",
+                        "title": "React Developer",
+                        "description": "Build our customer dashboard.",
+                    },
+                ]
+            )
+        )
+
+        results = store.search("react")
+
+        assert list(results["id"]) == ["in-title", "in-desc"]
+        assert results["rank"].is_monotonic_increasing
+        assert store.search_count("react") == 2
+
+
+def test_search_follows_upserted_text(tmp_path):
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        job = {"id": "in-1", "title": "Angular Developer", "description": "Frontend"}
+        store.upsert(search_frame([job]))
+        store.upsert(search_frame([{**job, "title": "Svelte Developer"}]))
+
+        assert list(store.search("svelte")["id"]) == ["in-1"]
+        assert store.search("angular").empty
+        assert store.search_count("developer") == 1
+
+
+def test_queries_with_fts_operators_do_not_raise(tmp_path):
+    with JobStore(str(tmp_path / "jobs.db")) as store:
+        store.upsert(
+            search_frame(
+                [
+                    {
+                        "id": "in-1",
+                        "title": "Full-stack C++ Developer",
+                        "description": 'Works on the "core" engine',
+                    }
+                ]
+            )
+        )
+
+        for text in ['"core', "full-stack", "c++ *", "-senior", 'node" OR "x', "*"]:
+            store.search(text)
+            store.search_count(text)
+        assert list(store.search("full-stack")["id"]) == ["in-1"]
+        assert list(store.search('"core')["id"]) == ["in-1"]
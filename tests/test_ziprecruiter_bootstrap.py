@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from util import dump_cookies
+from ziprecruiter import ZipRecruiter
+from ziprecruiter.util import SessionBootstrap, session_bootstrap
+
+
+class EventHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the session event endpoint: slow, and hands out a session cookie
+    """
+
+    delay = 0.3
+    events = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.lock:
+            self.events.append(self.path)
+            number = len(self.events)
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Set-Cookie", f"zr_session=s{number}; Path=/; Max-Age=600")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def event_server(serve):
+    EventHandler.events = []
+    session_bootstrap.clear()
+    yield serve(EventHandler)
+    session_bootstrap.clear()
+
+
+def test_concurrent_scrapers_share_one_session_event(event_server, monkeypatch):
+    monkeypatch.setattr(ZipRecruiter, "api_url", event_server)
+    scrapers = [ZipRecruiter() for _ in range(5)]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(lambda scraper: scraper._get_cookies(), scrapers))
+
+    assert EventHandler.events == ["/jobs-app/event"]
+    for scraper in scrapers:
+        assert [c["value"] for c in dump_cookies(scraper.session.cookies)] == ["s1"]
+
+    # fresh cookies are reused by later scrapers without another event
+    ZipRecruiter()._get_cookies()
+    assert len(EventHandler.events) == 1
+
+
+def test_bootstraps_of_different_keys_do_not_wait_for_each_other(event_server):
+    bootstrap = SessionBootstrap()
+
+    def get_cookies(key):
+        def send_event():
+            session = requests.Session()
+            session.post(f"{event_server}/jobs-app/event", data={"key": key})
+            return dump_cookies(session.cookies)
+
+        return bootstrap.get(key, send_event)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        jars = list(executor.map(get_cookies, ["proxy-a", "proxy-b", "proxy-c"] * 2))
+    elapsed = time.monotonic() - start
+
+    # one event per key, and the three keys posted at the same time
+    assert len(EventHandler.events) == 3
+    assert elapsed < 3 * EventHandler.delay
+    assert jars[:3] == jars[3:]
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import atexit
+import functools
 import logging
+import random
 import re
-from itertools import cycle
+import threading
+import time
+from collections import deque
 
-import numpy as np
 import requests
-import tls_client
 import urllib3
-from markdownify import markdownify as md
 from requests.adapters import HTTPAdapter, Retry
 
 from model import CompensationInterval, JobType, Site
+from state import PersistentState
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -29,18 +32,399 @@ def create_logger(name: str):
     return logger
 
 
+class ProxyHealth:
+    """
+    Running health of a single proxy on one site: success rate, latency and recent blocks
+    """
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None  # exponentially weighted moving average, seconds
+        self.blocks: deque = deque()  # timestamps of recent 403/429s
+        self.ejected_until = 0.0
+        self.probing = False
+
+    def success_rate(self) -> float:
+        # laplace smoothing so new proxies start at 0.5 instead of 0 or 1
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def recent_blocks(self, window: float) -> int:
+        while self.blocks and time.time() - self.blocks[0] > window:
+            self.blocks.popleft()
+        return len(self.blocks)
+
+
+class ProxyPool:
+    """
+    Process-wide proxy health registry. Every session picks its next proxy from its
+    own list weighted by score (success rate, latency, recent 403/429s), proxies that
+    keep failing are ejected and re-probed with a single request once their cooldown
+    is over. Health is kept per site and proxy, so a proxy blocked by one site stays
+    in use for the others.
+    """
+
+    def __init__(
+        self, eject_after: int = 3, cooldown: float = 300, block_window: float = 600
+    ):
+        self.eject_after = eject_after
+        self.cooldown = cooldown
+        self.block_window = block_window
+        self._lock = threading.Lock()
+        self._health: dict[tuple[str | None, str], ProxyHealth] = {}
+
+    def acquire(self, proxies: list[str], site: str | None = None) -> str:
+        """
+        Picks one of proxies for the next request to site
+        """
+        with self._lock:
+            now = time.time()
+            candidates, weights = [], []
+            for proxy in proxies:
+                health = self._health.setdefault((site, proxy), ProxyHealth())
+                if health.ejected_until > now:
+                    continue
+                if health.ejected_until and health.probing:
+                    continue  # cooldown over, a probe request is already in flight
+                candidates.append(proxy)
+                weights.append(self._score(health))
+            if not candidates:
+                # everything is ejected, fall back to the one coming back soonest
+                return min(
+                    proxies, key=lambda proxy: self._health[(site, proxy)].ejected_until
+                )
+            proxy = random.choices(candidates, weights=weights)[0]
+            health = self._health[(site, proxy)]
+            if health.ejected_until:
+                health.probing = True
+            return proxy
+
+    def report(
+        self,
+        proxy: str,
+        site: str | None = None,
+        status_code: int | None = None,
+        latency: float | None = None,
+        error: bool = False,
+    ):
+        """
+        Records the outcome of a request sent through proxy to site
+        """
+        with self._lock:
+            health = self._health.setdefault((site, proxy), ProxyHealth())
+            health.probing = False
+            blocked = status_code in (403, 429)
+            if error or blocked or (status_code and status_code >= 500):
+                health.failures += 1
+                health.consecutive_failures += 1
+                if blocked:
+                    health.blocks.append(time.time())
+                if (
+                    health.consecutive_failures >= self.eject_after
+                    or health.recent_blocks(self.block_window) >= self.eject_after
+                    or health.ejected_until  # failed its re-probe
+                ):
+                    health.ejected_until = time.time() + self.cooldown
+                    create_logger("ProxyPool").warning(
+                        f"ejecting proxy {proxy} from {site} for {self.cooldown}s"
+                    )
+            else:
+                health.successes += 1
+                health.consecutive_failures = 0
+                health.ejected_until = 0.0
+            if latency is not None:
+                health.latency = (
+                    latency
+                    if health.latency is None
+                    else 0.7 * health.latency + 0.3 * latency
+                )
+
+    def is_available(self, proxy: str, site: str | None = None) -> bool:
+        with self._lock:
+            health = self._health.get((site, proxy))
+            return health is None or health.ejected_until <= time.time()
+
+    def stats(self) -> dict[str, dict[str | None, dict]]:
+        """
+        Health of every proxy, per site it was used for
+        """
+        with self._lock:
+            stats = {}
+            for (site, proxy), health in self._health.items():
+                stats.setdefault(proxy, {})[site] = {
+                    "success_rate": health.success_rate(),
+                    "latency": health.latency,
+                    "recent_blocks": health.recent_blocks(self.block_window),
+                    "ejected": health.ejected_until > time.time(),
+                }
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._health.clear()
+
+    def _score(self, health: ProxyHealth) -> float:
+        score = health.success_rate()
+        if health.latency is not None:
+            score /= 1 + health.latency
+        return score / (1 + health.recent_blocks(self.block_window))
+
+
+proxy_pool = ProxyPool()
+
+
+class CircuitBreaker:
+    """
+    Remembers which (site, proxies) combinations are being blocked. After
+    failure_threshold consecutive 403/429/captcha signals the circuit opens and
+    scrape_jobs skips the site, once cooldown is over a single probe scrape is let
+    through (half-open) and closes the circuit again on its first good response.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 600,
+        state: PersistentState | None = None,
+    ):
+        """
+        :param failure_threshold: consecutive block signals that open the circuit
+        :param cooldown: seconds the circuit stays open before a probe is allowed
+        :param state: keeps the circuits across runs when given
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = state
+        self._lock = threading.Lock()
+        self._circuits: dict[str, dict] = {}
+        if state is not None:
+            self.persist(state)
+
+    def persist(self, state: PersistentState):
+        """
+        Keeps circuits in state from now on, picking up the ones saved by earlier runs
+        """
+        with self._lock:
+            self.state = state
+            for key, circuit in state.items():
+                self._circuits.setdefault(key, circuit)
+
+    @staticmethod
+    def key(site: Site | str | None, proxies: list[str] | str | None = None) -> str:
+        site = getattr(site, "value", site)
+        if isinstance(proxies, str):
+            proxies = [proxies]
+        proxy_list = sorted(
+            RotatingProxySession.format_proxy(proxy)["http"] for proxy in proxies or []
+        )
+        return f"{site}|{','.join(proxy_list) or 'direct'}"
+
+    def allow(self, site: Site | str, proxies: list[str] | str | None = None) -> bool:
+        """
+        Whether site may be scraped through proxies now, claims the probe when half-open
+        """
+        key = self.key(site, proxies)
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit["state"] == "closed":
+                return True
+            now = time.time()
+            if now < circuit["opened_at"] + self.cooldown:
+                return False
+            if (
+                circuit["state"] == "half_open"
+                and now < circuit["probe_at"] + self.cooldown
+            ):
+                return False  # a probe is already in flight
+            circuit.update(state="half_open", probe_at=now)
+            self._save(key, circuit)
+            return True
+
+    def record_failure(
+        self,
+        site: Site | str,
+        proxies: list[str] | str | None = None,
+        captcha: bool = False,
+    ):
+        """
+        Records a block signal (403, 429, captcha page) for site. A captcha page is
+        conclusive and opens the circuit right away.
+        """
+        key = self.key(site, proxies)
+        with self._lock:
+            circuit = self._circuits.setdefault(key, self._closed())
+            circuit["failures"] += 1
+            if circuit["state"] == "half_open" or (
+                circuit["state"] == "closed"
+                and (captcha or circuit["failures"] >= self.failure_threshold)
+            ):
+                circuit.update(state="open", opened_at=time.time())
+                create_logger("CircuitBreaker").warning(
+                    f"opening circuit for {key} for {self.cooldown}s"
+                )
+            self._save(key, circuit)
+
+    def record_success(self, site: Site | str, proxies: list[str] | str | None = None):
+        key = self.key(site, proxies)
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit == self._closed():
+                return
+            if (
+                circuit["state"] == "open"
+                and time.time() < circuit["opened_at"] + self.cooldown
+            ):
+                return  # a straggler from before the circuit opened
+            self._circuits[key] = self._closed()
+            self._save(key, self._circuits[key])
+
+    def record(
+        self, site: Site | str, proxies: list[str] | str | None, status_code: int | None
+    ):
+        if status_code in (403, 429):
+            self.record_failure(site, proxies)
+        elif status_code is not None and status_code < 400:
+            self.record_success(site, proxies)
+
+    def states(self) -> dict[str, dict]:
+        """
+        Every known circuit with its state and seconds until it may be probed again
+        """
+        with self._lock:
+            now = time.time()
+            return {
+                key: {
+                    "state": circuit["state"],
+                    "failures": circuit["failures"],
+                    "retry_in": (
+                        max(circuit["opened_at"] + self.cooldown - now, 0.0)
+                        if circuit["state"] != "closed"
+                        else 0.0
+                    ),
+                }
+                for key, circuit in self._circuits.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._circuits.clear()
+            if self.state is not None:
+                self.state.clear()
+
+    @staticmethod
+    def _closed() -> dict:
+        return {"state": "closed", "failures": 0, "opened_at": 0.0, "probe_at": 0.0}
+
+    def _save(self, key: str, circuit: dict):
+        if self.state is not None:
+            self.state.set(key, dict(circuit))
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def get_breaker_states(proxies: list[str] | str | None = None) -> dict[str, dict]:
+    """
+    Circuit state of every site when scraped through proxies, for the UI to grey out
+    boards that scrape_jobs would currently skip
+    """
+    states = circuit_breaker.states()
+    closed = {"state": "closed", "failures": 0, "retry_in": 0.0}
+    return {
+        site.value: states.get(CircuitBreaker.key(site, proxies), closed)
+        for site in Site
+    }
+
+
+class CookieStore:
+    """
+    Cookie jars kept across runs per site and exit proxy, so established sessions
+    (consent, anti-bot and session cookies) are reused from the same ip they were
+    handed out to. Saved jars are held in memory and written at most every
+    flush_interval seconds, when a session is closed and at exit, rather than on
+    every response that sets a cookie.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, flush_interval: float = 30):
+        self.state = PersistentState("cookies", ttl=ttl)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[dict]] = {}
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def key(site: Site | str | None, proxy: str | None) -> str:
+        return f"{getattr(site, 'value', site)}|{proxy or 'direct'}"
+
+    def load(self, site: Site | str | None, proxy: str | None) -> list[dict]:
+        key = self.key(site, proxy)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        return self.state.get(key, [])
+
+    def save(self, site: Site | str | None, proxy: str | None, jar):
+        with self._lock:
+            self._pending[self.key(site, proxy)] = dump_cookies(jar)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the jars saved since the last flush
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if pending:
+            self.state.update(pending)
+
+    def clear(self, site: Site | str | None = None):
+        """
+        Forgets the jars of site (on every proxy), or all of them
+        """
+        if site is None:
+            with self._lock:
+                self._pending.clear()
+            self.state.clear()
+            return
+        prefix = self.key(site, None).rsplit("|", 1)[0] + "|"
+        with self._lock:
+            self._pending = {
+                key: jar
+                for key, jar in self._pending.items()
+                if not key.startswith(prefix)
+            }
+        for key, _ in self.state.items():
+            if key.startswith(prefix):
+                self.state.delete(key)
+
+
+cookie_store = CookieStore()
+atexit.register(cookie_store.flush)
+
+
 class RotatingProxySession:
-    def __init__(self, proxies=None):
+    def __init__(self, proxies=None, site=None, persist_cookies=False):
+        self.site = getattr(site, "value", site)
         if isinstance(proxies, str):
-            self.proxy_cycle = cycle([self.format_proxy(proxies)])
-        elif isinstance(proxies, list):
-            self.proxy_cycle = (
-                cycle([self.format_proxy(proxy) for proxy in proxies])
-                if proxies
-                else None
-            )
-        else:
-            self.proxy_cycle = None
+            proxies = [proxies]
+        self.proxy_list = (
+            [self.format_proxy(proxy)["http"] for proxy in proxies] if proxies else None
+        )
+        self.persist_cookies = persist_cookies
+        self.sticky_proxy = None
+        self._affinity_lock = threading.Lock()
+
+    def restore_cookies(self):
+        """
+        Loads the stored jar of a session without proxies, proxied sessions load
+        theirs when the first proxy is picked
+        """
+        if self.persist_cookies and not self.proxy_list:
+            load_cookies(self.cookies, cookie_store.load(self.site, None))
 
     @staticmethod
     def format_proxy(proxy):
@@ -51,16 +435,133 @@ class RotatingProxySession:
             return {"http": proxy, "https": proxy}
         return {"http": f"http://{proxy}", "https": f"http://{proxy}"}
 
+    def next_proxy(self) -> str | None:
+        """
+        Picks the proxy for one request from the shared proxy pool. Returned per request
+        instead of being set on the session so worker threads sharing the session don't
+        race on it.
+        """
+        if not self.proxy_list:
+            return None
+        if not self.persist_cookies:
+            return proxy_pool.acquire(self.proxy_list, self.site)
+        with self._affinity_lock:
+            # stick to the ip the cookie jar was built on for as long as it stays healthy
+            if self.sticky_proxy is None or not proxy_pool.is_available(
+                self.sticky_proxy, self.site
+            ):
+                proxy = proxy_pool.acquire(self.proxy_list, self.site)
+                if proxy != self.sticky_proxy:
+                    self._switch_cookies(proxy)
+            return self.sticky_proxy
+
+    def _switch_cookies(self, proxy: str):
+        """
+        Swaps the session's jar for the one stored for proxy
+        """
+        if self.sticky_proxy is not None:
+            cookie_store.save(self.site, self.sticky_proxy, self.cookies)
+        self.cookies.clear()
+        load_cookies(self.cookies, cookie_store.load(self.site, proxy))
+        self.sticky_proxy = proxy
+
+    @staticmethod
+    def proxy_dict(proxy: str) -> dict:
+        return {"http": proxy, "https": proxy} if proxy != "http://localhost" else {}
+
+    def send_through_proxy(self, send, proxy: str | None):
+        """
+        Sends a request and reports how it went to the proxy pool and circuit breaker
+        """
+        if proxy is None:
+            response = send()
+            circuit_breaker.record(self.site, self.proxy_list, response.status_code)
+            self._store_cookies(response, proxy)
+            return response
+        start = time.time()
+        try:
+            response = send()
+        except Exception:
+            proxy_pool.report(proxy, self.site, error=True)
+            raise
+        proxy_pool.report(
+            proxy,
+            self.site,
+            status_code=response.status_code,
+            latency=time.time() - start,
+        )
+        circuit_breaker.record(self.site, self.proxy_list, response.status_code)
+        self._store_cookies(response, proxy)
+        return response
+
+    def _store_cookies(self, response, proxy: str | None):
+        if self.persist_cookies and response.cookies:
+            cookie_store.save(self.site, proxy, self.cookies)
+
+    def close(self):
+        if self.persist_cookies:
+            cookie_store.flush()
+        close = getattr(super(), "close", None)
+        if close is not None:
+            close()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps track of the connection pools it hands out so the number
+    of connections opened vs requests sent over them can be reported
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _track(self, pool):
+        with self._pools_lock:
+            self._pools[id(pool)] = pool
+        return pool
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        return self._track(super().get_connection_with_tls_context(*args, **kwargs))
+
+    def get_connection(self, *args, **kwargs):
+        return self._track(super().get_connection(*args, **kwargs))
+
+    def pool_stats(self) -> dict:
+        with self._pools_lock:
+            pools = list(self._pools.values())
+        opened = sum(pool.num_connections for pool in pools)
+        requests_sent = sum(pool.num_requests for pool in pools)
+        return {
+            "connections_opened": opened,
+            "requests": requests_sent,
+            "connections_reused": max(requests_sent - opened, 0),
+        }
+
 
 class RequestsRotating(RotatingProxySession, requests.Session):
-    def __init__(self, proxies=None, has_retry=False, delay=1, clear_cookies=False):
-        RotatingProxySession.__init__(self, proxies=proxies)
+    def __init__(
+        self,
+        proxies=None,
+        has_retry=False,
+        delay=1,
+        clear_cookies=False,
+        pool_size=None,
+        site=None,
+        persist_cookies=False,
+    ):
+        RotatingProxySession.__init__(
+            self, proxies=proxies, site=site, persist_cookies=persist_cookies
+        )
         requests.Session.__init__(self)
         self.clear_cookies = clear_cookies
         self.allow_redirects = True
-        self.setup_session(has_retry, delay)
+        self.setup_session(has_retry, delay, pool_size)
+        self.restore_cookies()
 
-    def setup_session(self, has_retry, delay):
+    def setup_session(self, has_retry, delay, pool_size=None):
+        retries = 0
         if has_retry:
             retries = Retry(
                 total=3,
@@ -69,38 +570,69 @@ class RequestsRotating(RotatingProxySession, requests.Session):
                 status_forcelist=[500, 502, 503, 504, 429],
                 backoff_factor=delay,
             )
-            adapter = HTTPAdapter(max_retries=retries)
-            self.mount("http://", adapter)
-            self.mount("https://", adapter)
+        pool_size = pool_size or requests.adapters.DEFAULT_POOLSIZE
+        adapter = PooledHTTPAdapter(
+            max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def pool_stats(self) -> dict:
+        """
+        Connections opened vs reused across every adapter mounted on the session
+        """
+        stats = {"connections_opened": 0, "requests": 0, "connections_reused": 0}
+        for adapter in {id(a): a for a in self.adapters.values()}.values():
+            if isinstance(adapter, PooledHTTPAdapter):
+                for key, value in adapter.pool_stats().items():
+                    stats[key] += value
+        stats["reuse_ratio"] = (
+            stats["connections_reused"] / stats["requests"]
+            if stats["requests"]
+            else 0.0
+        )
+        return stats
 
     def request(self, method, url, **kwargs):
         if self.clear_cookies:
             self.cookies.clear()
 
-        if self.proxy_cycle:
-            next_proxy = next(self.proxy_cycle)
-            if next_proxy["http"] != "http://localhost":
-                self.proxies = next_proxy
-            else:
-                self.proxies = {}
-        return requests.Session.request(self, method, url, **kwargs)
+        proxy = self.next_proxy()
+        if proxy is not None:
+            kwargs.setdefault("proxies", self.proxy_dict(proxy))
+        return self.send_through_proxy(
+            lambda: requests.Session.request(self, method, url, **kwargs), proxy
+        )
 
 
-class TLSRotating(RotatingProxySession, tls_client.Session):
-    def __init__(self, proxies=None):
-        RotatingProxySession.__init__(self, proxies=proxies)
-        tls_client.Session.__init__(self, random_tls_extension_order=True)
+@functools.cache
+def tls_rotating_class():
+    """
+    TLSRotating, defined on first use: tls_client loads a large native library on
+    import, which sites that never use a tls session shouldn't pay for
+    """
+    import tls_client
 
-    def execute_request(self, *args, **kwargs):
-        if self.proxy_cycle:
-            next_proxy = next(self.proxy_cycle)
-            if next_proxy["http"] != "http://localhost":
-                self.proxies = next_proxy
-            else:
-                self.proxies = {}
-        response = tls_client.Session.execute_request(self, *args, **kwargs)
-        response.ok = response.status_code in range(200, 400)
-        return response
+    class TLSRotating(RotatingProxySession, tls_client.Session):
+        def __init__(self, proxies=None, site=None, persist_cookies=False):
+            RotatingProxySession.__init__(
+                self, proxies=proxies, site=site, persist_cookies=persist_cookies
+            )
+            tls_client.Session.__init__(self, random_tls_extension_order=True)
+            self.restore_cookies()
+
+        def execute_request(self, *args, **kwargs):
+            proxy = self.next_proxy()
+            if proxy is not None:
+                kwargs.setdefault("proxy", self.proxy_dict(proxy) or None)
+            response = self.send_through_proxy(
+                lambda: tls_client.Session.execute_request(self, *args, **kwargs),
+                proxy,
+            )
+            response.ok = response.status_code in range(200, 400)
+            return response
+
+    return TLSRotating
 
 
 def create_session(
@@ -111,19 +643,35 @@ def create_session(
     has_retry: bool = False,
     delay: int = 1,
     clear_cookies: bool = False,
+    pool_size: int | None = None,
+    site: Site | str | None = None,
+    persist_cookies: bool = False,
 ) -> requests.Session:
     """
     Creates a requests session with optional tls, proxy, and retry settings.
+    pool_size should match the number of threads sharing the session so every worker
+    keeps its own keep-alive connection (tls sessions pool connections on their own).
+    site is used to keep per-site block counts in the shared proxy pool.
+    has_retry adds urllib3 retries at the adapter level, scrapers retry through their
+    retry.RetryPolicy instead so every wait counts against the policy and the deadline.
+    persist_cookies keeps the cookie jar across runs in cookie_store, per site and proxy,
+    and sticks to one proxy while it stays healthy so the jar keeps its exit ip.
+    clear_cookies does the opposite and starts every request with an empty jar.
     :return: A session object
     """
     if is_tls:
-        session = TLSRotating(proxies=proxies)
+        session = tls_rotating_class()(
+            proxies=proxies, site=site, persist_cookies=persist_cookies
+        )
     else:
         session = RequestsRotating(
             proxies=proxies,
             has_retry=has_retry,
             delay=delay,
             clear_cookies=clear_cookies,
+            pool_size=pool_size,
+            site=site,
+            persist_cookies=persist_cookies,
         )
 
     if ca_cert:
@@ -132,6 +680,117 @@ def create_session(
     return session
 
 
+def time_left(deadline: float | None) -> float | None:
+    """
+    Seconds until a time.monotonic() deadline, None when there is no deadline
+    """
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def deadline_passed(deadline: float | None) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def deadline_sleep(seconds: float, deadline: float | None = None) -> bool:
+    """
+    Sleeps for seconds, or only until the deadline if that comes first
+    :return: False when the deadline cut the sleep short and the caller should stop
+    """
+    report_progress("waiting", seconds=round(seconds, 1))
+    remaining = time_left(deadline)
+    if remaining is not None and remaining < seconds:
+        time.sleep(remaining)
+        return False
+    time.sleep(seconds)
+    return True
+
+
+_progress = threading.local()
+
+
+class ProgressReporter:
+    def __init__(self, site: Site, callback):
+        """
+        Sends the report_progress calls made by the current thread, e.g. while a
+        scraper runs, to callback(site value, event, details)
+        """
+        self.site = site
+        self.callback = callback
+
+    def __enter__(self):
+        self._previous = getattr(_progress, "reporter", None)
+        _progress.reporter = self
+        return self
+
+    def __exit__(self, *exc):
+        _progress.reporter = self._previous
+
+
+def report_progress(event: str, **details):
+    """
+    Tells the ProgressReporter of the current thread, if any, what its scraper is
+    doing: "started", "page" (page, jobs so far), "waiting" (seconds), "retrying"
+    (attempt, seconds) or "done" (status, jobs)
+    """
+    reporter = getattr(_progress, "reporter", None)
+    if reporter is None or reporter.callback is None:
+        return
+    try:
+        reporter.callback(reporter.site.value, event, details)
+    except Exception as e:
+        # a broken progress display mustn't break the scrape
+        create_logger("Progress").warning(f"progress callback failed: {e}")
+
+
+def dump_cookies(jar) -> list[dict]:
+    """
+    Cookies of a requests/tls_client cookie jar as JSON-serializable dicts
+    """
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires,
+            "secure": cookie.secure,
+        }
+        for cookie in jar
+    ]
+
+
+def load_cookies(jar, cookies: list[dict]):
+    """
+    Puts cookies from dump_cookies back into a jar, skipping the ones that expired
+    """
+    now = time.time()
+    for cookie in cookies:
+        if cookie.get("expires") is not None and cookie["expires"] <= now:
+            continue
+        jar.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            expires=cookie.get("expires"),
+            secure=cookie.get("secure", False),
+        )
+
+
+def mostly_seen(
+    job_ids: list[str], seen_ids: set[str] | None, threshold: float = 0.8
+) -> bool:
+    """
+    Whether a page is mostly made of jobs an earlier incremental run already returned,
+    i.e. pagination has caught up with the previous run
+    """
+    if not seen_ids or not job_ids:
+        return False
+    return sum(job_id in seen_ids for job_id in job_ids) >= threshold * len(job_ids)
+
+
 def set_logger_level(verbose: int):
     """
     Adjusts the logger's level. This function allows the logging level to be changed at runtime.
@@ -154,6 +813,8 @@ def set_logger_level(verbose: int):
 def markdown_converter(description_html: str):
     if description_html is None:
         return None
+    from markdownify import markdownify as md
+
     markdown = md(description_html)
     return markdown.strip()
 
@@ -244,7 +905,7 @@ def currency_parser(cur_str):
     else:
         num = float(cur_str)
 
-    return np.round(num, 2)
+    return round(num, 2)
 
 
 def remove_attributes(tag):
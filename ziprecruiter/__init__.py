@@ -3,7 +3,6 @@ from __future__ import annotations
 import json
 import math
 import re
-import time
 import random
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
@@ -17,6 +16,12 @@ from util import (
     markdown_converter,
     remove_attributes,
     create_logger,
+    deadline_passed,
+    deadline_sleep,
+    dump_cookies,
+    mostly_seen,
+    report_progress,
+    load_cookies,
 )
 from model import (
     JobPost,
@@ -30,7 +35,8 @@ from model import (
     ScraperInput,
     Site,
 )
-from ziprecruiter.util import get_job_type_enum, add_params
+from ziprecruiter.util import get_job_type_enum, add_params, session_bootstrap
+from retry import get_retry_policy
 
 log = create_logger("ZipRecruiter")
 
@@ -48,17 +54,18 @@ class ZipRecruiter(Scraper):
         super().__init__(Site.ZIP_RECRUITER, proxies=proxies)
 
         self.scraper_input = None
-        self.session = create_session(proxies=proxies, ca_cert=ca_cert)
+        self.num_workers = 5
+        self.session = create_session(
+            proxies=proxies, ca_cert=ca_cert, pool_size=self.num_workers, site=self.site
+        )
         self.session.headers.update(headers)
-        self._get_cookies()
 
         # Increase delay to avoid rate limiting
         self.min_delay = 10
         self.max_delay = 15
         self.jobs_per_page = 20
         self.seen_urls = set()
-        self.max_retries = 3
-        self.retry_delay = 30
+        self.retry_policy = get_retry_policy(self.site)
 
     def scrape(self, scraper_input: ScraperInput) -> JobResponse:
         """
@@ -67,6 +74,7 @@ class ZipRecruiter(Scraper):
         :return: JobResponse containing a list of jobs.
         """
         self.scraper_input = scraper_input
+        self._get_cookies()
         job_list: list[JobPost] = []
         continue_token = None
 
@@ -77,11 +85,15 @@ class ZipRecruiter(Scraper):
         for page in range(1, max_pages + 1):
             if len(job_list) >= scraper_input.results_wanted:
                 break
+            if deadline_passed(scraper_input.deadline):
+                log.warning(f"Deadline reached, returning {len(job_list)} jobs")
+                break
             if page > 1:
                 # Add random delay between requests
                 delay = random.uniform(self.min_delay, self.max_delay)
                 log.info(f"Waiting {delay:.2f} seconds before next request")
-                time.sleep(delay)
+                if not deadline_sleep(delay, scraper_input.deadline):
+                    break
             
             log.info(f"search page: {page} / {max_pages}")
             jobs_on_page, continue_token = self._find_jobs_in_page(
@@ -89,8 +101,12 @@ class ZipRecruiter(Scraper):
             )
             if jobs_on_page:
                 job_list.extend(jobs_on_page)
+                report_progress("page", page=page, jobs=len(job_list))
             else:
                 break
+            if mostly_seen([job.id for job in jobs_on_page], scraper_input.seen_ids):
+                log.info("caught up with jobs seen by the previous run")
+                break
             if not continue_token:
                 break
         return JobResponse(jobs=job_list[: scraper_input.results_wanted])
@@ -109,46 +125,29 @@ class ZipRecruiter(Scraper):
         if continue_token:
             params["continue_from"] = continue_token
         
-        for retry in range(self.max_retries):
-            try:
-                log.info(f"Making request to ZipRecruiter (attempt {retry+1}/{self.max_retries})")
-                res = self.session.get(f"{self.api_url}/jobs-app/jobs", params=params)
-                if res.status_code in range(200, 400):
-                    break
-                elif res.status_code == 429:
-                    err = f"429 Response - Blocked by ZipRecruiter for too many requests (attempt {retry+1}/{self.max_retries})"
-                    log.warning(err)
-                    if retry < self.max_retries - 1:
-                        wait_time = self.retry_delay * (retry + 1)
-                        log.info(f"Waiting {wait_time} seconds before retry")
-                        time.sleep(wait_time)
-                    else:
-                        log.error(err)
-                        return jobs_list, ""
-                else:
-                    err = f"ZipRecruiter response status code {res.status_code}"
-                    err += f" with response: {res.text}"
-                    log.error(err)
-                    return jobs_list, ""
-            except Exception as e:
-                if "Proxy responded with" in str(e):
-                    log.error(f"ZipRecruiter: Bad proxy")
-                else:
-                    log.error(f"ZipRecruiter: {str(e)}")
-                if retry < self.max_retries - 1:
-                    wait_time = self.retry_delay * (retry + 1)
-                    log.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                else:
-                    return jobs_list, ""
-        
+        res = self.retry_policy.execute(
+            lambda: self.session.get(f"{self.api_url}/jobs-app/jobs", params=params),
+            description="ZipRecruiter search page",
+            deadline=scraper_input.deadline,
+        )
+        if res is None:
+            return jobs_list, ""
+        if res.status_code not in range(200, 400):
+            if res.status_code == 429:
+                err = "429 Response - Blocked by ZipRecruiter for too many requests"
+            else:
+                err = f"ZipRecruiter response status code {res.status_code}"
+                err += f" with response: {res.text}"
+            log.error(err)
+            return jobs_list, ""
+
         try:
             res_data = res.json()
             jobs_list = res_data.get("jobs", [])
             next_continue_token = res_data.get("continue", None)
             
             # Limit concurrent requests to reduce load
-            max_workers = min(5, self.jobs_per_page)
+            max_workers = min(self.num_workers, self.jobs_per_page)
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 job_results = [executor.submit(self._process_job, job) for job in jobs_list]
 
@@ -260,7 +259,14 @@ class ZipRecruiter(Scraper):
 
     def _get_cookies(self):
         """
-        Sends a session event to the API with device properties.
+        Loads the session cookies, sending a session event to the API with device
+        properties only when no other instance has fresh ones for these proxies.
         """
-        url = f"{self.api_url}/jobs-app/event"
-        self.session.post(url, data=get_cookie_data)
+
+        def send_event() -> list[dict]:
+            url = f"{self.api_url}/jobs-app/event"
+            self.session.post(url, data=get_cookie_data)
+            return dump_cookies(self.session.cookies)
+
+        cookies = session_bootstrap.get(json.dumps(self.proxies), send_event)
+        load_cookies(self.session.cookies, cookies)
@@ -1,3 +1,9 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
 from model import JobType
 
 
@@ -29,3 +35,53 @@ def get_job_type_enum(job_type_str: str) -> list[JobType] | None:
         if job_type_str in job_type.value:
             return [job_type]
     return None
+
+
+class SessionBootstrap:
+    """
+    Cookies from the ZipRecruiter session event, shared by every instance and query
+    in the process so the event is only posted again once they expire
+    """
+
+    def __init__(self, ttl: float = 1800):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._jars: dict[str, tuple[float, list[dict]]] = {}
+
+    def get(self, key: str, bootstrap: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Cached cookies for key (e.g. the proxies used), calling bootstrap when there
+        are none or they expired. Concurrent callers for the same key wait for a
+        single bootstrap, other keys bootstrap in parallel.
+        """
+        with self._lock:
+            cookies = self._fresh(key)
+            if cookies is not None:
+                return cookies
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                # bootstrapped by the caller we waited for
+                cookies = self._fresh(key)
+                if cookies is not None:
+                    return cookies
+            cookies = bootstrap()
+            if cookies:
+                expires = [c["expires"] for c in cookies if c.get("expires")]
+                with self._lock:
+                    self._jars[key] = (min([time.time() + self.ttl, *expires]), cookies)
+            return cookies
+
+    def clear(self):
+        with self._lock:
+            self._jars.clear()
+
+    def _fresh(self, key: str) -> list[dict] | None:
+        entry = self._jars.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        return None
+
+
+session_bootstrap = SessionBootstrap()